@@ -1,11 +1,13 @@
 import os
 import random
 import subprocess
+import time
 from pathlib import Path
 from typing import Optional
 
 import typer
 from pxblat import extc
+from pxblat.server import build_index
 from pysam import FastaFile
 from rich import print
 
@@ -92,6 +94,25 @@ def run_cmd(cmd: str) -> None:
 # f"./bin/gfServer start localhost {PORT} tests/data/test_ref.2bit -canStop -stepSize=5 -debugLog"
 
 
+@app.command()
+def bench_index(two_bit: Path, *, threads: int = 6, trans: bool = True):
+    """Compare building an index on one thread and on several threads."""
+    server_option = extc.ServerOption().withTrans(trans).build()
+    suffix = "trans" if trans else "untrans"
+    outdir = Path("./benchmark/result/")
+
+    indexes = []
+    for n in [1, threads]:
+        index_file = outdir / str(n) / f"{two_bit.stem}.{suffix}.gfidx"
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        build_index(index_file.as_posix(), [two_bit.as_posix()], server_option, threads=n)
+        print(f"{n} threads: {time.perf_counter() - start:.2f}s")
+        indexes.append(index_file.read_bytes())
+
+    print(f"same index: {indexes[0] == indexes[1]}")
+
+
 def fas():
     for f in Path("./benchmark/fas/").glob("*.fa"):
         yield f
@@ -2,21 +2,27 @@ from __future__ import annotations
 
 from rich.traceback import install
 
-from .extc import ClientOption, ServerOption, TwoBitToFaOption, UsageStats
+from .extc import ClientOption, ConnectionPool, ServerOption, TargetFileCache, TwoBitToFaOption, UsageStats
 from .parser import read
 from .server import (
+    AsyncClient,
     Client,
     ClientThread,
+    Index,
     Server,
     Status,
     build_index,
     check_port_in_use,
     check_port_open,
+    check_server_ready,
     copy_client_option,
     create_client_option,
     create_server_option,
     files,
     find_free_port,
+    health_server,
+    is_unix_address,
+    package_genome,
     query_server,
     server_query,
     start_server,
@@ -35,13 +41,18 @@ install(show_locals=True)
 
 __all__ = [
     "Server",
+    "Index",
     "ClientThread",
     "Client",
+    "AsyncClient",
     "files",
     "server_query",
     "start_server_mt",
     "start_server",
     "status_server",
+    "health_server",
+    "is_unix_address",
+    "check_server_ready",
     "stop_server",
     "create_client_option",
     "query_server",
@@ -58,7 +69,10 @@ __all__ = [
     "read",
     "TwoBitToFaOption",
     "ClientOption",
+    "ConnectionPool",
     "ServerOption",
+    "TargetFileCache",
     "UsageStats",
     "build_index",
+    "package_genome",
 ]
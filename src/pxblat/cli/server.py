@@ -6,6 +6,8 @@ from rich import print
 from pxblat.extc import UsageStats
 from pxblat.server import (
     create_server_option,
+    health_server,
+    package_genome,
     start_server_mt,
     status_server,
     stop_server,
@@ -186,7 +188,35 @@ two_bit: Path = typer.Argument(
     help="Two bit file",
 )
 
-threads: int = typer.Option(2, "--threads", help="Number of threads to use")
+threads: int = typer.Option(
+    2,
+    "--threads",
+    help="Number of threads building the index and answering clients, 0 uses one thread per available CPU.",
+)
+
+drainTimeout: int = typer.Option(
+    default_option.drainTimeout,
+    "--drainTimeout",
+    help="Seconds a quit message waits for requests in flight before abandoning them.",
+)
+
+maxPending: int = typer.Option(
+    default_option.maxPending,
+    "--maxPending",
+    help="Number of connections waiting for a thread before new connections are no longer accepted, 0 is unbounded.",
+)
+
+eventLoop: bool = typer.Option(
+    default_option.eventLoop,
+    "--eventLoop",
+    help="Read requests with epoll and hand threads only requests received in full.",
+)
+
+workers: int = typer.Option(
+    default_option.workers,
+    "--workers",
+    help="Number of processes forked after loading the index that share it and the port, 0 serves from one process.",
+)
 
 
 @server_app.command()
@@ -209,6 +239,11 @@ def start(
     canStop: bool = canStop,
     indexFile: Path = indexFile,
     timeout: int = timeout,
+    threads: int = threads,
+    maxPending: int = maxPending,
+    drainTimeout: int = drainTimeout,
+    eventLoop: bool = eventLoop,
+    workers: int = workers,
 ):
     """To set up a server.
 
@@ -230,6 +265,11 @@ def start(
         .withMaxNtSize(maxNtSize)
         .withCanStop(canStop)
         .withTimeout(timeout)
+        .withThreads(threads)
+        .withMaxPending(maxPending)
+        .withDrainTimeout(drainTimeout)
+        .withEventLoop(eventLoop)
+        .withWorkers(workers)
     )
 
     if log is not None:
@@ -263,11 +303,14 @@ def stop(host: str, port: int):
     console = Console()
 
     try:
-        stop_server(host, port)
+        abandoned = stop_server(host, port, wait=True)
     except ConnectionRefusedError:
         console.print(f"[yellow]Server {host}:{port} may be not running")
     else:
-        console.print(f"[green]Server {host}:{port} stopped")
+        if abandoned is None:
+            console.print(f"[green]Server {host}:{port} stopped")
+        else:
+            console.print(f"[green]Server {host}:{port} stopped, {abandoned} requests abandoned")
 
 
 @server_app.command()
@@ -283,8 +326,73 @@ def status(
     print(ret)
 
 
+@server_app.command()
+def health(host: str, port: int):
+    """To check at once whether the server has loaded its index, exits with 1 otherwise."""
+    try:
+        ret = health_server(host, port)
+    except OSError:
+        ret = {}
+    print(ret)
+    if ret.get("index") != "loaded":
+        raise typer.Exit(code=1)
+
+
 @server_app.command()
 def files(host: str, port: int):
     """To get input file list."""
     ret = server_files(host, port)
     print(ret)
+
+
+@server_app.command()
+def package(
+    sequence: Path = typer.Argument(
+        ...,
+        exists=True,
+        dir_okay=False,
+        help="FASTA or two bit file of the genome",
+    ),
+    out_dir: Path = typer.Argument(
+        ...,
+        file_okay=False,
+        help="Directory to write $genome.2bit, $genome.untrans.gfidx, $genome.trans.gfidx, $genome.sha256 and "
+        "$genome.manifest.json to",
+    ),
+    genome: str = typer.Option(
+        None,
+        "--genome",
+        help="Genome name. Default is the name of the sequence file without its extension.",
+    ),
+    tileSize: int = tileSize,
+    stepSize: int = stepSize,
+    minMatch: int = minMatch,
+    mask: bool = mask,
+    repMatch: int = repMatch,
+    noSimpRepMask: bool = noSimpRepMask,
+    threads: int = threads,
+    force: bool = typer.Option(
+        False,
+        "--force",
+        help="Rebuild every file even if it is up to date.",
+    ),
+):
+    """To prepare a genome for a dynamic server.
+
+    Writes the two bit file and both indexes of a genome, building the indexes in parallel, with their checksums.
+    Files that are unchanged since they were written with the same index options are kept.
+    """
+    server_option = (
+        create_server_option()
+        .withTileSize(tileSize)
+        .withStepSize(stepSize)
+        .withMinMatch(minMatch)
+        .withMask(mask)
+        .withRepMatch(repMatch)
+        .withNoSimpRepMask(noSimpRepMask)
+        .withThreads(threads)
+        .build()
+    )
+
+    ret = package_genome(sequence, out_dir, genome, server_option, force=force)
+    print(ret)
@@ -2,6 +2,7 @@
 from __future__ import annotations
 import pxblat._extc.cppbinding
 import typing
+import typing_extensions
 
 __all__ = [
     "IntStruct",
@@ -14,18 +15,26 @@ __all__ = [
     "getFileList",
     "getPortIx",
     "ClientOption",
+    "ConnectionPool",
     "gfServer",
+    "ServerIndex",
     "ServerOption",
+    "TargetFileCache",
     "pcrServer",
     "pygetFileList",
+    "pygfAlignRanges",
     "pygfClient",
     "pygfClient2",
+    "pygfClientBatch",
+    "pygfClientBuffer",
+    "pygfClientSeqs",
     "pygfClient_no_gil",
     "pyqueryServer",
     "pystartServer",
     "pystartServer_no_gil",
     "pystatusServer",
     "queryServer",
+    "serverThreadCount",
     "startServer",
     "statusServer",
     "stopServer",
@@ -174,6 +183,22 @@ class UsageStats:
     def __init__(self) -> None: ...
     def __setstate__(self, arg0: tuple) -> None: ...
     def __str__(self) -> str: ...
+    def addLatency(self, micros: int) -> None:
+        """
+        C++: cppbinding::UsageStats::addLatency(long) --> void
+        """
+    def latencyMean(self) -> float:
+        """
+        C++: cppbinding::UsageStats::latencyMean() const --> double
+        """
+    def queriesPerSecond(self) -> float:
+        """
+        C++: cppbinding::UsageStats::queriesPerSecond() const --> double
+        """
+    def uptime(self) -> float:
+        """
+        C++: cppbinding::UsageStats::uptime() const --> double
+        """
     @property
     def aaCount(self) -> int:
         """
@@ -199,6 +224,22 @@ class UsageStats:
     def blatCount(self, arg0: int) -> None:
         pass
     @property
+    def latencyMax(self) -> int:
+        """
+        :type: int
+        """
+    @latencyMax.setter
+    def latencyMax(self, arg0: int) -> None:
+        pass
+    @property
+    def latencyTotal(self) -> int:
+        """
+        :type: int
+        """
+    @latencyTotal.setter
+    def latencyTotal(self, arg0: int) -> None:
+        pass
+    @property
     def missCount(self) -> int:
         """
         :type: int
@@ -462,6 +503,85 @@ class ClientOption:
         pass
     pass
 
+
+class ConnectionPool:
+    def __init__(self, hostName: str, portName: str, maxIdle: int = 8, idleTimeout: int = 2) -> None: ...
+    def close(self) -> None:
+        """
+        C++: cppbinding::ConnectionPool::close() --> void
+        """
+    def idleCount(self) -> int:
+        """
+        C++: cppbinding::ConnectionPool::idleCount() --> std::size_t
+        """
+    def keepAliveSupported(self) -> bool:
+        """
+        C++: cppbinding::ConnectionPool::keepAliveSupported() const --> bool
+        """
+    def batchSupported(self) -> bool:
+        """
+        C++: cppbinding::ConnectionPool::batchSupported() const --> bool
+        """
+    @property
+    def hostName(self) -> str:
+        """
+        :type: str
+        """
+    @property
+    def idleTimeout(self) -> int:
+        """
+        :type: int
+        """
+    @idleTimeout.setter
+    def idleTimeout(self, arg0: int) -> None:
+        pass
+    @property
+    def maxIdle(self) -> int:
+        """
+        :type: int
+        """
+    @maxIdle.setter
+    def maxIdle(self, arg0: int) -> None:
+        pass
+    @property
+    def portName(self) -> str:
+        """
+        :type: str
+        """
+    pass
+
+class ServerIndex:
+    def __init__(self, seqFiles: typing.List[str], option: ServerOption) -> None: ...
+    def align(
+        self,
+        clientOption: ClientOption,
+        names: typing.List[str],
+        dnas: typing.List[str],
+        fileCache: TargetFileCache = None,
+    ) -> bytes:
+        """
+        C++: cppbinding::ServerIndex::align(struct cppbinding::ClientOption, const class std::vector<std::string> &, const class std::vector<std::string> &, class cppbinding::TargetFileCache *) const --> std::string
+        """
+    def ranges(self, dna: str) -> typing.List[str]:
+        """
+        C++: cppbinding::ServerIndex::ranges(std::string) const --> class std::vector<std::string >
+        """
+    def serve(self, hostName: str, portName: str, stats: UsageStats) -> int:
+        """
+        C++: cppbinding::ServerIndex::serve(std::string, std::string, struct cppbinding::UsageStats &) --> int
+        """
+    @property
+    def option(self) -> ServerOption:
+        """
+        :type: ServerOption
+        """
+    @property
+    def seqFiles(self) -> typing.List[str]:
+        """
+        :type: typing.List[str]
+        """
+    pass
+
 class ServerOption:
     def __getstate__(self) -> tuple: ...
     @typing.overload
@@ -486,6 +606,14 @@ class ServerOption:
         """
         C++: cppbinding::ServerOption::withDebugLog(bool) --> struct cppbinding::ServerOption &
         """
+    def withDrainTimeout(self, drainTimeout_: int) -> ServerOption:
+        """
+        C++: cppbinding::ServerOption::withDrainTimeout(int) --> struct cppbinding::ServerOption &
+        """
+    def withEventLoop(self, eventLoop_: bool) -> ServerOption:
+        """
+        C++: cppbinding::ServerOption::withEventLoop(bool) --> struct cppbinding::ServerOption &
+        """
     def withIndexFile(self, indexFile_: str) -> ServerOption:
         """
         C++: cppbinding::ServerOption::withIndexFile(std::string) --> struct cppbinding::ServerOption &
@@ -494,6 +622,10 @@ class ServerOption:
         """
         C++: cppbinding::ServerOption::withIpLog(bool) --> struct cppbinding::ServerOption &
         """
+    def withKeepAliveTimeout(self, keepAliveTimeout_: int) -> ServerOption:
+        """
+        C++: cppbinding::ServerOption::withKeepAliveTimeout(int) --> struct cppbinding::ServerOption &
+        """
     def withLog(self, log_: str) -> ServerOption:
         """
         C++: cppbinding::ServerOption::withLog(std::string) --> struct cppbinding::ServerOption &
@@ -502,6 +634,10 @@ class ServerOption:
         """
         C++: cppbinding::ServerOption::withLogFacility(std::string) --> struct cppbinding::ServerOption &
         """
+    def withMaxPending(self, maxPending_: int) -> ServerOption:
+        """
+        C++: cppbinding::ServerOption::withMaxPending(int) --> struct cppbinding::ServerOption &
+        """
     def withMask(self, mask_: bool) -> ServerOption:
         """
         C++: cppbinding::ServerOption::withMask(bool) --> struct cppbinding::ServerOption &
@@ -570,6 +706,10 @@ class ServerOption:
         """
         C++: cppbinding::ServerOption::withTrans(bool) --> struct cppbinding::ServerOption &
         """
+    def withWorkers(self, workers_: int) -> ServerOption:
+        """
+        C++: cppbinding::ServerOption::withWorkers(int) --> struct cppbinding::ServerOption &
+        """
     @property
     def allowOneMismatch(self) -> bool:
         """
@@ -595,6 +735,22 @@ class ServerOption:
     def debugLog(self, arg0: bool) -> None:
         pass
     @property
+    def drainTimeout(self) -> int:
+        """
+        :type: int
+        """
+    @drainTimeout.setter
+    def drainTimeout(self, arg0: int) -> None:
+        pass
+    @property
+    def eventLoop(self) -> bool:
+        """
+        :type: bool
+        """
+    @eventLoop.setter
+    def eventLoop(self, arg0: bool) -> None:
+        pass
+    @property
     def genome(self) -> str:
         """
         :type: str
@@ -627,6 +783,14 @@ class ServerOption:
     def ipLog(self, arg0: bool) -> None:
         pass
     @property
+    def keepAliveTimeout(self) -> int:
+        """
+        :type: int
+        """
+    @keepAliveTimeout.setter
+    def keepAliveTimeout(self, arg0: int) -> None:
+        pass
+    @property
     def log(self) -> str:
         """
         :type: str
@@ -651,6 +815,14 @@ class ServerOption:
     def mask(self, arg0: bool) -> None:
         pass
     @property
+    def maxPending(self) -> int:
+        """
+        :type: int
+        """
+    @maxPending.setter
+    def maxPending(self, arg0: int) -> None:
+        pass
+    @property
     def maxAaSize(self) -> int:
         """
         :type: int
@@ -778,6 +950,34 @@ class ServerOption:
     @trans.setter
     def trans(self, arg0: bool) -> None:
         pass
+    @property
+    def workers(self) -> int:
+        """
+        :type: int
+        """
+    @workers.setter
+    def workers(self, arg0: int) -> None:
+        pass
+    pass
+
+class TargetFileCache:
+    def __init__(self, maxOpenFiles: int = 16) -> None: ...
+    def close(self) -> None:
+        """
+        C++: cppbinding::TargetFileCache::close() --> void
+        """
+    def openFiles(self) -> int:
+        """
+        C++: cppbinding::TargetFileCache::openFiles() --> std::size_t
+        """
+    @property
+    def maxOpenFiles(self) -> int:
+        """
+        :type: int
+        """
+    @maxOpenFiles.setter
+    def maxOpenFiles(self, arg0: int) -> None:
+        pass
     pass
 
 def buildIndex(
@@ -869,14 +1069,34 @@ def pygetFileList(hostName: str, portName: str) -> str:
     C++: cppbinding::pygetFileList(std::string &, std::string &) --> std::string
     """
 
-def pygfClient(option: ClientOption) -> bytes:
+def pygfAlignRanges(option: ClientOption, names: typing.List[str], dnas: typing.List[str], forwardRanges: typing.List[typing.List[str]], reverseRanges: typing.List[typing.List[str]], fileCache: TargetFileCache | None = None) -> bytes:
     """
-    C++: cppbinding::pygfClient(struct cppbinding::ClientOption &) --> std::string
+    C++: cppbinding::pygfAlignRanges(struct cppbinding::ClientOption &, const class std::vector<std::string> &, const class std::vector<std::string> &, const class std::vector<class std::vector<std::string>> &, const class std::vector<class std::vector<std::string>> &, class cppbinding::TargetFileCache *) --> std::string
+    """
+
+def pygfClient(option: ClientOption, pool: ConnectionPool | None = None, fileCache: TargetFileCache | None = None) -> bytes:
+    """
+    C++: cppbinding::pygfClient(struct cppbinding::ClientOption &, class cppbinding::ConnectionPool *, class cppbinding::TargetFileCache *) --> std::string
     """
 
 def pygfClient2(arg0: ClientOption) -> str:
     pass
 
+def pygfClientBatch(option: ClientOption, seqs: typing.List[typing.Tuple[str, str]], pool: ConnectionPool | None = None, fileCache: TargetFileCache | None = None) -> bytes:
+    """
+    C++: cppbinding::pygfClientBatch(struct cppbinding::ClientOption &, const class std::vector<struct std::pair<std::string, std::string>> &, class cppbinding::ConnectionPool *, class cppbinding::TargetFileCache *) --> std::string
+    """
+
+def pygfClientBuffer(option: ClientOption, seqs: typing_extensions.Buffer, offsets: typing.List[int], names: typing.List[str], pool: ConnectionPool | None = None, fileCache: TargetFileCache | None = None) -> bytes:
+    """
+    C++: cppbinding::pygfClientBuffer(struct cppbinding::ClientOption &, const char *, std::size_t, const class std::vector<long> &, const class std::vector<std::string> &, class cppbinding::ConnectionPool *, class cppbinding::TargetFileCache *) --> std::string
+    """
+
+def pygfClientSeqs(option: ClientOption, seqs: typing.List[typing.Tuple[str, str]], pool: ConnectionPool | None = None, fileCache: TargetFileCache | None = None) -> bytes:
+    """
+    C++: cppbinding::pygfClientSeqs(struct cppbinding::ClientOption &, const class std::vector<struct std::pair<std::string, std::string>> &, class cppbinding::ConnectionPool *, class cppbinding::TargetFileCache *) --> std::string
+    """
+
 def pygfClient_no_gil(option: ClientOption) -> None:
     """
     C++: cppbinding::pygfClient(struct cppbinding::ClientOption &) --> std::string
@@ -925,6 +1145,11 @@ def queryServer(
     C++: cppbinding::queryServer(std::string &, std::string &, std::string &, std::string &, bool, bool) --> void
     """
 
+def serverThreadCount(threads: int) -> int:
+    """
+    C++: cppbinding::serverThreadCount(int) --> int
+    """
+
 def startServer(
     hostName: str,
     portName: str,
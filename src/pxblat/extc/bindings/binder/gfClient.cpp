@@ -101,11 +101,81 @@ void bind_gfClient(std::function< pybind11::module &(std::string const &namespac
 
 	}
 
-	// cppbinding::pygfClient(struct cppbinding::ClientOption &) file:gfClient.hpp line:118
-  M("cppbinding").def("pygfClient", [](cppbinding::ClientOption&o) {
-    auto ret = cppbinding::pygfClient(o);
+	{ // cppbinding::ConnectionPool file:gfClient.hpp line:125
+		pybind11::class_<cppbinding::ConnectionPool, std::shared_ptr<cppbinding::ConnectionPool>> cl(M("cppbinding"), "ConnectionPool", "");
+
+		cl.def( pybind11::init<std::string, std::string, int, int>(), pybind11::arg("hostName"), pybind11::arg("portName"), pybind11::arg("maxIdle") = 8, pybind11::arg("idleTimeout") = 2 );
+		cl.def_readonly("hostName", &cppbinding::ConnectionPool::hostName);
+		cl.def_readonly("portName", &cppbinding::ConnectionPool::portName);
+		cl.def_readwrite("maxIdle", &cppbinding::ConnectionPool::maxIdle);
+		cl.def_readwrite("idleTimeout", &cppbinding::ConnectionPool::idleTimeout);
+		cl.def("close", (void (cppbinding::ConnectionPool::*)()) &cppbinding::ConnectionPool::close, "C++: cppbinding::ConnectionPool::close() --> void");
+		cl.def("idleCount", (std::size_t (cppbinding::ConnectionPool::*)()) &cppbinding::ConnectionPool::idleCount, "C++: cppbinding::ConnectionPool::idleCount() --> std::size_t");
+		cl.def("keepAliveSupported", (bool (cppbinding::ConnectionPool::*)() const) &cppbinding::ConnectionPool::keepAliveSupported, "C++: cppbinding::ConnectionPool::keepAliveSupported() const --> bool");
+		cl.def("batchSupported", (bool (cppbinding::ConnectionPool::*)() const) &cppbinding::ConnectionPool::batchSupported, "C++: cppbinding::ConnectionPool::batchSupported() const --> bool");
+	}
+
+	{ // cppbinding::TargetFileCache file:gfClient.hpp line:183
+		pybind11::class_<cppbinding::TargetFileCache, std::shared_ptr<cppbinding::TargetFileCache>> cl(M("cppbinding"), "TargetFileCache", "");
+
+		cl.def( pybind11::init<int>(), pybind11::arg("maxOpenFiles") = 16 );
+		cl.def_readwrite("maxOpenFiles", &cppbinding::TargetFileCache::maxOpenFiles);
+		cl.def("close", (void (cppbinding::TargetFileCache::*)()) &cppbinding::TargetFileCache::close, "C++: cppbinding::TargetFileCache::close() --> void");
+		cl.def("openFiles", (std::size_t (cppbinding::TargetFileCache::*)()) &cppbinding::TargetFileCache::openFiles, "C++: cppbinding::TargetFileCache::openFiles() --> std::size_t");
+	}
+
+	// cppbinding::pygfClient(struct cppbinding::ClientOption &, class cppbinding::ConnectionPool *, class cppbinding::TargetFileCache *) file:gfClient.hpp line:209
+  M("cppbinding").def("pygfClient", [](cppbinding::ClientOption&o, cppbinding::ConnectionPool *pool, cppbinding::TargetFileCache *fileCache) {
+    std::string ret;
+    {
+      pybind11::gil_scoped_release release;
+      ret = cppbinding::pygfClient(o, pool, fileCache);
+    }
     return pybind11::bytes(ret);
-  }, "C++: cppbinding::pygfClient(struct cppbinding::ClientOption &) --> std::string", pybind11::arg("option"));
+  }, "C++: cppbinding::pygfClient(struct cppbinding::ClientOption &, class cppbinding::ConnectionPool *, class cppbinding::TargetFileCache *) --> std::string", pybind11::arg("option"), pybind11::arg("pool") = nullptr, pybind11::arg("fileCache") = nullptr);
+
+	// cppbinding::pygfClientSeqs(struct cppbinding::ClientOption &, const class std::vector<struct std::pair<std::string, std::string>> &, class cppbinding::ConnectionPool *, class cppbinding::TargetFileCache *) file:gfClient.hpp line:210
+  M("cppbinding").def("pygfClientSeqs", [](cppbinding::ClientOption &o, std::vector<std::pair<std::string, std::string>> const &seqs, cppbinding::ConnectionPool *pool, cppbinding::TargetFileCache *fileCache) {
+    std::string ret;
+    {
+      pybind11::gil_scoped_release release;
+      ret = cppbinding::pygfClientSeqs(o, seqs, pool, fileCache);
+    }
+    return pybind11::bytes(ret);
+  }, "C++: cppbinding::pygfClientSeqs(struct cppbinding::ClientOption &, const class std::vector<struct std::pair<std::string, std::string>> &, class cppbinding::ConnectionPool *, class cppbinding::TargetFileCache *) --> std::string", pybind11::arg("option"), pybind11::arg("seqs"), pybind11::arg("pool") = nullptr, pybind11::arg("fileCache") = nullptr);
+
+	// cppbinding::pygfClientBatch(struct cppbinding::ClientOption &, const class std::vector<struct std::pair<std::string, std::string>> &, class cppbinding::ConnectionPool *, class cppbinding::TargetFileCache *) file:gfClient.hpp line:221
+  M("cppbinding").def("pygfClientBatch", [](cppbinding::ClientOption &o, std::vector<std::pair<std::string, std::string>> const &seqs, cppbinding::ConnectionPool *pool, cppbinding::TargetFileCache *fileCache) {
+    std::string ret;
+    {
+      pybind11::gil_scoped_release release;
+      ret = cppbinding::pygfClientBatch(o, seqs, pool, fileCache);
+    }
+    return pybind11::bytes(ret);
+  }, "C++: cppbinding::pygfClientBatch(struct cppbinding::ClientOption &, const class std::vector<struct std::pair<std::string, std::string>> &, class cppbinding::ConnectionPool *, class cppbinding::TargetFileCache *) --> std::string", pybind11::arg("option"), pybind11::arg("seqs"), pybind11::arg("pool") = nullptr, pybind11::arg("fileCache") = nullptr);
+
+	// cppbinding::pygfClientBuffer(struct cppbinding::ClientOption &, const char *, std::size_t, const class std::vector<long> &, const class std::vector<std::string> &, class cppbinding::ConnectionPool *, class cppbinding::TargetFileCache *) file:gfClient.hpp line:214
+  M("cppbinding").def("pygfClientBuffer", [](cppbinding::ClientOption &o, pybind11::buffer seqs, std::vector<std::int64_t> const &offsets, std::vector<std::string> const &names, cppbinding::ConnectionPool *pool, cppbinding::TargetFileCache *fileCache) {
+    pybind11::buffer_info info = seqs.request();
+    if (info.itemsize != 1 || info.ndim != 1 || info.strides[0] != 1)
+      throw std::invalid_argument("seqs must be a contiguous one-dimensional buffer of bytes");
+    std::string ret;
+    {
+      pybind11::gil_scoped_release release;
+      ret = cppbinding::pygfClientBuffer(o, static_cast<char const *>(info.ptr), info.size, offsets, names, pool, fileCache);
+    }
+    return pybind11::bytes(ret);
+  }, "C++: cppbinding::pygfClientBuffer(struct cppbinding::ClientOption &, const char *, std::size_t, const class std::vector<long> &, const class std::vector<std::string> &, class cppbinding::ConnectionPool *, class cppbinding::TargetFileCache *) --> std::string", pybind11::arg("option"), pybind11::arg("seqs"), pybind11::arg("offsets"), pybind11::arg("names"), pybind11::arg("pool") = nullptr, pybind11::arg("fileCache") = nullptr);
+
+	// cppbinding::pygfAlignRanges(struct cppbinding::ClientOption &, const class std::vector<std::string> &, const class std::vector<std::string> &, const class std::vector<class std::vector<std::string>> &, const class std::vector<class std::vector<std::string>> &, class cppbinding::TargetFileCache *) file:gfClient.hpp line:217
+  M("cppbinding").def("pygfAlignRanges", [](cppbinding::ClientOption &o, std::vector<std::string> const &names, std::vector<std::string> const &dnas, std::vector<std::vector<std::string>> const &forwardRanges, std::vector<std::vector<std::string>> const &reverseRanges, cppbinding::TargetFileCache *fileCache) {
+    std::string ret;
+    {
+      pybind11::gil_scoped_release release;
+      ret = cppbinding::pygfAlignRanges(o, names, dnas, forwardRanges, reverseRanges, fileCache);
+    }
+    return pybind11::bytes(ret);
+  }, "C++: cppbinding::pygfAlignRanges(struct cppbinding::ClientOption &, const class std::vector<std::string> &, const class std::vector<std::string> &, const class std::vector<class std::vector<std::string>> &, const class std::vector<class std::vector<std::string>> &, class cppbinding::TargetFileCache *) --> std::string", pybind11::arg("option"), pybind11::arg("names"), pybind11::arg("dnas"), pybind11::arg("forwardRanges"), pybind11::arg("reverseRanges"), pybind11::arg("fileCache") = nullptr);
 
    M("cppbinding").def("pygfClient_no_gil", [](cppbinding::ClientOption o) {
     auto ret = cppbinding::pygfClient_no_gil(o);
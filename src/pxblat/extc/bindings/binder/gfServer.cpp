@@ -27,25 +27,32 @@ void bind_gfServer(std::function< pybind11::module &(std::string const &namespac
 	{ // cppbinding::UsageStats file:gfServer.hpp line:45
 		pybind11::class_<cppbinding::UsageStats, std::shared_ptr<cppbinding::UsageStats>> cl(M("cppbinding"), "UsageStats", "");
 		cl.def( pybind11::init( [](){ return new cppbinding::UsageStats(); } ) );
-		cl.def_readwrite("baseCount", &cppbinding::UsageStats::baseCount);
-		cl.def_readwrite("blatCount", &cppbinding::UsageStats::blatCount);
-		cl.def_readwrite("aaCount", &cppbinding::UsageStats::aaCount);
-		cl.def_readwrite("pcrCount", &cppbinding::UsageStats::pcrCount);
-		cl.def_readwrite("warnCount", &cppbinding::UsageStats::warnCount);
-		cl.def_readwrite("noSigCount", &cppbinding::UsageStats::noSigCount);
-		cl.def_readwrite("missCount", &cppbinding::UsageStats::missCount);
-		cl.def_readwrite("trimCount", &cppbinding::UsageStats::trimCount);
+		cl.def_property("baseCount", [](cppbinding::UsageStats const &o) -> long { return o.baseCount; }, [](cppbinding::UsageStats &o, long v) { o.baseCount = v; });
+		cl.def_property("blatCount", [](cppbinding::UsageStats const &o) -> long { return o.blatCount; }, [](cppbinding::UsageStats &o, long v) { o.blatCount = v; });
+		cl.def_property("aaCount", [](cppbinding::UsageStats const &o) -> long { return o.aaCount; }, [](cppbinding::UsageStats &o, long v) { o.aaCount = v; });
+		cl.def_property("pcrCount", [](cppbinding::UsageStats const &o) -> long { return o.pcrCount; }, [](cppbinding::UsageStats &o, long v) { o.pcrCount = v; });
+		cl.def_property("warnCount", [](cppbinding::UsageStats const &o) -> int { return o.warnCount; }, [](cppbinding::UsageStats &o, int v) { o.warnCount = v; });
+		cl.def_property("noSigCount", [](cppbinding::UsageStats const &o) -> int { return o.noSigCount; }, [](cppbinding::UsageStats &o, int v) { o.noSigCount = v; });
+		cl.def_property("missCount", [](cppbinding::UsageStats const &o) -> int { return o.missCount; }, [](cppbinding::UsageStats &o, int v) { o.missCount = v; });
+		cl.def_property("trimCount", [](cppbinding::UsageStats const &o) -> int { return o.trimCount; }, [](cppbinding::UsageStats &o, int v) { o.trimCount = v; });
+		cl.def_property("latencyTotal", [](cppbinding::UsageStats const &o) -> long { return o.latencyTotal; }, [](cppbinding::UsageStats &o, long v) { o.latencyTotal = v; });
+		cl.def_property("latencyMax", [](cppbinding::UsageStats const &o) -> long { return o.latencyMax; }, [](cppbinding::UsageStats &o, long v) { o.latencyMax = v; });
+		cl.def("addLatency", (void (cppbinding::UsageStats::*)(long)) &cppbinding::UsageStats::addLatency, "C++: cppbinding::UsageStats::addLatency(long) --> void", pybind11::arg("micros"));
+		cl.def("uptime", (double (cppbinding::UsageStats::*)() const) &cppbinding::UsageStats::uptime, "C++: cppbinding::UsageStats::uptime() const --> double");
+		cl.def("queriesPerSecond", (double (cppbinding::UsageStats::*)() const) &cppbinding::UsageStats::queriesPerSecond, "C++: cppbinding::UsageStats::queriesPerSecond() const --> double");
+		cl.def("latencyMean", (double (cppbinding::UsageStats::*)() const) &cppbinding::UsageStats::latencyMean, "C++: cppbinding::UsageStats::latencyMean() const --> double");
 
 		cl.def("__str__", [](cppbinding::UsageStats const &o) -> std::string { std::ostringstream s; using namespace cppbinding; s << o; return s.str(); } );
 		cl.def("__repr__", [](cppbinding::UsageStats const &o) -> std::string { std::ostringstream s; using namespace cppbinding; s << o; return s.str(); } );
 
         cl.def(pybind11::pickle([](const cppbinding::UsageStats &p) { // __getstate__
-            return pybind11::make_tuple(p.baseCount, p.blatCount, p.aaCount, p.pcrCount, p.warnCount
-                                                            , p.noSigCount, p.missCount, p.trimCount);
+            return pybind11::make_tuple(p.baseCount.load(), p.blatCount.load(), p.aaCount.load(), p.pcrCount.load(), p.warnCount.load()
+                                                            , p.noSigCount.load(), p.missCount.load(), p.trimCount.load()
+                                                            , p.latencyTotal.load(), p.latencyMax.load());
 
              },
             [](pybind11::tuple t) { // __setstate__
-                    if (t.size() != 8)
+                    if (t.size() != 10)
                         throw std::runtime_error("Invalid state!");
 
                     cppbinding::UsageStats p{};
@@ -57,6 +64,8 @@ void bind_gfServer(std::function< pybind11::module &(std::string const &namespac
                     p.noSigCount = t[5].cast<int>();
                     p.missCount = t[6].cast<int>();
                     p.trimCount = t[7].cast<int>();
+                    p.latencyTotal = t[8].cast<long>();
+                    p.latencyMax = t[9].cast<long>();
                     return p;
                 }));
 	}
@@ -90,6 +99,11 @@ void bind_gfServer(std::function< pybind11::module &(std::string const &namespac
 		cl.def_readwrite("genomeDataDir", &cppbinding::ServerOption::genomeDataDir);
 		cl.def_readwrite("threads", &cppbinding::ServerOption::threads);
 		cl.def_readwrite("allowOneMismatch", &cppbinding::ServerOption::allowOneMismatch);
+		cl.def_readwrite("keepAliveTimeout", &cppbinding::ServerOption::keepAliveTimeout);
+		cl.def_readwrite("maxPending", &cppbinding::ServerOption::maxPending);
+		cl.def_readwrite("drainTimeout", &cppbinding::ServerOption::drainTimeout);
+		cl.def_readwrite("eventLoop", &cppbinding::ServerOption::eventLoop);
+		cl.def_readwrite("workers", &cppbinding::ServerOption::workers);
 		cl.def("build", (struct cppbinding::ServerOption & (cppbinding::ServerOption::*)()) &cppbinding::ServerOption::build, "C++: cppbinding::ServerOption::build() --> struct cppbinding::ServerOption &", pybind11::return_value_policy::automatic);
 		cl.def("to_string", (std::string (cppbinding::ServerOption::*)() const) &cppbinding::ServerOption::to_string, "C++: cppbinding::ServerOption::to_string() const --> std::string");
 		cl.def("withCanStop", (struct cppbinding::ServerOption & (cppbinding::ServerOption::*)(bool)) &cppbinding::ServerOption::withCanStop, "C++: cppbinding::ServerOption::withCanStop(bool) --> struct cppbinding::ServerOption &", pybind11::return_value_policy::automatic, pybind11::arg("canStop_"));
@@ -115,6 +129,11 @@ void bind_gfServer(std::function< pybind11::module &(std::string const &namespac
 		cl.def("withIndexFile", (struct cppbinding::ServerOption & (cppbinding::ServerOption::*)(std::string)) &cppbinding::ServerOption::withIndexFile, "C++: cppbinding::ServerOption::withIndexFile(std::string) --> struct cppbinding::ServerOption &", pybind11::return_value_policy::automatic, pybind11::arg("indexFile_"));
 		cl.def("withTimeout", (struct cppbinding::ServerOption & (cppbinding::ServerOption::*)(int)) &cppbinding::ServerOption::withTimeout, "C++: cppbinding::ServerOption::withTimeout(int) --> struct cppbinding::ServerOption &", pybind11::return_value_policy::automatic, pybind11::arg("timeout_"));
 		cl.def("withThreads", (struct cppbinding::ServerOption & (cppbinding::ServerOption::*)(int)) &cppbinding::ServerOption::withThreads, "C++: cppbinding::ServerOption::withThreads(int) --> struct cppbinding::ServerOption &", pybind11::return_value_policy::automatic, pybind11::arg("threads_"));
+		cl.def("withKeepAliveTimeout", (struct cppbinding::ServerOption & (cppbinding::ServerOption::*)(int)) &cppbinding::ServerOption::withKeepAliveTimeout, "C++: cppbinding::ServerOption::withKeepAliveTimeout(int) --> struct cppbinding::ServerOption &", pybind11::return_value_policy::automatic, pybind11::arg("keepAliveTimeout_"));
+		cl.def("withMaxPending", (struct cppbinding::ServerOption & (cppbinding::ServerOption::*)(int)) &cppbinding::ServerOption::withMaxPending, "C++: cppbinding::ServerOption::withMaxPending(int) --> struct cppbinding::ServerOption &", pybind11::return_value_policy::automatic, pybind11::arg("maxPending_"));
+		cl.def("withDrainTimeout", (struct cppbinding::ServerOption & (cppbinding::ServerOption::*)(int)) &cppbinding::ServerOption::withDrainTimeout, "C++: cppbinding::ServerOption::withDrainTimeout(int) --> struct cppbinding::ServerOption &", pybind11::return_value_policy::automatic, pybind11::arg("drainTimeout_"));
+		cl.def("withEventLoop", (struct cppbinding::ServerOption & (cppbinding::ServerOption::*)(bool)) &cppbinding::ServerOption::withEventLoop, "C++: cppbinding::ServerOption::withEventLoop(bool) --> struct cppbinding::ServerOption &", pybind11::return_value_policy::automatic, pybind11::arg("eventLoop_"));
+		cl.def("withWorkers", (struct cppbinding::ServerOption & (cppbinding::ServerOption::*)(int)) &cppbinding::ServerOption::withWorkers, "C++: cppbinding::ServerOption::withWorkers(int) --> struct cppbinding::ServerOption &", pybind11::return_value_policy::automatic, pybind11::arg("workers_"));
 
 		cl.def("__str__", [](cppbinding::ServerOption const &o) -> std::string { std::ostringstream s; using namespace cppbinding; s << o; return s.str(); } );
 		cl.def("__repr__", [](cppbinding::ServerOption const &o) -> std::string { std::ostringstream s; using namespace cppbinding; s << o; return s.str(); } );
@@ -126,11 +145,12 @@ void bind_gfServer(std::function< pybind11::module &(std::string const &namespac
                                             p.maxGap, p.maxNtSize, p.maxTransHits, p.minMatch, p.repMatch,
                                             p.seqLog, p.ipLog, p.debugLog, p.tileSize, p.stepSize,p.trans,
                                             p.syslog, p.perSeqMax, p.noSimpRepMask, p.indexFile, p.timeout,
-                                            p.genome, p.genomeDataDir,p.threads,p.allowOneMismatch);
+                                            p.genome, p.genomeDataDir,p.threads,p.allowOneMismatch,
+                                            p.keepAliveTimeout, p.maxPending, p.drainTimeout, p.eventLoop, p.workers);
 
                  },
                 [](pybind11::tuple t) { // __setstate__
-                  if (t.size() != 26)
+                  if (t.size() != 31)
                       throw std::runtime_error("Invalid state!");
                     cppbinding::ServerOption p{};
                     p.withCanStop(t[0].cast<bool>());
@@ -160,6 +180,11 @@ void bind_gfServer(std::function< pybind11::module &(std::string const &namespac
                     p.genomeDataDir = t[23].cast<std::string>();
                     p.withThreads(t[24].cast<int>());
                     p.allowOneMismatch = t[25].cast<bool>();
+                    p.withKeepAliveTimeout(t[26].cast<int>());
+                    p.withMaxPending(t[27].cast<int>());
+                    p.withDrainTimeout(t[28].cast<int>());
+                    p.withEventLoop(t[29].cast<bool>());
+                    p.withWorkers(t[30].cast<int>());
                     return p;
             }));
 	}
@@ -44,10 +44,33 @@ private:
 
 void bind_pygfServer(std::function< pybind11::module &(std::string const &namespace_) > &M)
 {
-	// cppbinding::pystartServer(std::string &, std::string &, int, class std::vector<std::string > &, struct cppbinding::ServerOption &, struct cppbinding::UsageStats &) file:pygfServer.hpp line:16
+	// cppbinding::serverThreadCount(int) file:pygfServer.hpp line:23
+	M("cppbinding").def("serverThreadCount", (int (*)(int)) &cppbinding::serverThreadCount, "C++: cppbinding::serverThreadCount(int) --> int", pybind11::arg("threads"));
+
+	// cppbinding::pystartServer(std::string &, std::string &, int, class std::vector<std::string > &, struct cppbinding::ServerOption &, struct cppbinding::UsageStats &) file:pygfServer.hpp line:25
 	M("cppbinding").def("pystartServer", (int (*)(std::string , std::string , int, class std::vector<std::string > , struct cppbinding::ServerOption , struct cppbinding::UsageStats )) &cppbinding::pystartServer, "C++: cppbinding::pystartServer(std::string &, std::string &, int, class std::vector<std::string > &, struct cppbinding::ServerOption &, struct cppbinding::UsageStats &) --> int", pybind11::arg("hostName"), pybind11::arg("portName"), pybind11::arg("fileCount"), pybind11::arg("seqFiles"), pybind11::arg("options"), pybind11::arg("stats"));
 	M("cppbinding").def("pystartServer_no_gil", (int (*)(std::string , std::string , int, class std::vector<std::string > , struct cppbinding::ServerOption , struct cppbinding::UsageStats )) &cppbinding::pystartServer, "C++: cppbinding::pystartServer(std::string &, std::string &, int, class std::vector<std::string > &, struct cppbinding::ServerOption &, struct cppbinding::UsageStats &) --> int", pybind11::arg("hostName"), pybind11::arg("portName"), pybind11::arg("fileCount"), pybind11::arg("seqFiles"), pybind11::arg("options"), pybind11::arg("stats"),  pybind11::call_guard<pybind11::gil_scoped_release>());
 
+	{ // cppbinding::ServerIndex file:pygfServer.hpp line:59
+		pybind11::class_<cppbinding::ServerIndex, std::shared_ptr<cppbinding::ServerIndex>> cl(M("cppbinding"), "ServerIndex", "");
+		cl.def( pybind11::init( [](std::vector<std::string> seqFiles, cppbinding::ServerOption option) {
+			pybind11::gil_scoped_release release;
+			return std::make_shared<cppbinding::ServerIndex>(std::move(seqFiles), std::move(option));
+		} ), pybind11::arg("seqFiles"), pybind11::arg("option") );
+		cl.def_readonly("seqFiles", &cppbinding::ServerIndex::seqFiles);
+		cl.def_readonly("option", &cppbinding::ServerIndex::option);
+		cl.def("serve", (int (cppbinding::ServerIndex::*)(std::string, std::string, struct cppbinding::UsageStats &)) &cppbinding::ServerIndex::serve, "C++: cppbinding::ServerIndex::serve(std::string, std::string, struct cppbinding::UsageStats &) --> int", pybind11::arg("hostName"), pybind11::arg("portName"), pybind11::arg("stats"), pybind11::call_guard<pybind11::gil_scoped_release>());
+		cl.def("ranges", (class std::vector<std::string > (cppbinding::ServerIndex::*)(std::string) const) &cppbinding::ServerIndex::ranges, "C++: cppbinding::ServerIndex::ranges(std::string) const --> class std::vector<std::string >", pybind11::arg("dna"), pybind11::call_guard<pybind11::gil_scoped_release>());
+		cl.def("align", [](cppbinding::ServerIndex const &o, cppbinding::ClientOption const &clientOption, std::vector<std::string> const &names, std::vector<std::string> const &dnas, cppbinding::TargetFileCache *fileCache) {
+			std::string ret;
+			{
+				pybind11::gil_scoped_release release;
+				ret = o.align(clientOption, names, dnas, fileCache);
+			}
+			return pybind11::bytes(ret);
+		}, "C++: cppbinding::ServerIndex::align(struct cppbinding::ClientOption, const class std::vector<std::string> &, const class std::vector<std::string> &, class cppbinding::TargetFileCache *) const --> std::string", pybind11::arg("clientOption"), pybind11::arg("names"), pybind11::arg("dnas"), pybind11::arg("fileCache") = nullptr);
+	}
+
 
     {
         pybind11::class_<IntStruct> cl(M("cppbinding"), "IntStruct", "");
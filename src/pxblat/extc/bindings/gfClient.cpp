@@ -1,28 +1,166 @@
 #pragma GCC diagnostic ignored "-Wwrite-strings"
 #include "gfClient.hpp"
 
+#include <netinet/in.h>
+#include <netinet/tcp.h>
+#include <poll.h>
 #include <pybind11/pybind11.h>
 
+#include <functional>
 #include <sstream>
+#include <stdexcept>
+#include <tuple>
 
 #include "dbg.h"
+#include "gfInternal.h"
+#include "netlib.h"
 
 /* gfClient - A client for the genomic finding program that produces a .psl file. */
 /* Copyright 2001-2003 Jim Kent.  All rights reserved. */
 
 namespace cppbinding {
 
-std::string read_inmem_file(FILE *file) {
-  std::ostringstream ret_str{};
-  fseek(file, 0, SEEK_SET);
+MemoryOutput::MemoryOutput() {
+  file_ = open_memstream(&buffer_, &size_);
+  if (file_ == NULL) throw std::runtime_error("cient Can't open in memory file");
+}
+
+MemoryOutput::~MemoryOutput() {
+  if (file_ != NULL) fclose(file_);
+  free(buffer_);
+}
+
+std::string MemoryOutput::str() {
+  fflush(file_);
+  return std::string(buffer_, size_);
+}
+
+ConnectionPool::ConnectionPool(std::string hostName_, std::string portName_, int maxIdle_, int idleTimeout_)
+    : hostName(std::move(hostName_)), portName(std::move(portName_)), maxIdle(maxIdle_), idleTimeout(idleTimeout_) {}
+
+ConnectionPool::~ConnectionPool() { close(); }
+
+static bool socketIsIdle(int fd)
+/* Return true if nothing is waiting to be read on fd.  A socket closed by the
+ * server is readable (EOF), so it is not idle. */
+{
+  struct pollfd pfd;
+  pfd.fd = fd;
+  pfd.events = POLLIN;
+  pfd.revents = 0;
+  return poll(&pfd, 1, 0) == 0;
+}
+
+boolean ConnectionPool::negotiateKeepAlive(gfConnection *conn)
+/* Ask the server to keep the connection open between requests. */
+{
+  char buf[256];
+  safef(buf, sizeof(buf), "%skeepAlive", gfSignature());
+  if (write(conn->fd, buf, strlen(buf)) < 0) return FALSE;
+  if (netGetString(conn->fd, buf) == NULL) return FALSE;
+  if (!sameString(buf, "ok")) return FALSE;
+  // Requests are small write-write-read exchanges, Nagle would delay each of
+  // them once the socket is reused.
+  int flag = 1;
+  setsockopt(conn->fd, IPPROTO_TCP, TCP_NODELAY, &flag, sizeof(flag));
+  return TRUE;
+}
+
+gfConnection *ConnectionPool::acquire() {
+  for (;;) {
+    gfConnection *conn{nullptr};
+    long releasedAt{0};
+    {
+      std::lock_guard<std::mutex> lock(mutex_);
+      if (idle_.empty()) break;
+      std::tie(conn, releasedAt) = idle_.back();
+      idle_.pop_back();
+    }
+    if (clock1000() - releasedAt > idleTimeout * 1000L || !socketIsIdle(conn->fd)) {
+      gfDisconnect(&conn);
+      continue;
+    }
+    return conn;
+  }
+
+  gfConnection *conn = gfConnect(hostName.data(), portName.data(), NULL, NULL);
+  if (keepAliveSupported_) {
+    if (negotiateKeepAlive(conn)) {
+      conn->keepAlive = TRUE;
+    } else {
+      // Server does not know keepAlive and closed the socket, fall back to a
+      // connection per request.  gfBeginRequest will reopen it.
+      keepAliveSupported_ = false;
+      ::close(conn->fd);
+      conn->fd = -1;
+    }
+  }
+  return conn;
+}
+
+void ConnectionPool::release(gfConnection *conn, bool reusable) {
+  if (conn == nullptr) return;
+  if (reusable && conn->keepAlive && conn->fd >= 0) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    if (static_cast<int>(idle_.size()) < maxIdle) {
+      idle_.emplace_back(conn, clock1000());
+      return;
+    }
+  }
+  gfDisconnect(&conn);
+}
+
+void ConnectionPool::close() {
+  std::deque<std::pair<gfConnection *, long>> idle{};
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    idle.swap(idle_);
+  }
+  for (auto &item : idle) gfDisconnect(&item.first);
+}
+
+std::size_t ConnectionPool::idleCount() {
+  std::lock_guard<std::mutex> lock(mutex_);
+  return idle_.size();
+}
+
+TargetFileCache::TargetFileCache(int maxOpenFiles_) : maxOpenFiles(maxOpenFiles_) {}
 
-  int buffsize = 1024;
-  char line[buffsize];
+TargetFileCache::~TargetFileCache() { close(); }
 
-  while (fgets(line, buffsize, file) != NULL) {
-    ret_str << line;
+struct hash *TargetFileCache::acquire() {
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    if (!idle_.empty()) {
+      struct hash *cache = idle_.back();
+      idle_.pop_back();
+      return cache;
+    }
+  }
+  return gfFileCacheNew();
+}
+
+void TargetFileCache::release(struct hash *cache) {
+  if (cache == nullptr) return;
+  std::lock_guard<std::mutex> lock(mutex_);
+  idle_.push_back(cache);
+  gfFileCachesTrim(idle_.data(), idle_.size(), maxOpenFiles);
+}
+
+void TargetFileCache::close() {
+  std::vector<struct hash *> idle{};
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    idle.swap(idle_);
   }
-  return ret_str.str();
+  for (auto &cache : idle) gfFileCacheFree(&cache);
+}
+
+std::size_t TargetFileCache::openFiles() {
+  std::lock_guard<std::mutex> lock(mutex_);
+  std::size_t count = 0;
+  for (auto cache : idle_) count += cache->elCount;
+  return count;
 }
 
 std::string pygfClient_no_gil(ClientOption option) {
@@ -59,11 +197,10 @@ std::string pygfClient_no_gil(ClientOption option) {
     printf("genomeDataDir %s\n", genomeDataDir);
   }
 
+  MemoryOutput memory{};
   FILE *out{NULL};
   if (option.outName.empty()) {
-    int buffsize = 65536;
-    char buffer[buffsize];
-    out = fmemopen(buffer, buffsize, "w+");
+    out = memory.file();
     dbg("outName is empty, output to memory");
   } else {
     dbg("outName is not empty, output to file");
@@ -71,11 +208,6 @@ std::string pygfClient_no_gil(ClientOption option) {
   }
   // FILE *out = mustOpen("stdout", "w");
 
-  if (out == NULL) {
-    // errAbort("Can't open in memory file %s", outName);
-    throw std::runtime_error("cient Can't open in memory file");
-  }
-
   dbg(option, ffIntronMax, enterMainTime);
 
   struct gfOutput *gvo;
@@ -157,14 +289,68 @@ std::string pygfClient_no_gil(ClientOption option) {
   gfFileCacheFree(&tFileCache);
 
   if (option.outName.empty()) {
-    return read_inmem_file(out);
+    return memory.str();
   }
+  carefulClose(&out);
   pybind11::gil_scoped_acquire acquire;
   return "";
 }
 
+std::string pygfClient(ClientOption &option) { return pygfClient(option, nullptr); }
+
+static boolean readNextQuery(struct lineFile *lf, bioSeq *seq, boolean isDna)
+/* Read the next query of lf into seq, which owns its dna and name so that
+ * several threads can read queries at once; faSomeSpeedReadNext keeps them in
+ * one static buffer. */
+{
+  static std::mutex faReadMutex;
+  DNA *dna;
+  int size;
+  char *name;
+  freez(&seq->dna);
+  freez(&seq->name);
+  std::lock_guard<std::mutex> lock(faReadMutex);
+  if (!faSomeSpeedReadNext(lf, &dna, &size, &name, isDna)) return FALSE;
+  seq->dna = cloneStringZ(dna, size);
+  seq->size = size;
+  seq->name = cloneString(name);
+  return TRUE;
+}
+
+static void loadMemoryQuery(char const *name, char const *dna, std::size_t dnaSize, bioSeq *seq, boolean isDna)
+/* Load an in-memory query into seq, filtered the way faSomeSpeedReadNext
+ * filters a FASTA record. */
+{
+  freez(&seq->dna);
+  freez(&seq->name);
+  seq->dna = (DNA *)needLargeMem(dnaSize + 1);
+  int size = 0;
+  for (std::size_t i = 0; i < dnaSize; ++i)
+    if (isalpha(dna[i])) seq->dna[size++] = dna[i];
+  seq->dna[size] = 0;
+  seq->size = size;
+  seq->name = cloneString(name);
+  if (isDna)
+    faToDna(seq->dna, size);
+  else
+    faToProtein(seq->dna, size);
+}
+
+static boolean nextMemoryQuery(std::vector<std::pair<std::string, std::string>> const &seqs, std::size_t &next,
+                               bioSeq *seq, boolean isDna)
+/* Load the next in-memory query into seq. */
+{
+  freez(&seq->dna);
+  freez(&seq->name);
+  if (next >= seqs.size()) return FALSE;
+  auto const &[name, dna] = seqs[next++];
+  loadMemoryQuery(name.data(), dna.data(), dna.size(), seq, isDna);
+  return TRUE;
+}
+
 /* gfClient - A client for the genomic finding program that produces a .psl file. */
-std::string pygfClient(ClientOption &option) {
+static std::string runGfClient(ClientOption &option, ConnectionPool *pool, TargetFileCache *fileCache,
+                               std::function<boolean(bioSeq *, boolean)> const &nextQuery) {
   setFfIntronMax(option.maxIntron);
   long enterMainTime = clock1000();
 
@@ -179,7 +365,6 @@ std::string pygfClient(ClientOption &option) {
 
   auto qTypeName = option.qType.data();
   auto tTypeName = option.tType.data();
-  auto inName = option.inName.data();
   // auto outName = option.outName.data();
   auto SeqDir = option.SeqDir.data();
 
@@ -196,11 +381,10 @@ std::string pygfClient(ClientOption &option) {
     printf("genomeDataDir %s\n", genomeDataDir);
   }
 
+  MemoryOutput memory{};
   FILE *out{NULL};
   if (option.outName.empty()) {
-    int buffsize = 65536;
-    char buffer[buffsize];
-    out = fmemopen(buffer, buffsize, "w+");
+    out = memory.file();
     dbg("outName is empty, output to memory");
   } else {
     dbg("outName is not empty, output to file");
@@ -208,23 +392,18 @@ std::string pygfClient(ClientOption &option) {
   }
   // FILE *out = mustOpen("stdout", "w");
 
-  if (out == NULL) {
-    // errAbort("Can't open in memory file %s", outName);
-    throw std::runtime_error("cient Can't open in memory file");
-  }
-
   dbg(option, ffIntronMax, enterMainTime);
 
   struct gfOutput *gvo;
 
-  struct lineFile *lf = lineFileOpen(inName, TRUE);
-  static bioSeq seq;
+  bioSeq seq;
+  ZeroVar(&seq);
   // FILE *out = mustOpen(outName, "w");
   enum gfType qType = gfTypeFromName(qTypeName);
   enum gfType tType = gfTypeFromName(tTypeName);
   int dotMod = 0;
   char databaseName[256];
-  struct hash *tFileCache = gfFileCacheNew();
+  struct hash *tFileCache = (fileCache != nullptr) ? fileCache->acquire() : gfFileCacheNew();
 
   boolean gotConnection = FALSE;
 
@@ -234,11 +413,16 @@ std::string pygfClient(ClientOption &option) {
                     23, 3.0e9, minIdentity, out);
   gfOutputHead(gvo, out);
 
+  // Dynamic servers keep their own connection open per genome, so only
+  // static servers go through the pool.
+  if (genomeDataDir != NULL) pool = nullptr;
+  struct gfConnection *volatile conn = NULL;
+
   struct errCatch *errCatch = errCatchNew();
   if (errCatchStart(errCatch)) {
-    struct gfConnection *conn = gfConnect(hostName, portName, genome, genomeDataDir);
+    conn = (pool != nullptr) ? pool->acquire() : gfConnect(hostName, portName, genome, genomeDataDir);
     gotConnection = TRUE;
-    while (faSomeSpeedReadNext(lf, &seq.dna, &seq.size, &seq.name, qType != gftProt)) {
+    while (nextQuery(&seq, qType != gftProt)) {
       if (dots != 0) {
         if (++dotMod >= dots) {
           dotMod = 0;
@@ -264,9 +448,27 @@ std::string pygfClient(ClientOption &option) {
       }
       gfOutputQuery(gvo, out);
     }
-    gfDisconnect(&conn);
+    if (pool != nullptr) {
+      pool->release(conn);
+    } else {
+      struct gfConnection *done = conn;
+      gfDisconnect(&done);
+    }
+    conn = NULL;
   } /*	if (errCatchStart(errCatch))	*/
   errCatchEnd(errCatch);
+  if (conn != NULL) {
+    // Aborted in the middle of a request, the socket state is unknown.
+    struct gfConnection *broken = conn;
+    gfDisconnect(&broken);
+  }
+  freez(&seq.dna);
+  freez(&seq.name);
+  // Give the files back before a failed query aborts.
+  if (fileCache != nullptr)
+    fileCache->release(tFileCache);
+  else
+    gfFileCacheFree(&tFileCache);
   if (errCatch->gotError) {
     if (isNotEmpty(errCatch->message->string)) warn("# error: %s", errCatch->message->string);
     if (gotConnection && isDynamic) {
@@ -291,14 +493,242 @@ std::string pygfClient(ClientOption &option) {
   errCatchFree(&errCatch);
 
   // if (out != stdout) printf("Output is in %s\n", outName);
-  gfFileCacheFree(&tFileCache);
 
   if (option.outName.empty()) {
-    return read_inmem_file(out);
+    return memory.str();
   }
+  carefulClose(&out);
   return "";
 }
 
+std::string pygfClient(ClientOption &option, ConnectionPool *pool, TargetFileCache *fileCache) {
+  struct lineFile *lf = lineFileOpen(option.inName.data(), TRUE);
+  try {
+    auto ret = runGfClient(option, pool, fileCache, [lf](bioSeq *seq, boolean isDna) { return readNextQuery(lf, seq, isDna); });
+    lineFileClose(&lf);
+    return ret;
+  } catch (...) {
+    lineFileClose(&lf);
+    throw;
+  }
+}
+
+std::string pygfClientSeqs(ClientOption &option, std::vector<std::pair<std::string, std::string>> const &seqs,
+                           ConnectionPool *pool, TargetFileCache *fileCache) {
+  std::size_t next = 0;
+  return runGfClient(option, pool, fileCache,
+                     [&](bioSeq *seq, boolean isDna) { return nextMemoryQuery(seqs, next, seq, isDna); });
+}
+
+std::string pygfClientBuffer(ClientOption &option, char const *data, std::size_t size,
+                             std::vector<std::int64_t> const &offsets, std::vector<std::string> const &names,
+                             ConnectionPool *pool, TargetFileCache *fileCache) {
+  if (offsets.size() != names.size() + 1)
+    throw std::invalid_argument("offsets must have one more entry than names");
+  for (std::size_t i = 0; i < names.size(); ++i)
+    if (offsets[i] < 0 || offsets[i] > offsets[i + 1] || static_cast<std::size_t>(offsets[i + 1]) > size)
+      throw std::invalid_argument("offsets must be ascending and within the buffer");
+
+  std::size_t next = 0;
+  return runGfClient(option, pool, fileCache, [&](bioSeq *seq, boolean isDna) {
+    if (next >= names.size()) {
+      freez(&seq->dna);
+      freez(&seq->name);
+      return FALSE;
+    }
+    loadMemoryQuery(names[next].data(), data + offsets[next], offsets[next + 1] - offsets[next], seq, isDna);
+    ++next;
+    return TRUE;
+  });
+}
+
+static struct gfRange *loadRanges(std::vector<std::string> const &lines)
+/* Load the range lines a server sent back for a query. */
+{
+  struct gfRange *rangeList = NULL;
+  char buf[256], *row[6];
+  for (auto const &line : lines) {
+    safef(buf, sizeof(buf), "%s", line.data());
+    int rowSize = chopLine(buf, row);
+    if (rowSize < 6) errAbort("Expecting 6 words from server got %d", rowSize);
+    struct gfRange *range = gfRangeLoad(row);
+    slAddHead(&rangeList, range);
+  }
+  slReverse(&rangeList);
+  return rangeList;
+}
+
+std::string gfAlignQueries(ClientOption &option, std::string databaseName,
+                           std::vector<std::string> const &names, std::vector<std::string> const &dnas,
+                           std::function<struct gfRange *(std::size_t, struct dnaSeq *, bool)> const &rangesOf,
+                           TargetFileCache *fileCache) {
+  if (names.size() != dnas.size()) throw std::invalid_argument("names and dnas must have the same length");
+
+  setFfIntronMax(option.maxIntron);
+
+  enum gfType qType = gfTypeFromName(option.qType.data());
+  enum gfType tType = gfTypeFromName(option.tType.data());
+  if (!((tType == gftDna || tType == gftRna) && (qType == gftDna || qType == gftRna)))
+    throw std::invalid_argument("ranges can only be aligned for nucleotide queries against nucleotide databases");
+
+  MemoryOutput memory{};
+  FILE *out = memory.file();
+
+  struct gfOutput *gvo =
+      gfOutputAny(option.outputFormat.data(), cround(option.minIdentity * 10), FALSE, FALSE,
+                  option.nohead ? TRUE : FALSE, databaseName.data(), 23, 3.0e9, option.minIdentity, out);
+  gfOutputHead(gvo, out);
+
+  struct hash *tFileCache = (fileCache != nullptr) ? fileCache->acquire() : gfFileCacheNew();
+  bioSeq seq;
+  ZeroVar(&seq);
+
+  struct errCatch *errCatch = errCatchNew();
+  if (errCatchStart(errCatch)) {
+    for (std::size_t i = 0; i < names.size(); ++i) {
+      loadMemoryQuery(names[i].data(), dnas[i].data(), dnas[i].size(), &seq, TRUE);
+      gfAlignStrandRanges(rangesOf(i, &seq, false), option.SeqDir.data(), &seq, FALSE, option.minScore, tFileCache, gvo);
+      reverseComplement(seq.dna, seq.size);
+      gfAlignStrandRanges(rangesOf(i, &seq, true), option.SeqDir.data(), &seq, TRUE, option.minScore, tFileCache, gvo);
+      gfOutputQuery(gvo, out);
+    }
+  }
+  errCatchEnd(errCatch);
+  freez(&seq.dna);
+  freez(&seq.name);
+  if (fileCache != nullptr)
+    fileCache->release(tFileCache);
+  else
+    gfFileCacheFree(&tFileCache);
+
+  if (errCatch->gotError) {
+    std::string message = errCatch->message->string;
+    errCatchFree(&errCatch);
+    throw std::runtime_error(message);
+  }
+  errCatchFree(&errCatch);
+
+  return memory.str();
+}
+
+std::string pygfAlignRanges(ClientOption &option, std::vector<std::string> const &names,
+                            std::vector<std::string> const &dnas,
+                            std::vector<std::vector<std::string>> const &forwardRanges,
+                            std::vector<std::vector<std::string>> const &reverseRanges,
+                            TargetFileCache *fileCache) {
+  if (names.size() != dnas.size() || names.size() != forwardRanges.size() ||
+      names.size() != reverseRanges.size())
+    throw std::invalid_argument("names, dnas and ranges must have the same length");
+
+  return gfAlignQueries(option, option.hostName + ":" + option.portName, names, dnas,
+                        [&](std::size_t i, struct dnaSeq *, bool isRc) {
+                          return loadRanges(isRc ? reverseRanges[i] : forwardRanges[i]);
+                        },
+                        fileCache);
+}
+
+static boolean gfQueryBatch(struct gfConnection *conn, std::vector<std::string> const &strands, std::size_t first,
+                            std::size_t count, std::vector<std::vector<std::string>> &ranges)
+/* Ask the server for the ranges of strands [first, first + count) with one
+ * batch command.  Return FALSE if the server does not know the command. */
+{
+  char buf[256];
+  gfBeginRequest(conn);
+  safef(buf, sizeof(buf), "%sbatch %zu", gfSignature(), count);
+  mustWriteFd(conn->fd, buf, strlen(buf));
+  if (read(conn->fd, buf, 1) != 1 || buf[0] != 'Y') return FALSE;
+
+  for (std::size_t i = first; i < first + count; ++i) {
+    safef(buf, sizeof(buf), "%zu", strands[i].size());
+    if (!netSendString(conn->fd, buf)) errAbort("Couldn't send batch query %zu", i - first);
+    mustWriteFd(conn->fd, (void *)strands[i].data(), strands[i].size());
+  }
+
+  for (;;) {
+    netRecieveString(conn->fd, buf);
+    if (sameString(buf, "end")) break;
+    char *range = NULL;
+    std::size_t i = strtoul(buf, &range, 10);
+    if (*range != '\t' || i >= count) errAbort("Expecting a query index from server got %s", buf);
+    if (startsWith("Error:", range + 1))
+      warn("couldn't process query %zu of batch: %s", i, range + 1);
+    else
+      ranges[first + i].emplace_back(range + 1);
+  }
+  gfEndRequest(conn);
+  return TRUE;
+}
+
+std::string pygfClientBatch(ClientOption &option, std::vector<std::pair<std::string, std::string>> const &seqs,
+                            ConnectionPool *pool, TargetFileCache *fileCache) {
+  enum gfType qType = gfTypeFromName(option.qType.data());
+  enum gfType tType = gfTypeFromName(option.tType.data());
+  bool isDna = (tType == gftDna || tType == gftRna) && (qType == gftDna || qType == gftRna);
+  // Translated and dynamic servers and output files take the query per strand path.
+  if (!isDna || !option.genomeDataDir.empty() || !option.outName.empty() ||
+      (pool != nullptr && !pool->batchSupported()))
+    return pygfClientSeqs(option, seqs, pool, fileCache);
+
+  std::vector<std::string> names, dnas, strands;
+  names.reserve(seqs.size());
+  dnas.reserve(seqs.size());
+  strands.reserve(2 * seqs.size());
+  bioSeq seq;
+  ZeroVar(&seq);
+  for (auto const &[name, dna] : seqs) {
+    loadMemoryQuery(name.data(), dna.data(), dna.size(), &seq, TRUE);
+    names.push_back(name);
+    dnas.push_back(dna);
+    strands.emplace_back(seq.dna, seq.size);
+    reverseComplement(seq.dna, seq.size);
+    strands.emplace_back(seq.dna, seq.size);
+  }
+  freez(&seq.dna);
+  freez(&seq.name);
+
+  // ranges[2 * i + isRc] are the ranges of strand isRc of query i.
+  std::vector<std::vector<std::string>> ranges(strands.size());
+  volatile boolean refused = FALSE;
+  struct gfConnection *volatile conn = NULL;
+
+  struct errCatch *errCatch = errCatchNew();
+  if (errCatchStart(errCatch)) {
+    conn = (pool != nullptr) ? pool->acquire() : gfConnect(option.hostName.data(), option.portName.data(), NULL, NULL);
+    for (std::size_t first = 0; first < strands.size() && !refused; first += gfBatchMaxQueries) {
+      std::size_t count = std::min(strands.size() - first, static_cast<std::size_t>(gfBatchMaxQueries));
+      refused = !gfQueryBatch(conn, strands, first, count, ranges);
+    }
+    if (pool != nullptr) {
+      pool->release(conn, !refused);
+    } else {
+      struct gfConnection *done = conn;
+      gfDisconnect(&done);
+    }
+    conn = NULL;
+  }
+  errCatchEnd(errCatch);
+  if (conn != NULL) {
+    struct gfConnection *broken = conn;
+    gfDisconnect(&broken);
+  }
+  if (errCatch->gotError) {
+    std::string message = errCatch->message->string;
+    errCatchFree(&errCatch);
+    throw std::runtime_error(message);
+  }
+  errCatchFree(&errCatch);
+
+  if (refused) {
+    // Servers that predate the batch command close the connection instead.
+    if (pool != nullptr) pool->setBatchSupported(false);
+    return pygfClientSeqs(option, seqs, pool, fileCache);
+  }
+
+  return gfAlignQueries(option, option.hostName + ":" + option.portName, names, dnas,
+                        [&](std::size_t i, struct dnaSeq *, bool isRc) { return loadRanges(ranges[2 * i + isRc]); },
+                        fileCache);
+}
+
 ClientOption &ClientOption::build() {
   // char *hostName, char *portName, char *tSeqDir, char *inName, char *outName, char *tTypeName, char *qTypeName
   if (tType == "prot" || tType == "dnax" || tType == "rnax") minIdentity = 25;
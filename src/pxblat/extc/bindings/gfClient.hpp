@@ -1,8 +1,15 @@
 #ifndef GFCLIENT_HPP
 #define GFCLIENT_HPP
 
+#include <atomic>
+#include <cstdint>
+#include <deque>
+#include <functional>
+#include <mutex>
 #include <ostream>
 #include <string>
+#include <utility>
+#include <vector>
 using std::max;
 using std::min;
 
@@ -17,7 +24,12 @@ using std::min;
 #include "portable.h"
 #include "psl.h"
 
+struct gfRange;  // gfInternal.h
+
 namespace cppbinding {
+// Largest number of queries one batch command may carry.
+constexpr int gfBatchMaxQueries = 10000;
+
 // "   -t=type       Database type. Type is one of:\n"
 // "                   dna - DNA sequence\n"
 // "                   prot - protein sequence\n"
@@ -117,9 +129,120 @@ struct ClientOption {
   friend std::ostream &operator<<(std::ostream &os, const ClientOption &option);
 };
 
+// In-memory FILE that grows as output is written to it.
+class MemoryOutput {
+ public:
+  MemoryOutput();
+  ~MemoryOutput();
+  MemoryOutput(const MemoryOutput &) = delete;
+  MemoryOutput &operator=(const MemoryOutput &) = delete;
+
+  FILE *file() { return file_; }
+  // Everything written to file() so far.
+  std::string str();
+
+ private:
+  char *buffer_{nullptr};
+  size_t size_{0};
+  FILE *file_{nullptr};
+};
+
+// Pool of open connections to one gfServer.  A connection is handed out
+// exclusively by acquire() and put back with release(); idle connections
+// older than idleTimeout seconds are dropped instead of reused.
+class ConnectionPool {
+ public:
+  ConnectionPool(std::string hostName, std::string portName, int maxIdle = 8, int idleTimeout = 2);
+  ~ConnectionPool();
+  ConnectionPool(const ConnectionPool &) = delete;
+  ConnectionPool &operator=(const ConnectionPool &) = delete;
+
+  // Reuse an idle connection or open a new one.  Aborts via errAbort if the
+  // server cannot be reached, so call it inside an errCatch block.
+  gfConnection *acquire();
+  // Return a connection after a finished request.  Connections that are not
+  // kept alive by the server or that saw an error are closed.
+  void release(gfConnection *conn, bool reusable = true);
+  // Close all idle connections.
+  void close();
+
+  std::size_t idleCount();
+  bool keepAliveSupported() const { return keepAliveSupported_; }
+  // Whether the server answers the batch command, false once it refused it.
+  bool batchSupported() const { return batchSupported_; }
+  void setBatchSupported(bool supported) { batchSupported_ = supported; }
+
+  std::string hostName;
+  std::string portName;
+  int maxIdle;
+  int idleTimeout;
+
+ private:
+  boolean negotiateKeepAlive(gfConnection *conn);
+
+  std::mutex mutex_;
+  std::deque<std::pair<gfConnection *, long>> idle_;  // connection and release time in ms
+  std::atomic<bool> keepAliveSupported_{true};
+  std::atomic<bool> batchSupported_{true};
+};
+
+// Target .nib and .2bit files kept open between queries, so that the
+// index of a .2bit file is read once instead of once per query.  A kent
+// file cache is handed out exclusively by acquire(), as reading target
+// sequence seeks on the shared handle; release() closes the least recently
+// used files of the idle caches beyond maxOpenFiles in all of them together,
+// so queries on several threads share one limit.  Files a query in flight
+// opened count once it releases its cache.
+class TargetFileCache {
+ public:
+  explicit TargetFileCache(int maxOpenFiles = 16);
+  ~TargetFileCache();
+  TargetFileCache(const TargetFileCache &) = delete;
+  TargetFileCache &operator=(const TargetFileCache &) = delete;
+
+  // Reuse an idle file cache or create a new one.
+  struct hash *acquire();
+  // Return a file cache after a finished query.
+  void release(struct hash *cache);
+  // Close all files of the idle file caches.
+  void close();
+
+  // Number of files open in the idle file caches.
+  std::size_t openFiles();
+
+  int maxOpenFiles;
+
+ private:
+  std::mutex mutex_;
+  std::vector<struct hash *> idle_;
+};
+
 std::string pygfClient_no_gil(ClientOption option);
 std::string pygfClient(ClientOption &option);
-std::string read_inmem_file(FILE *file);
+std::string pygfClient(ClientOption &option, ConnectionPool *pool, TargetFileCache *fileCache = nullptr);
+std::string pygfClientSeqs(ClientOption &option, std::vector<std::pair<std::string, std::string>> const &seqs,
+                           ConnectionPool *pool, TargetFileCache *fileCache = nullptr);
+// Query the reads packed in data, read i spans [offsets[i], offsets[i + 1]).
+std::string pygfClientBuffer(ClientOption &option, char const *data, std::size_t size,
+                             std::vector<std::int64_t> const &offsets, std::vector<std::string> const &names,
+                             ConnectionPool *pool = nullptr, TargetFileCache *fileCache = nullptr);
+// Query all seqs with batch commands, each carries up to gfBatchMaxQueries
+// strands so that many short reads take one round trip.  Falls back to one
+// query per strand with pygfClientSeqs if the server refuses the batch command.
+std::string pygfClientBatch(ClientOption &option, std::vector<std::pair<std::string, std::string>> const &seqs,
+                            ConnectionPool *pool, TargetFileCache *fileCache = nullptr);
+// Align queries against the genome ranges found for each of their strands.
+// rangesOf(i, seq, isRc) returns the ranges of strand isRc of query i, which
+// is in seq; the list is freed once aligned.
+std::string gfAlignQueries(ClientOption &option, std::string databaseName,
+                           std::vector<std::string> const &names, std::vector<std::string> const &dnas,
+                           std::function<struct gfRange *(std::size_t, struct dnaSeq *, bool)> const &rangesOf,
+                           TargetFileCache *fileCache = nullptr);
+std::string pygfAlignRanges(ClientOption &option, std::vector<std::string> const &names,
+                            std::vector<std::string> const &dnas,
+                            std::vector<std::vector<std::string>> const &forwardRanges,
+                            std::vector<std::vector<std::string>> const &reverseRanges,
+                            TargetFileCache *fileCache = nullptr);
 }  // namespace cppbinding
 
 #endif
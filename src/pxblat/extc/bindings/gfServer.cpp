@@ -5,6 +5,8 @@
 #include <string>
 
 #include "dbg.h"
+#include "gfInternal.h"
+#include "pygfServer.hpp"
 
 namespace cppbinding {
 
@@ -102,40 +104,77 @@ int getPortIx(char *portName)
 // int missCount = 0;
 // int trimCount = 0;
 
-void dnaQuery(struct genoFind *gf, struct dnaSeq *seq, int connectionHandle, struct hash *perSeqMaxHash,
-              ServerOption const &options, UsageStats &stats, boolean &sendOk)
-/* Handle a query for DNA/DNA match. */
+struct gfRange *dnaQueryRangeList(struct genoFind *gf, struct dnaSeq *seq, struct hash *perSeqMaxHash,
+                                  ServerOption const &options, UsageStats &stats)
+/* Find the ranges of the genome a DNA query hits, in the order the server
+ * sends them. perSeqMaxHash is only read, hits of its sequences are counted
+ * per query so that threads may share it. Dispose of the list with
+ * gfRangeFreeList(). */
 {
   auto maxDnaHits = options.maxDnaHits;
 
-  char buf[256];
+  struct gfRange *rangeList = NULL, *range;
   struct gfClump *clumpList = NULL, *clump;
   int limit = 1000;
   int clumpCount = 0, hitCount = -1;
   struct lm *lm = lmInit(0);
+  struct hash *perSeqCounts = NULL; /* Hits sent for sequences of perSeqMaxHash. */
 
   if (seq->size > gf->tileSize + gf->stepSize + gf->stepSize) limit = maxDnaHits;
   clumpList = gfFindClumps(gf, seq, lm, &hitCount);
   if (clumpList == NULL) ++stats.missCount;
   for (clump = clumpList; clump != NULL; clump = clump->next) {
     struct gfSeqSource *ss = clump->target;
-    sprintf(buf, "%d\t%d\t%s\t%d\t%d\t%d", clump->qStart, clump->qEnd, ss->fileName, clump->tStart - ss->start,
-            clump->tEnd - ss->start, clump->hitCount);
-    errSendString(connectionHandle, buf, sendOk);
+    range = (gfRange *)needMem(sizeof(*range));
+    range->qStart = clump->qStart;
+    range->qEnd = clump->qEnd;
+    range->tName = cloneString(ss->fileName);
+    range->tStart = clump->tStart - ss->start;
+    range->tEnd = clump->tEnd - ss->start;
+    range->hitCount = clump->hitCount;
+    slAddHead(&rangeList, range);
     ++clumpCount;
-    int perSeqCount = -1;
-    if (perSeqMaxHash && ((perSeqCount = hashIntValDefault(perSeqMaxHash, ss->fileName, -1)) >= 0)) {
-      if (perSeqCount >= (maxDnaHits / 2)) break;
-      hashIncInt(perSeqMaxHash, ss->fileName);
+    if (perSeqMaxHash && hashLookup(perSeqMaxHash, ss->fileName)) {
+      if (perSeqCounts == NULL) perSeqCounts = hashNew(4);
+      if (hashIntValDefault(perSeqCounts, ss->fileName, 0) >= (maxDnaHits / 2)) break;
+      hashIncInt(perSeqCounts, ss->fileName);
     } else if (--limit < 0)
       break;
   }
+  slReverse(&rangeList);
+  hashFree(&perSeqCounts);
   gfClumpFreeList(&clumpList);
   lmCleanup(&lm);
   logDebug("%lu %d clumps, %d hits", clock1000(), clumpCount, hitCount);
 
   dbg(clumpCount);
   dbg(hitCount);
+  return rangeList;
+}
+
+std::vector<std::string> dnaQueryRanges(struct genoFind *gf, struct dnaSeq *seq, struct hash *perSeqMaxHash,
+                                        ServerOption const &options, UsageStats &stats)
+/* Find the ranges of the genome a DNA query hits, formatted as the server
+ * sends them. */
+{
+  std::vector<std::string> ranges;
+  char buf[256];
+  struct gfRange *rangeList = dnaQueryRangeList(gf, seq, perSeqMaxHash, options, stats), *range;
+  for (range = rangeList; range != NULL; range = range->next) {
+    sprintf(buf, "%d\t%d\t%s\t%d\t%d\t%d", range->qStart, range->qEnd, range->tName, range->tStart, range->tEnd,
+            range->hitCount);
+    ranges.emplace_back(buf);
+  }
+  gfRangeFreeList(&rangeList);
+  return ranges;
+}
+
+void dnaQuery(struct genoFind *gf, struct dnaSeq *seq, int connectionHandle, struct hash *perSeqMaxHash,
+              ServerOption const &options, UsageStats &stats, boolean &sendOk)
+/* Handle a query for DNA/DNA match. */
+{
+  for (auto &range : dnaQueryRanges(gf, seq, perSeqMaxHash, options, stats))
+    errSendString(connectionHandle, range.data(), sendOk);
 }
 
 void transQuery(struct genoFind *transGf[2][3], aaSeq *seq, int connectionHandle, ServerOption const &options,
@@ -838,7 +877,7 @@ void genoFindDirect(std::string &probeName, int fileCount, std::vector<std::stri
   if (doTrans) errAbort("Don't support translated direct stuff currently, sorry");
 
   gf = gfIndexNibsAndTwoBits(fileCount, cseqFiles.data(), minMatch, maxGap, tileSize, repMatch, FALSE, allowOneMismatch,
-                             stepSize, noSimpRepMask);
+                             stepSize, noSimpRepMask, serverThreadCount(options.threads));
 
   while (faSpeedReadNext(lf, &seq.dna, &seq.size, &seq.name)) {
     struct lm *lm = lmInit(0);
@@ -881,7 +920,7 @@ void genoPcrDirect(std::string &fPrimer, std::string &rPrimer, int fileCount, st
 
   startTime = clock1000();
   gf = gfIndexNibsAndTwoBits(fileCount, cseqFiles.data(), minMatch, maxGap, tileSize, repMatch, FALSE, allowOneMismatch,
-                             stepSize, noSimpRepMask);
+                             stepSize, noSimpRepMask, serverThreadCount(options.threads));
   endTime = clock1000();
   printf("Index built in %4.3f seconds\n", 0.001 * (endTime - startTime));
 
@@ -914,7 +953,7 @@ void genoPcrDirect(std::string &fPrimer, std::string &rPrimer, int fileCount, st
 }
 
 genoFindIndex *pybuildIndex4Server(std::string &hostName, std::string &portName, int fileCount, char *seqFiles[],
-                                   hash *perSeqMaxHash, ServerOption &option) {
+                                   hash *&perSeqMaxHash, ServerOption &option) {
   auto indexFile = option.indexFile.empty() ? NULL : option.indexFile.data();
 
   // auto ipLog = option.ipLog;
@@ -955,7 +994,7 @@ genoFindIndex *pybuildIndex4Server(std::string &hostName, std::string &portName,
     dbg("starting %s server...", desc);
     // logInfo("setting up %s index", desc);
     gfIdx = genoFindIndexBuild(fileCount, seqFiles, minMatch, maxGap, tileSize, repMatch, doTrans, NULL,
-                               allowOneMismatch, doMask, stepSize, noSimpRepMask);
+                               allowOneMismatch, doMask, stepSize, noSimpRepMask, serverThreadCount(option.threads));
     logInfo("index building completed in %4.3f seconds", 0.001 * (clock1000() - startIndexTime));
   } else {
     gfIdx = genoFindIndexLoad(indexFile, doTrans);
@@ -1026,7 +1065,7 @@ void startServer(std::string &hostName, std::string &portName, int fileCount, st
 
     dbg(hostName, portName, fileCount, cseqFiles, options, stats);
     gfIdx = genoFindIndexBuild(fileCount, cseqFiles.data(), minMatch, maxGap, tileSize, repMatch, doTrans, NULL,
-                               allowOneMismatch, doMask, stepSize, noSimpRepMask);
+                               allowOneMismatch, doMask, stepSize, noSimpRepMask, serverThreadCount(options.threads));
     logInfo("index building completed in %4.3f seconds", 0.001 * (clock1000() - startIndexTime));
   } else {
     gfIdx = genoFindIndexLoad(indexFile, doTrans);
@@ -1035,8 +1074,10 @@ void startServer(std::string &hostName, std::string &portName, int fileCount, st
   logGenoFindIndex(gfIdx);
 
   /* Set up socket.  Get ready to listen to it. */
-  socketHandle = netAcceptingSocket(port, 100);
-  if (socketHandle < 0) errAbort("Fatal Error: Unable to open listening socket on port %d.", port);
+  boolean isUnix = netIsUnixAddress(hostName.data());
+  socketHandle = isUnix ? netAcceptingUnixSocket(hostName.data() + strlen(NET_UNIX_PREFIX), 100)
+                        : netAcceptingSocket(port, 100);
+  if (socketHandle < 0) errAbort("Fatal Error: Unable to open listening socket on %s %s.", hostName.data(), portName.data());
 
   logInfo("Server ready for queries!");
   printf("Server ready for queries!\n");
@@ -1098,13 +1139,18 @@ void startServer(std::string &hostName, std::string &portName, int fileCount, st
         break;
       else
         logError("Ignoring quit message");
+    } else if (sameString("health", command)) {
+      // Answered at once so that readiness probes do not wait for status.
+      sprintf(buf, "version %s", gfVersion);
+      errSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "index %s", (gfIdx != nullptr ? "loaded" : "missing"));
+      errSendString(connectionHandle, buf, sendOk);
+      errSendString(connectionHandle, "end", sendOk);
     } else if (sameString("status", command) || sameString("transInfo", command) ||
                sameString("untransInfo", command)) {
       // dbg(hostName, portName, fileCount, cseqFiles, options, stats);
 
       dbg(connectionHandle, hostName, portName, fileCount, seqFiles, perSeqMaxHash, gfIdx, options);
-      // sleep 10 s
-      sleep(10);
       sprintf(buf, "version %s", gfVersion);
       errSendString(connectionHandle, buf, sendOk);
       errSendString(connectionHandle, "serverType static", sendOk);
@@ -1121,23 +1167,23 @@ void startServer(std::string &hostName, std::string &portName, int fileCount, st
       errSendString(connectionHandle, buf, sendOk);
       sprintf(buf, "minMatch %d", minMatch);
       errSendString(connectionHandle, buf, sendOk);
-      sprintf(buf, "pcr requests %ld", stats.pcrCount);
+      sprintf(buf, "pcr requests %ld", stats.pcrCount.load());
       errSendString(connectionHandle, buf, sendOk);
-      sprintf(buf, "blat requests %ld", stats.blatCount);
+      sprintf(buf, "blat requests %ld", stats.blatCount.load());
       errSendString(connectionHandle, buf, sendOk);
-      sprintf(buf, "bases %ld", stats.baseCount);
+      sprintf(buf, "bases %ld", stats.baseCount.load());
       errSendString(connectionHandle, buf, sendOk);
       if (doTrans) {
-        sprintf(buf, "aa %ld", stats.aaCount);
+        sprintf(buf, "aa %ld", stats.aaCount.load());
         errSendString(connectionHandle, buf, sendOk);
       }
-      sprintf(buf, "misses %d", stats.missCount);
+      sprintf(buf, "misses %d", stats.missCount.load());
       errSendString(connectionHandle, buf, sendOk);
-      sprintf(buf, "noSig %d", stats.noSigCount);
+      sprintf(buf, "noSig %d", stats.noSigCount.load());
       errSendString(connectionHandle, buf, sendOk);
-      sprintf(buf, "trimmed %d", stats.trimCount);
+      sprintf(buf, "trimmed %d", stats.trimCount.load());
       errSendString(connectionHandle, buf, sendOk);
-      sprintf(buf, "warnings %d", stats.warnCount);
+      sprintf(buf, "warnings %d", stats.warnCount.load());
       errSendString(connectionHandle, buf, sendOk);
       errSendString(connectionHandle, "end", sendOk);
     } else if (sameString("query", command) || sameString("protQuery", command) || sameString("transQuery", command)) {
@@ -1192,7 +1238,6 @@ void startServer(std::string &hostName, std::string &portName, int fileCount, st
                 }
                 errorSafeQuery(doTrans, queryIsProt, &seq, gfIdx, connectionHandle, buf, perSeqMaxHash, options, stats,
                                sendOk);
-                if (perSeqMaxHash) hashZeroVals(perSeqMaxHash);
               }
               freez(&seq.dna);
             }
@@ -1235,6 +1280,7 @@ void startServer(std::string &hostName, std::string &portName, int fileCount, st
     connectionHandle = 0;
   }
   close(socketHandle);
+  if (isUnix) unlink(hostName.data() + strlen(NET_UNIX_PREFIX));
 }
 
 void stopServer(std::string &hostName, std::string &portName)
@@ -1520,8 +1566,9 @@ void buildIndex(std::string &gfxFile, int fileCount, std::vector<std::string> se
   if (fileCount > 1) errAbort("gfServer index only works with a single genome file");
   checkIndexFileName(gfxFile.data(), cseqFiles.front(), options);
 
-  struct genoFindIndex *gfIdx = genoFindIndexBuild(fileCount, cseqFiles.data(), minMatch, maxGap, tileSize, repMatch,
-                                                   doTrans, NULL, allowOneMismatch, doMask, stepSize, noSimpRepMask);
+  struct genoFindIndex *gfIdx =
+      genoFindIndexBuild(fileCount, cseqFiles.data(), minMatch, maxGap, tileSize, repMatch, doTrans, NULL,
+                         allowOneMismatch, doMask, stepSize, noSimpRepMask, serverThreadCount(options.threads));
   genoFindIndexWrite(gfIdx, gfxFile.data());
 }
 
@@ -1680,6 +1727,31 @@ ServerOption &ServerOption::withThreads(int threads_) {
   return *this;
 }
 
+ServerOption &ServerOption::withKeepAliveTimeout(int keepAliveTimeout_) {
+  keepAliveTimeout = keepAliveTimeout_;
+  return *this;
+}
+
+ServerOption &ServerOption::withMaxPending(int maxPending_) {
+  maxPending = maxPending_;
+  return *this;
+}
+
+ServerOption &ServerOption::withDrainTimeout(int drainTimeout_) {
+  drainTimeout = drainTimeout_;
+  return *this;
+}
+
+ServerOption &ServerOption::withEventLoop(bool eventLoop_) {
+  eventLoop = eventLoop_;
+  return *this;
+}
+
+ServerOption &ServerOption::withWorkers(int workers_) {
+  workers = workers_;
+  return *this;
+}
+
 std::string ServerOption::to_string() const {
   std::stringstream s{};
   s << "ServerOption(";
@@ -1708,7 +1780,12 @@ std::string ServerOption::to_string() const {
   s << ", genome: " << genome;
   s << ", genomeDataDir: " << genomeDataDir;
   s << ", threads: " << threads;
-  s << ", allowOneMismatch: " << std::boolalpha << allowOneMismatch << ")";
+  s << ", allowOneMismatch: " << std::boolalpha << allowOneMismatch;
+  s << ", keepAliveTimeout: " << keepAliveTimeout;
+  s << ", maxPending: " << maxPending;
+  s << ", drainTimeout: " << drainTimeout;
+  s << ", eventLoop: " << std::boolalpha << eventLoop;
+  s << ", workers: " << workers << ")";
 
   return s.str();
 }
@@ -1718,6 +1795,44 @@ std::ostream &operator<<(std::ostream &os, const ServerOption &option) {
   return os;
 }
 
+UsageStats::UsageStats(UsageStats const &other) { *this = other; }
+
+UsageStats &UsageStats::operator=(UsageStats const &other) {
+  baseCount = other.baseCount.load();
+  blatCount = other.blatCount.load();
+  aaCount = other.aaCount.load();
+  pcrCount = other.pcrCount.load();
+  warnCount = other.warnCount.load();
+  noSigCount = other.noSigCount.load();
+  missCount = other.missCount.load();
+  trimCount = other.trimCount.load();
+  latencyTotal = other.latencyTotal.load();
+  latencyMax = other.latencyMax.load();
+  startTime = other.startTime;
+  return *this;
+}
+
+void UsageStats::addLatency(long micros) {
+  latencyTotal += micros;
+  long max = latencyMax.load(std::memory_order_relaxed);
+  while (micros > max && !latencyMax.compare_exchange_weak(max, micros, std::memory_order_relaxed)) {
+  }
+}
+
+double UsageStats::uptime() const {
+  return std::chrono::duration<double>(std::chrono::steady_clock::now() - startTime).count();
+}
+
+double UsageStats::queriesPerSecond() const {
+  double seconds = uptime();
+  return seconds > 0 ? (blatCount + pcrCount) / seconds : 0.0;
+}
+
+double UsageStats::latencyMean() const {
+  long requests = blatCount + pcrCount;
+  return requests > 0 ? static_cast<double>(latencyTotal) / requests : 0.0;
+}
+
 std::ostream &operator<<(std::ostream &os, const UsageStats &stats) {
   os << "UsageStats(";
   os << "baseCount: " << stats.baseCount;
@@ -1728,6 +1843,8 @@ std::ostream &operator<<(std::ostream &os, const UsageStats &stats) {
   os << ", noSigCount: " << stats.noSigCount;
   os << ", missCount: " << stats.missCount;
   os << ", trimCount: " << stats.trimCount;
+  os << ", latencyTotal: " << stats.latencyTotal;
+  os << ", latencyMax: " << stats.latencyMax;
   os << ")";
   return os;
 }
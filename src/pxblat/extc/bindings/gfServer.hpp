@@ -7,6 +7,8 @@
 #include <stdarg.h>
 #include <sys/socket.h>
 
+#include <atomic>
+#include <chrono>
 #include <cstring>
 #include <ctime>
 #include <ios>
@@ -37,15 +39,31 @@ using std::min;
 #include "trans3.h"
 #include "twoBit.h"
 
+struct gfRange;  // gfInternal.h
+
 namespace cppbinding {
 
+// Counters are atomic so that all worker threads of a server can share one
+// instance.
 struct UsageStats {
-  long baseCount{0}, blatCount{0}, aaCount{0}, pcrCount{0};
-  int warnCount{0};
-  int noSigCount{0};
-  int missCount{0};
-  int trimCount{0};
+  std::atomic<long> baseCount{0}, blatCount{0}, aaCount{0}, pcrCount{0};
+  std::atomic<int> warnCount{0};
+  std::atomic<int> noSigCount{0};
+  std::atomic<int> missCount{0};
+  std::atomic<int> trimCount{0};
+  // Time spent answering blat and pcr requests, in microseconds.
+  std::atomic<long> latencyTotal{0}, latencyMax{0};
+  std::chrono::steady_clock::time_point startTime{std::chrono::steady_clock::now()};
+
   UsageStats() = default;
+  UsageStats(UsageStats const &other);
+  UsageStats &operator=(UsageStats const &other);
+
+  void addLatency(long micros);
+  double uptime() const;
+  double queriesPerSecond() const;
+  double latencyMean() const;
+
   friend std::ostream &operator<<(std::ostream &os, const UsageStats &stats);
 };
 
@@ -107,6 +125,11 @@ struct ServerOption {
 
   int threads{1};
   bool allowOneMismatch{false};
+  int keepAliveTimeout{5};  // Seconds an idle keep-alive connection is held open, 0 disables keep-alive
+  int maxPending{128};      // Accepted connections waiting for a worker before accepting pauses, 0 is unbounded
+  int drainTimeout{30};     // Seconds a quit message waits for requests in flight before abandoning them
+  bool eventLoop{false};    // Read requests with epoll and hand workers only requests received in full
+  int workers{0};           // Processes forked to share the index and port, 0 serves from this process
 
   ServerOption() = default;
   self &build();
@@ -136,6 +159,11 @@ struct ServerOption {
   ServerOption &withIndexFile(std::string indexFile_);
   ServerOption &withTimeout(int timeout_);
   ServerOption &withThreads(int threads_);
+  ServerOption &withKeepAliveTimeout(int keepAliveTimeout_);
+  ServerOption &withMaxPending(int maxPending_);
+  ServerOption &withDrainTimeout(int drainTimeout_);
+  ServerOption &withEventLoop(bool eventLoop_);
+  ServerOption &withWorkers(int workers_);
 
   friend std::ostream &operator<<(std::ostream &os, const self &option);
 };
@@ -189,6 +217,10 @@ int getPortIx(char *portName);
 
 /* Handle a query for DNA/DNA match. */
 // void dnaQuery(struct genoFind *gf, struct dnaSeq *seq, int connectionHandle, struct hash *perSeqMaxHash);
+struct gfRange *dnaQueryRangeList(struct genoFind *gf, struct dnaSeq *seq, struct hash *perSeqMaxHash,
+                                  ServerOption const &options, UsageStats &stats);
+std::vector<std::string> dnaQueryRanges(struct genoFind *gf, struct dnaSeq *seq, struct hash *perSeqMaxHash,
+                                        ServerOption const &options, UsageStats &stats);
 void dnaQuery(struct genoFind *gf, struct dnaSeq *seq, int connectionHandle, struct hash *perSeqMaxHash,
               ServerOption const &options, UsageStats &stats, boolean &sendOk);
 
@@ -226,11 +258,12 @@ boolean badPcrPrimerSeq(char *s);
 
 void setSocketTimeout(int sockfd, int delayInSeconds);
 void hashZeroVals(struct hash *hash);
+void pcrQuery(struct genoFind *gf, char *fPrimer, char *rPrimer, int maxDistance, int connectionHandle, boolean &sendOk);
 void errorSafePcr(struct genoFind *gf, char *fPrimer, char *rPrimer, int maxDistance, int connectionHandle,
                   boolean &sendOk);
 
 genoFindIndex *pybuildIndex4Server(std::string &hostName, std::string &portName, int fileCount, char *seqFiles[],
-                                   hash *perSeqMaxHash, ServerOption &option);
+                                   hash *&perSeqMaxHash, ServerOption &option);
 
 std::string pystatusServer(std::string &hostName, std::string &portName, ServerOption &options);
 std::string pygetFileList(std::string &hostName, std::string &portName);
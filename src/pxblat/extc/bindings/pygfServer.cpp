@@ -1,34 +1,74 @@
+#include <netinet/in.h>
+#include <netinet/tcp.h>
+#include <fcntl.h>
+#include <poll.h>
+#include <sched.h>
+#include <signal.h>
+#include <sys/epoll.h>
+#include <sys/eventfd.h>
+#include <sys/mman.h>
+#include <sys/prctl.h>
+#include <sys/socket.h>
+#include <sys/wait.h>
+
+#include <algorithm>
+#include <chrono>
+#include <cstring>
+#include <functional>
+#include <new>
 #include <stdexcept>
+#include <thread>
+#include <unordered_map>
 #pragma GCC diagnostic ignored "-Wwrite-strings"
 
 #include "bs_thread_pool.hpp"
 #include "dbg.h"
+#include "errCatch.h"
 #include "gfServer.hpp"
 #include "pygfServer.hpp"
 
 namespace cppbinding {
 
+template <typename Query>
+static void pyerrorSafe(int connectionHandle, std::string const &tag, char const *message, boolean &sendOk,
+                        Query query)
+/* Run query and answer tag + message instead of exiting if it aborts. The
+ * errCatch is per thread, unlike the memTracker and jmp_buf of
+ * errorSafeQuery that worker threads would share. */
+{
+  struct errCatch *errCatch = errCatchNew();
+  if (errCatchStart(errCatch)) query();
+  errCatchEnd(errCatch);
+  if (errCatch->gotError) {
+    logError("Recovering from error: %s", errCatch->message->string);
+    std::string reply = tag + message;
+    pyerrSendString(connectionHandle, reply.data(), sendOk);
+  }
+  errCatchFree(&errCatch);
+}
+
 void pyerrorSafeQuery(boolean doTrans, boolean queryIsProt, struct dnaSeq *seq, struct genoFindIndex *gfIdx,
                       int connectionHandle, char *buf, struct hash *perSeqMaxHash, ServerOption const &options,
                       UsageStats &stats, boolean &sendOk)
 /* Wrap error handling code around index query. */
 {
-  // status = setjmp(gfRecover);
-  // if (status == 0) /* Always true except after long jump. */
-  // {
-  if (doTrans) {
-    if (queryIsProt)
-      transQuery(gfIdx->transGf, seq, connectionHandle, options, stats, sendOk);
-    else
-      transTransQuery(gfIdx->transGf, seq, connectionHandle, options, stats, sendOk);
-  } else
-    dnaQuery(gfIdx->untransGf, seq, connectionHandle, perSeqMaxHash, options, stats, sendOk);
-  // errorSafeCleanup();
-  // }
-  // else /* They long jumped here because of an error. */
-  // {
-  // errorSafeCleanupMess(connectionHandle, "Error: gfServer out of memory. Try reducing size of query.", sendOk);
-  // }
+  pyerrorSafe(connectionHandle, "", "Error: gfServer out of memory. Try reducing size of query.", sendOk, [&]() {
+    if (doTrans) {
+      if (queryIsProt)
+        transQuery(gfIdx->transGf, seq, connectionHandle, options, stats, sendOk);
+      else
+        transTransQuery(gfIdx->transGf, seq, connectionHandle, options, stats, sendOk);
+    } else
+      dnaQuery(gfIdx->untransGf, seq, connectionHandle, perSeqMaxHash, options, stats, sendOk);
+  });
+}
+
+void pyerrorSafePcr(struct genoFind *gf, char *fPrimer, char *rPrimer, int maxDistance, int connectionHandle,
+                    boolean &sendOk)
+/* Wrap error handling around pcr index query. */
+{
+  pyerrorSafe(connectionHandle, "", "Error: gfServer out of memory.", sendOk,
+              [&]() { pcrQuery(gf, fPrimer, rPrimer, maxDistance, connectionHandle, sendOk); });
 }
 
 boolean pynetSendString(int sd, char *s)
@@ -58,9 +98,449 @@ void pyerrSendString(int sd, char *s, boolean &sendOk)
   if (sendOk) sendOk = pynetSendString(sd, s);
 }
 
+void ServerControl::track(int connectionHandle) {
+  std::lock_guard<std::mutex> lock(mutex_);
+  connections_.insert(connectionHandle);
+}
+
+void ServerControl::untrack(int connectionHandle) {
+  std::lock_guard<std::mutex> lock(mutex_);
+  connections_.erase(connectionHandle);
+}
+
+void ServerControl::abandon() {
+  std::lock_guard<std::mutex> lock(mutex_);
+  abandoning = true;
+  for (int connectionHandle : connections_) {
+    shutdown(connectionHandle, SHUT_RDWR);
+    ++abandoned;
+  }
+  connections_.clear();
+}
+
+void ServerControl::dequeued() {
+  if (accepting) return;
+  {
+    std::lock_guard<std::mutex> lock(dequeueMutex_);
+  }
+  dequeued_.notify_all();
+  int wake = wakeHandle;
+  uint64_t one = 1;
+  if (wake >= 0 && write(wake, &one, sizeof(one)) != sizeof(one)) warn("Unable to wake up the event loop");
+}
+
+void ServerControl::waitDequeued(std::function<bool()> const &ready, std::chrono::milliseconds timeout) {
+  std::unique_lock<std::mutex> lock(dequeueMutex_);
+  dequeued_.wait_for(lock, timeout, ready);
+}
+
+static bool waitForNextCommand(int connectionHandle, int keepAliveTimeout, BS::thread_pool const *workers,
+                               ServerControl const *control)
+/* Wait until the next command of a keep-alive connection arrives. Return false
+ * if the connection stayed idle for keepAliveTimeout seconds, or as soon as it
+ * is idle while other connections wait for a worker or the server drains. */
+{
+  const int sliceMs = 50;
+  struct pollfd pfd;
+  pfd.fd = connectionHandle;
+  pfd.events = POLLIN;
+  for (int waited = 0; waited < keepAliveTimeout * 1000; waited += sliceMs) {
+    pfd.revents = 0;
+    int ready = poll(&pfd, 1, sliceMs);
+    if (ready != 0) return ready > 0;
+    if (workers != nullptr && workers->get_tasks_queued() > 0) return false;
+    if (control != nullptr && control->stopping) return false;
+  }
+  return false;
+}
+
+// Set when the parent of a worker process asks it to drain, see serveWorkers.
+static std::atomic<bool> stopRequested{false};
+
+static void requestStop(int) { stopRequested = true; }
+
+static bool residentMemory(long &shared, long &own)
+/* Find the resident memory of this process in kB, shared with other processes
+ * such as the index inherited by workers, and its own. Return false if the
+ * kernel doesn't tell. */
+{
+  FILE *f = fopen("/proc/self/smaps_rollup", "r");
+  if (f == nullptr) return false;
+  char line[256];
+  long kb;
+  shared = own = 0;
+  while (fgets(line, sizeof(line), f) != nullptr) {
+    if (sscanf(line, "Shared_Clean: %ld", &kb) == 1 || sscanf(line, "Shared_Dirty: %ld", &kb) == 1)
+      shared += kb;
+    else if (sscanf(line, "Private_Clean: %ld", &kb) == 1 || sscanf(line, "Private_Dirty: %ld", &kb) == 1)
+      own += kb;
+  }
+  fclose(f);
+  return true;
+}
+
+static long elapsedMicros(std::chrono::steady_clock::time_point start) {
+  return std::chrono::duration_cast<std::chrono::microseconds>(std::chrono::steady_clock::now() - start).count();
+}
+
+// Where handle_client reads a request from: the socket, or the bytes an event
+// loop received before handing the request to a worker.
+class RequestReader {
+ public:
+  RequestReader(int connectionHandle, ReceivedRequest const *request)
+      : connectionHandle_(connectionHandle), request_(request) {}
+
+  // The signature and command line, sent by clients in a single write.
+  ssize_t readCommand(char *buf, std::size_t size) {
+    if (request_ == nullptr) return read(connectionHandle_, buf, size);
+    std::size_t length = std::min(size, request_->command.size());
+    memcpy(buf, request_->command.data(), length);
+    return static_cast<ssize_t>(length);
+  }
+
+  // Ask the client for the upload of its command, an event loop already did.
+  bool acknowledge() {
+    if (request_ != nullptr) return true;
+    char ok = 'Y';
+    return write(connectionHandle_, &ok, 1) == 1;
+  }
+
+  int readMulti(char *buf, int size) {
+    if (request_ == nullptr) return gfReadMulti(connectionHandle_, buf, size);
+    std::size_t length = std::min(static_cast<std::size_t>(std::max(size, 0)), request_->upload.size() - offset_);
+    memcpy(buf, request_->upload.data() + offset_, length);
+    offset_ += length;
+    return static_cast<int>(length);
+  }
+
+  // A string sent with netSendString, NULL if there is none.
+  char *getString(char buf[256]) {
+    if (request_ == nullptr) return netGetString(connectionHandle_, buf);
+    std::string const &upload = request_->upload;
+    if (offset_ >= upload.size()) return NULL;
+    std::size_t length = static_cast<unsigned char>(upload[offset_]);
+    if (upload.size() - offset_ - 1 < length) return NULL;
+    memcpy(buf, upload.data() + offset_ + 1, length);
+    buf[length] = 0;
+    offset_ += length + 1;
+    return buf;
+  }
+
+ private:
+  int connectionHandle_;
+  ReceivedRequest const *request_;
+  std::size_t offset_{0};
+};
+
+// Front end of a server with option.eventLoop. A single thread waits on every
+// connection with epoll and reads requests without blocking, so that the
+// workers only get requests received in full and an idle or slow client never
+// holds one. Keep-alive connections come back to the loop between requests.
+class EventLoop {
+ public:
+  using Dispatch = std::function<void(int, std::shared_ptr<ReceivedRequest>)>;
+
+  EventLoop(int socketHandle, ServerOption const &option, UsageStats &stats, ServerControl &control);
+  ~EventLoop();
+  EventLoop(const EventLoop &) = delete;
+  EventLoop &operator=(const EventLoop &) = delete;
+
+  // Receive requests and dispatch them until control.stopping.
+  void run(BS::thread_pool const &pool, Dispatch const &dispatch);
+  // Wait for the next command of a keep-alive connection a worker answered.
+  // Safe from any thread, the connection is closed once the loop has stopped.
+  void resume(int connectionHandle);
+
+ private:
+  enum class Stage { command, size, bases };
+
+  struct Connection {
+    std::shared_ptr<ReceivedRequest> request;
+    Stage stage{Stage::command};
+    std::size_t parsed{0};   // Bytes of the upload already framed
+    std::size_t need{0};     // Bases of the current query still to come
+    std::size_t queries{0};  // Sizes of a batch still to come
+    std::chrono::steady_clock::time_point deadline;
+  };
+
+  void watch(int connectionHandle, bool keepAlive);
+  void drop(int connectionHandle, bool failed);
+  bool accept();
+  // Read what the connection sent, return false once it has to be closed.
+  bool receive(int connectionHandle, Connection &connection);
+  // Frame the command line of a request, return false if it has no upload.
+  bool expectUpload(Connection &connection);
+  void takeResumed();
+
+  int socketHandle_;
+  ServerOption const &option_;
+  UsageStats &stats_;
+  ServerControl &control_;
+  int epollHandle_;
+  int wakeHandle_;
+  int connectFailCount_{0};
+  std::unordered_map<int, Connection> connections_;
+  std::vector<std::pair<int, std::shared_ptr<ReceivedRequest>>> ready_;
+
+  std::mutex mutex_;
+  bool stopped_{false};
+  std::vector<int> resumed_;
+};
+
+EventLoop::EventLoop(int socketHandle, ServerOption const &option, UsageStats &stats, ServerControl &control)
+    : socketHandle_(socketHandle), option_(option), stats_(stats), control_(control) {
+  epollHandle_ = epoll_create1(EPOLL_CLOEXEC);
+  wakeHandle_ = eventfd(0, EFD_NONBLOCK | EFD_CLOEXEC);
+  if (epollHandle_ < 0 || wakeHandle_ < 0)
+    throw std::runtime_error(std::string("Unable to set up the event loop: ") + strerror(errno));
+  fcntl(socketHandle_, F_SETFL, fcntl(socketHandle_, F_GETFL) | O_NONBLOCK);
+  struct epoll_event event;
+  ZeroVar(&event);
+  event.events = EPOLLIN;
+  event.data.fd = wakeHandle_;
+  epoll_ctl(epollHandle_, EPOLL_CTL_ADD, wakeHandle_, &event);
+  control_.wakeHandle = wakeHandle_;
+}
+
+EventLoop::~EventLoop() {
+  control_.wakeHandle = -1;
+  close(epollHandle_);
+  close(wakeHandle_);
+}
+
+void EventLoop::watch(int connectionHandle, bool keepAlive) {
+  Connection &connection = connections_[connectionHandle];
+  connection = Connection{};
+  connection.deadline =
+      std::chrono::steady_clock::now() + std::chrono::seconds(keepAlive ? option_.keepAliveTimeout : option_.timeout);
+  connection.request = std::make_shared<ReceivedRequest>();
+  connection.request->keepAlive = keepAlive;
+  connection.request->loop = this;
+  struct epoll_event event;
+  ZeroVar(&event);
+  event.events = EPOLLIN | EPOLLRDHUP;
+  event.data.fd = connectionHandle;
+  epoll_ctl(epollHandle_, EPOLL_CTL_ADD, connectionHandle, &event);
+}
+
+void EventLoop::drop(int connectionHandle, bool failed) {
+  if (failed) ++stats_.warnCount;
+  epoll_ctl(epollHandle_, EPOLL_CTL_DEL, connectionHandle, nullptr);
+  connections_.erase(connectionHandle);
+  close(connectionHandle);
+}
+
+bool EventLoop::accept() {
+  int connectionHandle = ::accept(socketHandle_, nullptr, nullptr);
+  if (connectionHandle < 0) {
+    if (errno == EAGAIN || errno == EWOULDBLOCK) return false;
+    warn("Error accepting the connection");
+    ++stats_.warnCount;
+    if (++connectFailCount_ >= 100)
+      throw std::runtime_error(
+          "100 continuous connection failures, no point in filling up the log in an infinite loop.");
+    return false;
+  }
+  connectFailCount_ = 0;
+  // Workers write answers blocking with the socket timeouts, the loop reads
+  // with MSG_DONTWAIT.
+  setSocketTimeout(connectionHandle, option_.timeout);
+  watch(connectionHandle, false);
+  return true;
+}
+
+bool EventLoop::expectUpload(Connection &connection) {
+  std::string command = connection.request->command;
+  if (!startsWith(gfSignature(), command.data())) return false;
+  char *line = &command[strlen(gfSignature())];
+  char *name = nextWord(&line);
+  char *s = nextWord(&line);
+  if (name == NULL || s == NULL || !isdigit(s[0])) return false;
+
+  // Acknowledge exactly the commands handle_client would, it warns about the rest.
+  if (sameString("query", name) || sameString("transQuery", name) ||
+      (sameString("protQuery", name) && option_.trans)) {
+    connection.stage = Stage::bases;
+    connection.need = atoi(s);
+  } else if (sameString("batch", name) && atoi(s) <= gfBatchMaxQueries && !option_.trans) {
+    connection.stage = Stage::size;
+    connection.queries = atoi(s);
+  } else {
+    return false;
+  }
+  return true;
+}
+
+bool EventLoop::receive(int connectionHandle, Connection &connection) {
+  ReceivedRequest &request = *connection.request;
+  char buf[256];
+  for (;;) {
+    if (connection.stage == Stage::command) {
+      ssize_t readSize = recv(connectionHandle, buf, sizeof(buf) - 1, MSG_DONTWAIT);
+      if (readSize < 0) return errno == EAGAIN || errno == EWOULDBLOCK;
+      if (readSize == 0) {
+        // A keep-alive client closing its socket is the normal end of the session.
+        if (!request.keepAlive) ++stats_.warnCount;
+        return false;
+      }
+      request.command.assign(buf, readSize);
+      if (!expectUpload(connection)) break;
+      if (send(connectionHandle, "Y", 1, MSG_DONTWAIT | MSG_NOSIGNAL) != 1) return false;
+      continue;
+    }
+    if (connection.stage == Stage::size && connection.queries == 0) break;
+
+    // Frame the upload as handle_client reads it: the bases of a query, or
+    // for a batch the size of each query as a string followed by its bases.
+    std::string &upload = request.upload;
+    std::size_t have = upload.size() - connection.parsed;
+    std::size_t want;
+    if (connection.stage == Stage::bases) {
+      if (have >= connection.need) {
+        connection.parsed += connection.need;
+        connection.need = 0;
+        if (connection.queries == 0) break;
+        connection.stage = Stage::size;
+        continue;
+      }
+      want = connection.need - have;
+    } else if (have == 0) {
+      want = 1;
+    } else {
+      std::size_t length = static_cast<unsigned char>(upload[connection.parsed]);
+      if (have > length) {
+        std::string size = upload.substr(connection.parsed + 1, length);
+        connection.parsed += length + 1;
+        --connection.queries;
+        if (size.empty() || !isdigit(size[0])) break;
+        connection.stage = Stage::bases;
+        connection.need = atoi(size.data());
+        continue;
+      }
+      want = length + 1 - have;
+    }
+
+    std::size_t end = upload.size();
+    upload.resize(end + std::min<std::size_t>(want, 1 << 16));
+    ssize_t readSize = recv(connectionHandle, &upload[end], upload.size() - end, MSG_DONTWAIT);
+    upload.resize(end + std::max<ssize_t>(readSize, 0));
+    if (readSize < 0) return errno == EAGAIN || errno == EWOULDBLOCK;
+    if (readSize == 0) {
+      warn("Client closed the connection in the middle of a request");
+      ++stats_.warnCount;
+      return false;
+    }
+    connection.deadline = std::chrono::steady_clock::now() + std::chrono::seconds(option_.timeout);
+  }
+
+  // Received in full, the connection is left alone until a worker resumes it.
+  epoll_ctl(epollHandle_, EPOLL_CTL_DEL, connectionHandle, nullptr);
+  ready_.emplace_back(connectionHandle, std::move(connection.request));
+  connections_.erase(connectionHandle);
+  return true;
+}
+
+void EventLoop::resume(int connectionHandle) {
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    if (!stopped_) {
+      resumed_.push_back(connectionHandle);
+      uint64_t one = 1;
+      if (write(wakeHandle_, &one, sizeof(one)) != sizeof(one)) warn("Unable to wake up the event loop");
+      return;
+    }
+  }
+  close(connectionHandle);
+}
+
+void EventLoop::takeResumed() {
+  uint64_t count;
+  if (read(wakeHandle_, &count, sizeof(count)) < 0 && errno != EAGAIN) warn("Unable to read the event loop wake up");
+  std::vector<int> resumed;
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    resumed.swap(resumed_);
+  }
+  for (int connectionHandle : resumed) watch(connectionHandle, true);
+}
+
+void EventLoop::run(BS::thread_pool const &pool, Dispatch const &dispatch) {
+  const int maxEvents = 64;
+  struct epoll_event events[maxEvents];
+  bool accepting = false;
+
+  while (!control_.stopping) {
+    if (stopRequested) {
+      control_.stopping = true;
+      break;
+    }
+    // Back-pressure: while maxPending requests wait for a worker, leave new
+    // connections in the listen backlog. The worker that takes one wakes the
+    // loop through wakeHandle_.
+    control_.accepting = true;
+    bool paused =
+        option_.maxPending > 0 && pool.get_tasks_queued() >= static_cast<std::size_t>(option_.maxPending);
+    if (paused) {
+      control_.accepting = false;
+      paused = pool.get_tasks_queued() >= static_cast<std::size_t>(option_.maxPending);
+    }
+    if (accepting == paused) {
+      accepting = !paused;
+      struct epoll_event event;
+      ZeroVar(&event);
+      event.events = EPOLLIN;
+      event.data.fd = socketHandle_;
+      epoll_ctl(epollHandle_, accepting ? EPOLL_CTL_ADD : EPOLL_CTL_DEL, socketHandle_, &event);
+    }
+
+    // Wake up regularly to notice a quit message handled by a worker.
+    int count = epoll_wait(epollHandle_, events, maxEvents, 100);
+    for (int i = 0; i < count; ++i) {
+      int handle = events[i].data.fd;
+      if (handle == socketHandle_) {
+        while (accept()) {
+        }
+      } else if (handle == wakeHandle_) {
+        takeResumed();
+      } else {
+        auto found = connections_.find(handle);
+        if (found != connections_.end() && !receive(handle, found->second)) drop(handle, false);
+      }
+    }
+    for (auto &ready : ready_) dispatch(ready.first, std::move(ready.second));
+    ready_.clear();
+
+    // The loop enforces the timeouts a blocking read would.
+    auto now = std::chrono::steady_clock::now();
+    std::vector<int> expired;
+    for (auto const &connection : connections_)
+      if (connection.second.deadline < now) expired.push_back(connection.first);
+    for (int connectionHandle : expired) {
+      ReceivedRequest const &request = *connections_[connectionHandle].request;
+      bool idle = request.keepAlive && request.command.empty();
+      if (!idle) warn("Timed out reading a request");
+      drop(connectionHandle, !idle);
+    }
+  }
+
+  // Requests not received in full when the server stops are abandoned,
+  // those dispatched already drain with the workers.
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    stopped_ = true;
+  }
+  takeResumed();
+  while (!connections_.empty()) {
+    auto connection = connections_.begin();
+    if (!connection->second.request->command.empty()) ++control_.abandoned;
+    drop(connection->first, false);
+  }
+}
+
 void handle_client(int connectionHandle, std::string hostName, std::string portName, int fileCount,
                    std::vector<std::string> const &seqFiles, hash *perSeqMaxHash, genoFindIndex *gfIdx,
-                   ServerOption const &option) {
+                   ServerOption const &option, UsageStats &stats, BS::thread_pool const *workers,
+                   ServerControl *control, std::shared_ptr<ReceivedRequest> request) {
   // dbg("begin func ", connectionHandle, hostName, portName, fileCount, seqFiles, perSeqMaxHash, gfIdx, option);
 
   // print current thread id
@@ -85,193 +565,343 @@ void handle_client(int connectionHandle, std::string hostName, std::string portN
   // boolean noSimpRepMask = bool2boolean(option.noSimpRepMask);
 
   boolean sendOk = TRUE;
-  UsageStats stats{};
 
   char buf[256];
   char *line{nullptr};
   char *command{nullptr};
 
+  // Once a client sends keepAlive the connection serves commands until the
+  // client closes it or it stays idle for option.keepAliveTimeout seconds.
+  bool keepAlive = request != nullptr && request->keepAlive;
+  RequestReader reader(connectionHandle, request.get());
+
+  if (control != nullptr) {
+    control->dequeued();
+    if (control->abandoning) {
+      ++control->abandoned;
+      close(connectionHandle);
+      return;
+    }
+    control->track(connectionHandle);
+  }
+
   setSocketTimeout(connectionHandle, timeout);
 
-  int readSize = read(connectionHandle, buf, sizeof(buf) - 1);
+  for (;;) {
+    if (keepAlive && request == nullptr &&
+        !waitForNextCommand(connectionHandle, option.keepAliveTimeout, workers, control))
+      break;
 
-  if (readSize < 0) {
-    warn("Error reading from socket: %s", strerror(errno));
-    ++stats.warnCount;
-    close(connectionHandle);
-    return;
-  }
+    int readSize = reader.readCommand(buf, sizeof(buf) - 1);
 
-  if (readSize == 0) {
-    // warn("Zero sized query");
-    dbg("Zero sized query");
-    ++stats.warnCount;
-    close(connectionHandle);
-    return;
-  }
+    if (readSize < 0) {
+      warn("Error reading from socket: %s", strerror(errno));
+      ++stats.warnCount;
+      break;
+    }
 
-  buf[readSize] = 0;
-  // logDebug("%s", buf);
-  if (!startsWith(gfSignature(), buf)) {
-    ++stats.noSigCount;
-    close(connectionHandle);
-    return;
-  }
+    if (readSize == 0) {
+      // A keep-alive client closing its socket is the normal end of the session.
+      if (!keepAlive) {
+        // warn("Zero sized query");
+        dbg("Zero sized query");
+        ++stats.warnCount;
+      }
+      break;
+    }
 
-  line = buf + strlen(gfSignature());
-  command = nextWord(&line);
-  dbg("receive", command);
+    buf[readSize] = 0;
+    // logDebug("%s", buf);
+    if (!startsWith(gfSignature(), buf)) {
+      ++stats.noSigCount;
+      break;
+    }
 
-  if (sameString("quit", command)) {
-    // WARN: workaround <Yangyang Li yangyang.li@northwestern.edu>
-    exit(0);
-    // throw std::invalid_argument("exit server");
-  }
+    line = buf + strlen(gfSignature());
+    command = nextWord(&line);
+    dbg("receive", command);
+    auto commandStart = std::chrono::steady_clock::now();
 
-  if (sameString("status", command) || sameString("transInfo", command) || sameString("untransInfo", command)) {
-    // sleep 10 s
-    sleep(10);
-    sprintf(buf, "version %s", gfVersion);
-    pyerrSendString(connectionHandle, buf, sendOk);
-    pyerrSendString(connectionHandle, "serverType static", sendOk);
-    pyerrSendString(connectionHandle, buf, sendOk);
-    sprintf(buf, "type %s", (doTrans ? "translated" : "nucleotide"));
-    pyerrSendString(connectionHandle, buf, sendOk);
-    sprintf(buf, "host %s", hostName.data());
-    pyerrSendString(connectionHandle, buf, sendOk);
-    sprintf(buf, "port %s", portName.data());
-    pyerrSendString(connectionHandle, buf, sendOk);
-    sprintf(buf, "tileSize %d", tileSize);
-    pyerrSendString(connectionHandle, buf, sendOk);
-    sprintf(buf, "stepSize %d", stepSize);
-    pyerrSendString(connectionHandle, buf, sendOk);
-    sprintf(buf, "minMatch %d", minMatch);
-    pyerrSendString(connectionHandle, buf, sendOk);
-    sprintf(buf, "pcr requests %ld", stats.pcrCount);
-    pyerrSendString(connectionHandle, buf, sendOk);
-    sprintf(buf, "blat requests %ld", stats.blatCount);
-    pyerrSendString(connectionHandle, buf, sendOk);
-    sprintf(buf, "bases %ld", stats.baseCount);
-    pyerrSendString(connectionHandle, buf, sendOk);
-    if (doTrans) {
-      sprintf(buf, "aa %ld", stats.aaCount);
-      pyerrSendString(connectionHandle, buf, sendOk);
+    if (sameString("quit", command)) {
+      if (!option.canStop) {
+        logError("Ignoring quit message");
+        break;
+      }
+      if (control == nullptr) exit(0);
+      // The accept loop drains the server and answers this connection.
+      control->untrack(connectionHandle);
+      control->quitHandle = connectionHandle;
+      control->stopping = true;
+      return;
     }
-    sprintf(buf, "misses %d", stats.missCount);
-    pyerrSendString(connectionHandle, buf, sendOk);
-    sprintf(buf, "noSig %d", stats.noSigCount);
-    pyerrSendString(connectionHandle, buf, sendOk);
-    sprintf(buf, "trimmed %d", stats.trimCount);
-    pyerrSendString(connectionHandle, buf, sendOk);
-    sprintf(buf, "warnings %d", stats.warnCount);
-    pyerrSendString(connectionHandle, buf, sendOk);
-    pyerrSendString(connectionHandle, "end", sendOk);
-  } else if (sameString("query", command) || sameString("protQuery", command) || sameString("transQuery", command)) {
-    boolean queryIsProt = sameString(command, "protQuery");
-    char *s = nextWord(&line);
-    if (s == NULL || !isdigit(s[0])) {
-      warn("Expecting query size after query command");
-      ++stats.warnCount;
-    } else {
-      struct dnaSeq seq;
-      ZeroVar(&seq);
 
-      if (queryIsProt && !doTrans) {
-        warn("protein query sent to nucleotide server");
+    if (sameString("keepAlive", command)) {
+      if (option.keepAliveTimeout > 0) {
+        keepAlive = true;
+        int flag = 1;
+        setsockopt(connectionHandle, IPPROTO_TCP, TCP_NODELAY, &flag, sizeof(flag));
+        pyerrSendString(connectionHandle, "ok", sendOk);
+      } else {
+        pyerrSendString(connectionHandle, "no", sendOk);
+        break;
+      }
+    } else if (sameString("health", command)) {
+      // Answered at once so that readiness probes do not wait for status.
+      sprintf(buf, "version %s", gfVersion);
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "index %s", (gfIdx != nullptr ? "loaded" : "missing"));
+      pyerrSendString(connectionHandle, buf, sendOk);
+      pyerrSendString(connectionHandle, "end", sendOk);
+    } else if (sameString("status", command) || sameString("transInfo", command) ||
+               sameString("untransInfo", command)) {
+      sprintf(buf, "version %s", gfVersion);
+      pyerrSendString(connectionHandle, buf, sendOk);
+      pyerrSendString(connectionHandle, "serverType static", sendOk);
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "type %s", (doTrans ? "translated" : "nucleotide"));
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "host %s", hostName.data());
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "port %s", portName.data());
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "tileSize %d", tileSize);
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "stepSize %d", stepSize);
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "minMatch %d", minMatch);
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "pcr requests %ld", stats.pcrCount.load());
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "blat requests %ld", stats.blatCount.load());
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "bases %ld", stats.baseCount.load());
+      pyerrSendString(connectionHandle, buf, sendOk);
+      if (doTrans) {
+        sprintf(buf, "aa %ld", stats.aaCount.load());
+        pyerrSendString(connectionHandle, buf, sendOk);
+      }
+      sprintf(buf, "misses %d", stats.missCount.load());
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "noSig %d", stats.noSigCount.load());
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "trimmed %d", stats.trimCount.load());
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "warnings %d", stats.warnCount.load());
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "uptime %.1f", stats.uptime());
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "qps %.3f", stats.queriesPerSecond());
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "latency mean %.3f", stats.latencyMean() / 1000.0);
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "latency max %.3f", stats.latencyMax / 1000.0);
+      pyerrSendString(connectionHandle, buf, sendOk);
+      sprintf(buf, "workers %d", std::max(option.workers, 0));
+      pyerrSendString(connectionHandle, buf, sendOk);
+      long rssShared, rssPrivate;
+      if (residentMemory(rssShared, rssPrivate)) {
+        sprintf(buf, "rss shared %ld", rssShared);
+        pyerrSendString(connectionHandle, buf, sendOk);
+        sprintf(buf, "rss private %ld", rssPrivate);
+        pyerrSendString(connectionHandle, buf, sendOk);
+      }
+      pyerrSendString(connectionHandle, "end", sendOk);
+    } else if (sameString("query", command) || sameString("protQuery", command) || sameString("transQuery", command)) {
+      boolean queryIsProt = sameString(command, "protQuery");
+      char *s = nextWord(&line);
+      if (s == NULL || !isdigit(s[0])) {
+        warn("Expecting query size after query command");
         ++stats.warnCount;
-        queryIsProt = FALSE;
+        break;
       } else {
-        buf[0] = 'Y';
-        if (write(connectionHandle, buf, 1) == 1) {
-          seq.size = atoi(s);
-          seq.name = NULL;
-          if (seq.size > 0) {
-            ++stats.blatCount;
-            seq.dna = (char *)needLargeMem(seq.size + 1);
-            if (gfReadMulti(connectionHandle, seq.dna, seq.size) != seq.size) {
-              warn("Didn't sockRecieveString all %d bytes of query sequence", seq.size);
-              ++stats.warnCount;
-            } else {
-              dbg("query", seq.dna);
-
-              int maxSize = (doTrans ? maxAaSize : maxNtSize);
-
-              seq.dna[seq.size] = 0;
-              if (queryIsProt) {
-                seq.size = aaFilteredSize(seq.dna);
-                aaFilter(seq.dna, seq.dna);
+        struct dnaSeq seq;
+        ZeroVar(&seq);
+
+        if (queryIsProt && !doTrans) {
+          warn("protein query sent to nucleotide server");
+          ++stats.warnCount;
+          queryIsProt = FALSE;
+          break;
+        } else {
+          if (reader.acknowledge()) {
+            seq.size = atoi(s);
+            seq.name = NULL;
+            if (seq.size > 0) {
+              ++stats.blatCount;
+              seq.dna = (char *)needLargeMem(seq.size + 1);
+              if (reader.readMulti(seq.dna, seq.size) != seq.size) {
+                warn("Didn't sockRecieveString all %d bytes of query sequence", seq.size);
+                ++stats.warnCount;
+                sendOk = FALSE;
               } else {
-                seq.size = dnaFilteredSize(seq.dna);
-                dnaFilter(seq.dna, seq.dna);
-              }
-              if (seq.size > maxSize) {
-                ++stats.trimCount;
-                seq.size = maxSize;
-                seq.dna[maxSize] = 0;
-              }
-              if (queryIsProt)
-                stats.aaCount += seq.size;
-              else
-                stats.baseCount += seq.size;
-              if (seqLog && (logGetFile() != NULL)) {
-                FILE *lf = logGetFile();
-                faWriteNext(lf, "query", seq.dna, seq.size);
-                fflush(lf);
+                dbg("query", seq.dna);
+
+                int maxSize = (doTrans ? maxAaSize : maxNtSize);
+
+                seq.dna[seq.size] = 0;
+                if (queryIsProt) {
+                  seq.size = aaFilteredSize(seq.dna);
+                  aaFilter(seq.dna, seq.dna);
+                } else {
+                  seq.size = dnaFilteredSize(seq.dna);
+                  dnaFilter(seq.dna, seq.dna);
+                }
+                if (seq.size > maxSize) {
+                  ++stats.trimCount;
+                  seq.size = maxSize;
+                  seq.dna[maxSize] = 0;
+                }
+                if (queryIsProt)
+                  stats.aaCount += seq.size;
+                else
+                  stats.baseCount += seq.size;
+                if (seqLog && (logGetFile() != NULL)) {
+                  FILE *lf = logGetFile();
+                  faWriteNext(lf, "query", seq.dna, seq.size);
+                  fflush(lf);
+                }
+                pyerrorSafeQuery(doTrans, queryIsProt, &seq, gfIdx, connectionHandle, buf, perSeqMaxHash, option,
+                                 stats, sendOk);
               }
-              errorSafeQuery(doTrans, queryIsProt, &seq, gfIdx, connectionHandle, buf, perSeqMaxHash, option, stats,
-                             sendOk);
-              if (perSeqMaxHash) hashZeroVals(perSeqMaxHash);
+              freez(&seq.dna);
             }
-            freez(&seq.dna);
+            pyerrSendString(connectionHandle, "end", sendOk);
+            stats.addLatency(elapsedMicros(commandStart));
+          } else {
+            sendOk = FALSE;
           }
-          pyerrSendString(connectionHandle, "end", sendOk);
         }
       }
-    }
-  } else if (sameString("pcr", command)) {
-    char *f = nextWord(&line);
-    char *r = nextWord(&line);
-    char *s = nextWord(&line);
-    int maxDistance;
-    ++stats.pcrCount;
-    if (s == NULL || !isdigit(s[0])) {
-      warn("Badly formatted pcr command");
-      ++stats.warnCount;
-    } else if (doTrans) {
-      warn("Can't pcr on translated server");
-      ++stats.warnCount;
-    } else if (badPcrPrimerSeq(f) || badPcrPrimerSeq(r)) {
-      warn("Can only handle ACGT in primer sequences.");
-      ++stats.warnCount;
+    } else if (sameString("batch", command)) {
+      // Several DNA queries in one round trip.  After the 'Y' the client sends
+      // the size of each query as a string followed by its bases, the ranges
+      // of query i come back as "i\t<range>" strings followed by one "end".
+      char *s = nextWord(&line);
+      if (s == NULL || !isdigit(s[0]) || atoi(s) > gfBatchMaxQueries) {
+        warn("Expecting query count up to %d after batch command", gfBatchMaxQueries);
+        ++stats.warnCount;
+        break;
+      } else if (doTrans) {
+        warn("Can't batch queries on translated server");
+        ++stats.warnCount;
+        break;
+      }
+      if (!reader.acknowledge()) {
+        sendOk = FALSE;
+        break;
+      }
+      // Read the whole batch before answering, the client only reads once it
+      // has sent every query.
+      std::vector<struct dnaSeq> seqs(atoi(s));
+      for (auto &seq : seqs) {
+        if (reader.getString(buf) == NULL || !isdigit(buf[0])) {
+          warn("Expecting query size in batch");
+          ++stats.warnCount;
+          sendOk = FALSE;
+          break;
+        }
+        seq.size = atoi(buf);
+        seq.dna = (char *)needLargeMem(seq.size + 1);
+        if (reader.readMulti(seq.dna, seq.size) != seq.size) {
+          warn("Didn't sockRecieveString all %d bytes of query sequence", seq.size);
+          ++stats.warnCount;
+          sendOk = FALSE;
+          break;
+        }
+        seq.dna[seq.size] = 0;
+      }
+      for (std::size_t i = 0; sendOk && i < seqs.size(); ++i) {
+        struct dnaSeq &seq = seqs[i];
+        if (seq.size <= 0) continue;
+        ++stats.blatCount;
+        seq.size = dnaFilteredSize(seq.dna);
+        dnaFilter(seq.dna, seq.dna);
+        if (seq.size > maxNtSize) {
+          ++stats.trimCount;
+          seq.size = maxNtSize;
+          seq.dna[maxNtSize] = 0;
+        }
+        stats.baseCount += seq.size;
+        if (seqLog && (logGetFile() != NULL)) {
+          FILE *lf = logGetFile();
+          faWriteNext(lf, "query", seq.dna, seq.size);
+          fflush(lf);
+        }
+        std::string tag = std::to_string(i) + "\t";
+        pyerrorSafe(connectionHandle, tag, "Error: gfServer out of memory. Try reducing size of query.", sendOk, [&]() {
+          for (auto &range : dnaQueryRanges(gfIdx->untransGf, &seq, perSeqMaxHash, option, stats)) {
+            std::string tagged = tag + range;
+            pyerrSendString(connectionHandle, tagged.data(), sendOk);
+          }
+        });
+      }
+      for (auto &seq : seqs) freez(&seq.dna);
+      pyerrSendString(connectionHandle, "end", sendOk);
+      stats.addLatency(elapsedMicros(commandStart));
+    } else if (sameString("pcr", command)) {
+      char *f = nextWord(&line);
+      char *r = nextWord(&line);
+      char *s = nextWord(&line);
+      int maxDistance;
+      ++stats.pcrCount;
+      if (s == NULL || !isdigit(s[0])) {
+        warn("Badly formatted pcr command");
+        ++stats.warnCount;
+        break;
+      } else if (doTrans) {
+        warn("Can't pcr on translated server");
+        ++stats.warnCount;
+        break;
+      } else if (badPcrPrimerSeq(f) || badPcrPrimerSeq(r)) {
+        warn("Can only handle ACGT in primer sequences.");
+        ++stats.warnCount;
+        break;
+      } else {
+        maxDistance = atoi(s);
+        pyerrorSafePcr(gfIdx->untransGf, f, r, maxDistance, connectionHandle, sendOk);
+        stats.addLatency(elapsedMicros(commandStart));
+      }
+    } else if (sameString("files", command)) {
+      int i;
+      sprintf(buf, "%d", fileCount);
+      pyerrSendString(connectionHandle, buf, sendOk);
+      for (i = 0; i < fileCount; ++i) {
+        sprintf(buf, "%s", seqFiles[i].data());
+        pyerrSendString(connectionHandle, buf, sendOk);
+      }
     } else {
-      maxDistance = atoi(s);
-      errorSafePcr(gfIdx->untransGf, f, r, maxDistance, connectionHandle, sendOk);
+      warn("Unknown command %s", command);
+      ++stats.warnCount;
+      break;
     }
-  } else if (sameString("files", command)) {
-    int i;
-    sprintf(buf, "%d", fileCount);
-    pyerrSendString(connectionHandle, buf, sendOk);
-    for (i = 0; i < fileCount; ++i) {
-      sprintf(buf, "%s", seqFiles[i].data());
-      pyerrSendString(connectionHandle, buf, sendOk);
+
+    if (!keepAlive || !sendOk) break;
+    if (request != nullptr) {
+      // The event loop waits for the next command, the worker moves on.
+      if (control != nullptr) control->untrack(connectionHandle);
+      request->loop->resume(connectionHandle);
+      return;
     }
-  } else {
-    warn("Unknown command %s", command);
-    ++stats.warnCount;
   }
+  if (control != nullptr) control->untrack(connectionHandle);
   close(connectionHandle);
   // connectionHandle = 0;
 }
 
-int pystartServer(std::string &hostName, std::string &portName, int fileCount, std::vector<std::string> &seqFiles,
-                  ServerOption &option, UsageStats &stats) {
-  BS::thread_pool pool(option.threads);
+int serverThreadCount(int threads) {
+  if (threads > 0) return threads;
+  cpu_set_t cpus;
+  CPU_ZERO(&cpus);
+  if (sched_getaffinity(0, sizeof(cpus), &cpus) == 0 && CPU_COUNT(&cpus) > 0) return CPU_COUNT(&cpus);
+  return std::max(1u, std::thread::hardware_concurrency());
+}
 
-  std::vector<char *> cseqFiles{};
-  cseqFiles.reserve(seqFiles.size());
-  for (auto &string : seqFiles) {
-    cseqFiles.push_back(string.data());
-  }
+int serveIndex(std::string &hostName, std::string &portName, int fileCount, std::vector<std::string> &seqFiles,
+               hash *perSeqMaxHash, genoFindIndex *gfIdx, ServerOption &option, UsageStats &stats) {
+  // Outlives the workers, they hand keep-alive connections back to it.
+  std::unique_ptr<EventLoop> loop;
+  BS::thread_pool pool(serverThreadCount(option.threads));
+  ServerControl control;
 
   struct sockaddr_in6 fromAddr;
   socklen_t fromLen;
@@ -279,17 +909,58 @@ int pystartServer(std::string &hostName, std::string &portName, int fileCount, s
   int socketHandle = 0;
   int port = atoi(portName.data());
 
-  hash *perSeqMaxHash = nullptr;
-  genoFindIndex *gfIdx = pybuildIndex4Server(hostName, portName, fileCount, cseqFiles.data(), perSeqMaxHash, option);
+  // Rates and uptime count from the moment the index is ready.
+  stats.startTime = std::chrono::steady_clock::now();
 
   /* Set up socket.  Get ready to listen to it. */
-  socketHandle = netAcceptingSocket(port, 100);
+  // A unix:/path.sock host listens on a Unix domain socket instead of the port.
+  bool isUnix = netIsUnixAddress(hostName.data());
+  std::string unixPath = isUnix ? hostName.substr(strlen(NET_UNIX_PREFIX)) : "";
+  // The workers of a server each listen on the port, the kernel spreads the connections.
+  if (isUnix)
+    socketHandle = netAcceptingUnixSocket(unixPath.data(), 100);
+  else
+    socketHandle = option.workers > 0 ? netAcceptingSharedSocket(port, 100) : netAcceptingSocket(port, 100);
   if (socketHandle < 0)
-    throw std::runtime_error("Fatal Error: Unable to open listening socket on port " + portName + ".");
+    throw std::runtime_error("Fatal Error: Unable to open listening socket on " +
+                             (isUnix ? hostName : "port " + portName) + ".");
   // errAbort("Fatal Error: Unable to open listening socket on port %d.", port);
 
+  struct pollfd listener;
+  listener.fd = socketHandle;
+  listener.events = POLLIN;
+
+  if (option.eventLoop) {
+    loop = std::make_unique<EventLoop>(socketHandle, option, stats, control);
+    loop->run(pool, [&](int connectionHandle, std::shared_ptr<ReceivedRequest> request) {
+      pool.push_task(handle_client, connectionHandle, hostName, portName, fileCount, seqFiles, perSeqMaxHash, gfIdx,
+                     option, std::ref(stats), &pool, &control, std::move(request));
+    });
+  }
+
   int connectFailCount = 0;
-  for (;;) {
+  while (loop == nullptr && !control.stopping) {
+    if (stopRequested) {
+      control.stopping = true;
+      break;
+    }
+    // Back-pressure: while maxPending connections wait for a worker, leave new
+    // ones in the listen backlog instead of queueing them without limit. The
+    // worker that takes one wakes this thread.
+    auto full = [&]() {
+      return option.maxPending > 0 && pool.get_tasks_queued() >= static_cast<std::size_t>(option.maxPending);
+    };
+    if (full()) {
+      control.accepting = false;
+      while (full() && !control.stopping && !stopRequested)
+        control.waitDequeued([&]() { return !full() || control.stopping; }, std::chrono::milliseconds(100));
+      control.accepting = true;
+    }
+
+    // Wake up regularly to notice a quit message handled by a worker.
+    listener.revents = 0;
+    if (poll(&listener, 1, 100) <= 0) continue;
+
     ZeroVar(&fromAddr);
     fromLen = sizeof(fromAddr);
     int connectionHandle = accept(socketHandle, (struct sockaddr *)&fromAddr, &fromLen);
@@ -313,13 +984,191 @@ int pystartServer(std::string &hostName, std::string &portName, int fileCount, s
     // dbg("before ", connectionHandle, hostName, portName, fileCount, seqFiles, perSeqMaxHash, gfIdx, option);
     // handle_client(connectionHandle, hostName, portName, fileCount, seqFiles, perSeqMaxHash, gfIdx, option);
     pool.push_task(handle_client, connectionHandle, hostName, portName, fileCount, seqFiles, perSeqMaxHash, gfIdx,
-                   option);
+                   option, std::ref(stats), &pool, &control, nullptr);
   }
 
-  pool.wait_for_tasks();
-
+  // Drain: refuse new connections, give the requests in flight until the
+  // deadline, then cut the remaining connections.
   close(socketHandle);
-  return 0;
+  if (isUnix) unlink(unixPath.data());
+  if (!pool.wait_for_tasks_duration(std::chrono::seconds(std::max(option.drainTimeout, 0)))) {
+    control.abandon();
+    pool.wait_for_tasks();
+  }
+  int abandoned = control.abandoned;
+  logInfo("gfServer on port %s drained, %d requests abandoned", portName.data(), abandoned);
+
+  int quitHandle = control.quitHandle;
+  if (quitHandle >= 0) {
+    char buf[256];
+    boolean sendOk = TRUE;
+    sprintf(buf, "abandoned %d", abandoned);
+    pyerrSendString(quitHandle, buf, sendOk);
+    pyerrSendString(quitHandle, "end", sendOk);
+    close(quitHandle);
+  }
+  return abandoned;
+}
+
+int serveWorkers(std::string &hostName, std::string &portName, int fileCount, std::vector<std::string> &seqFiles,
+                 hash *perSeqMaxHash, genoFindIndex *gfIdx, ServerOption &option, UsageStats &stats) {
+  if (netIsUnixAddress(hostName.data()))
+    throw std::invalid_argument("Workers share a TCP port, they can't listen on " + hostName + ".");
+
+  // The workers count into the same statistics, so that status covers all of them.
+  void *memory = mmap(nullptr, sizeof(UsageStats), PROT_READ | PROT_WRITE, MAP_SHARED | MAP_ANONYMOUS, -1, 0);
+  if (memory == MAP_FAILED) throw std::runtime_error("Unable to share usage statistics with the workers.");
+  auto *shared = new (memory) UsageStats(stats);
+
+  // Everything loaded so far, the index above all, is shared with the workers
+  // until one of them writes to it, which serving never does.
+  pid_t parent = getpid();
+  std::vector<pid_t> workers;
+  for (int i = 0; i < option.workers; ++i) {
+    pid_t pid = fork();
+    if (pid == 0) {
+      // A worker drains when asked to, and doesn't outlive its parent.
+      signal(SIGTERM, requestStop);
+      prctl(PR_SET_PDEATHSIG, SIGTERM);
+      if (getppid() != parent) stopRequested = true;
+      int status = workerFailed;
+      try {
+        status = std::min(serveIndex(hostName, portName, fileCount, seqFiles, perSeqMaxHash, gfIdx, option, *shared),
+                          workerFailed - 1);
+      } catch (std::exception const &e) {
+        logError("gfServer worker %d: %s", i, e.what());
+      }
+      _exit(status);
+    }
+    if (pid < 0) {
+      logError("Couldn't fork gfServer worker: %s", strerror(errno));
+      break;
+    }
+    workers.push_back(pid);
+  }
+
+  // Once a worker stops, after a quit message or an error, drain the others.
+  bool stopping = workers.size() < static_cast<std::size_t>(option.workers);
+  bool failed = stopping;
+  int abandoned = 0;
+  if (stopping)
+    for (pid_t pid : workers) kill(pid, SIGTERM);
+  while (!workers.empty()) {
+    for (auto it = workers.begin(); it != workers.end();) {
+      int status;
+      pid_t done = waitpid(*it, &status, WNOHANG);
+      if (done == 0 || (done < 0 && errno == EINTR)) {
+        ++it;
+        continue;
+      }
+      if (done > 0 && WIFEXITED(status) && WEXITSTATUS(status) != workerFailed)
+        abandoned += WEXITSTATUS(status);
+      else
+        failed = true;
+      it = workers.erase(it);
+      if (!stopping) {
+        stopping = true;
+        for (pid_t pid : workers) kill(pid, SIGTERM);
+      }
+    }
+    if (!workers.empty()) std::this_thread::sleep_for(std::chrono::milliseconds(100));
+  }
+
+  stats = *shared;
+  shared->~UsageStats();
+  munmap(memory, sizeof(UsageStats));
+  if (failed) throw std::runtime_error("A gfServer worker failed, see the log.");
+  return abandoned;
+}
+
+int pystartServer(std::string &hostName, std::string &portName, int fileCount, std::vector<std::string> &seqFiles,
+                  ServerOption &option, UsageStats &stats) {
+  std::vector<char *> cseqFiles{};
+  cseqFiles.reserve(seqFiles.size());
+  for (auto &string : seqFiles) {
+    cseqFiles.push_back(string.data());
+  }
+
+  hash *perSeqMaxHash = nullptr;
+  genoFindIndex *gfIdx = pybuildIndex4Server(hostName, portName, fileCount, cseqFiles.data(), perSeqMaxHash, option);
+  int abandoned = option.workers > 0
+                      ? serveWorkers(hostName, portName, fileCount, seqFiles, perSeqMaxHash, gfIdx, option, stats)
+                      : serveIndex(hostName, portName, fileCount, seqFiles, perSeqMaxHash, gfIdx, option, stats);
+
+  genoFindIndexFree(&gfIdx);
+  hashFree(&perSeqMaxHash);
+  return abandoned;
+}
+
+ServerIndex::ServerIndex(std::vector<std::string> seqFiles_, ServerOption option_)
+    : seqFiles(std::move(seqFiles_)), option(std::move(option_)) {
+  std::vector<char *> cseqFiles{};
+  cseqFiles.reserve(seqFiles.size());
+  for (auto &string : seqFiles) {
+    cseqFiles.push_back(string.data());
+  }
+  std::string hostName{"localhost"}, portName{"0"};
+
+  // A bad sequence file must raise in Python rather than exit the process.
+  struct errCatch *errCatch = errCatchNew();
+  if (errCatchStart(errCatch))
+    gfIdx_ = pybuildIndex4Server(hostName, portName, static_cast<int>(cseqFiles.size()), cseqFiles.data(),
+                                 perSeqMaxHash_, option);
+  errCatchEnd(errCatch);
+  if (errCatch->gotError) {
+    std::string message = errCatch->message->string;
+    errCatchFree(&errCatch);
+    throw std::runtime_error("Unable to build the index: " + message);
+  }
+  errCatchFree(&errCatch);
+}
+
+ServerIndex::~ServerIndex() {
+  genoFindIndexFree(&gfIdx_);
+  hashFree(&perSeqMaxHash_);
+}
+
+int ServerIndex::serve(std::string hostName, std::string portName, UsageStats &stats) {
+  if (option.workers > 0) throw std::invalid_argument("Workers are forked by a server process, not an index in process.");
+  return serveIndex(hostName, portName, static_cast<int>(seqFiles.size()), seqFiles, perSeqMaxHash_, gfIdx_, option,
+                    stats);
+}
+
+std::vector<std::string> ServerIndex::ranges(std::string dna) const {
+  if (gfIdx_->untransGf == nullptr) throw std::invalid_argument("ranges needs an untranslated index");
+
+  struct dnaSeq seq;
+  ZeroVar(&seq);
+  seq.dna = dna.data();
+  seq.size = dnaFilteredSize(seq.dna);
+  dnaFilter(seq.dna, seq.dna);
+  if (seq.size > option.maxNtSize) seq.size = option.maxNtSize;
+  seq.dna[seq.size] = 0;
+
+  UsageStats stats{};
+  return dnaQueryRanges(gfIdx_->untransGf, &seq, perSeqMaxHash_, option, stats);
+}
+
+std::string ServerIndex::align(ClientOption clientOption, std::vector<std::string> const &names,
+                               std::vector<std::string> const &dnas, TargetFileCache *fileCache) const {
+  if (gfIdx_->untransGf == nullptr) throw std::invalid_argument("align needs an untranslated index");
+
+  std::string databaseName;
+  for (auto const &file : seqFiles) databaseName += (databaseName.empty() ? "" : ",") + file;
+
+  UsageStats stats{};
+  auto rangesOf = [&](std::size_t, struct dnaSeq *seq, bool) {
+    if (seq->size <= option.maxNtSize) return dnaQueryRangeList(gfIdx_->untransGf, seq, perSeqMaxHash_, option, stats);
+
+    // Trim the query the way a server does before looking it up.
+    struct dnaSeq trimmed = *seq;
+    trimmed.size = option.maxNtSize;
+    trimmed.dna = cloneStringZ(seq->dna, trimmed.size);
+    struct gfRange *rangeList = dnaQueryRangeList(gfIdx_->untransGf, &trimmed, perSeqMaxHash_, option, stats);
+    freeMem(trimmed.dna);
+    return rangeList;
+  };
+  return gfAlignQueries(clientOption, databaseName, names, dnas, rangesOf, fileCache);
 }
 
 }  // namespace cppbinding
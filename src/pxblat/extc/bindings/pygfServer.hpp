@@ -1,25 +1,126 @@
 #ifndef PYGF_SERVER_HPP
 #define PYGF_SERVER_HPP
 
+#include <atomic>
+#include <chrono>
+#include <condition_variable>
+#include <functional>
+#include <memory>
+#include <mutex>
+#include <set>
+#include <string>
+
+#include "bs_thread_pool.hpp"
+#include "gfClient.hpp"
 #include "gfServer.hpp"
 
 namespace cppbinding {
 
+// Shared by the accept loop and the workers of a server so that a quit message
+// drains the server: accepting stops, requests in flight are finished until
+// option.drainTimeout and the rest are abandoned.
+struct ServerControl {
+  std::atomic<bool> stopping{false};
+  std::atomic<bool> abandoning{false};
+  std::atomic<int> abandoned{0};
+  std::atomic<int> quitHandle{-1};  // Connection that sent quit, told the outcome once drained
+
+  // Cleared while maxPending connections wait for a worker. A worker taking
+  // one then wakes the accept loop, through wakeHandle if an event loop set it.
+  std::atomic<bool> accepting{true};
+  std::atomic<int> wakeHandle{-1};
+
+  void track(int connectionHandle);
+  void untrack(int connectionHandle);
+  // Shut down the connections being served and every connection a worker picks up later.
+  void abandon();
+  // Called by a worker as it takes a connection off the queue.
+  void dequeued();
+  // Wait until ready() holds, a worker dequeued or the timeout passed.
+  void waitDequeued(std::function<bool()> const &ready, std::chrono::milliseconds timeout);
+
+ private:
+  std::mutex mutex_;
+  std::set<int> connections_;
+  std::mutex dequeueMutex_;
+  std::condition_variable dequeued_;
+};
+
+class EventLoop;
+
+// A request an event loop received in full. handle_client serves it from
+// memory and hands a keep-alive connection back to the loop once answered.
+struct ReceivedRequest {
+  std::string command;  // Signature and command line, as read at once from the socket
+  std::string upload;   // Sizes and bases the client sent after the loop acknowledged the command
+  bool keepAlive{false};
+  EventLoop *loop{nullptr};
+};
+
 void pyerrorSafeQuery(boolean doTrans, boolean queryIsProt, struct dnaSeq *seq, struct genoFindIndex *gfIdx,
                       int connectionHandle, char *buf, struct hash *perSeqMaxHash, ServerOption const &options,
                       UsageStats &stats, boolean &sendOk);
 
+void pyerrorSafePcr(struct genoFind *gf, char *fPrimer, char *rPrimer, int maxDistance, int connectionHandle,
+                    boolean &sendOk);
+
 boolean pynetSendString(int sd, char *s);
 
 void pyerrSendString(int sd, char *s, boolean &sendOk);
 
 void handle_client(int connectionHandle, std::string hostName, std::string portName, int fileCount,
                    std::vector<std::string> const &seqFiles, hash *perSeqMaxHash, genoFindIndex *gfIdx,
-                   ServerOption const &option);
+                   ServerOption const &option, UsageStats &stats, BS::thread_pool const *workers = nullptr,
+                   ServerControl *control = nullptr, std::shared_ptr<ReceivedRequest> request = nullptr);
+
+// Number of worker threads for the threads option, values below 1 mean one
+// thread per CPU the process may run on.
+int serverThreadCount(int threads);
+
+// Serve an index until a quit message drains the server, return the number of
+// requests abandoned. The index stays owned by the caller.
+int serveIndex(std::string &hostName, std::string &portName, int fileCount, std::vector<std::string> &seqFiles,
+               hash *perSeqMaxHash, genoFindIndex *gfIdx, ServerOption &option, UsageStats &stats);
+
+// Exit status of a worker process that failed to serve.
+constexpr int workerFailed = 255;
+
+// Fork option.workers processes that share the index loaded by this one and
+// serve it on one port with SO_REUSEPORT. A quit message drains the worker it
+// reaches and then the others, return the requests abandoned by all of them.
+int serveWorkers(std::string &hostName, std::string &portName, int fileCount, std::vector<std::string> &seqFiles,
+                 hash *perSeqMaxHash, genoFindIndex *gfIdx, ServerOption &option, UsageStats &stats);
 
 int pystartServer(std::string &hostName, std::string &portName, int fileCount, std::vector<std::string> &seqFiles,
                   ServerOption &options, UsageStats &stats);
 
+// An index loaded once in this process. Its server threads and direct queries
+// from Python share it, so the genome is held in memory only once.
+class ServerIndex {
+ public:
+  ServerIndex(std::vector<std::string> seqFiles, ServerOption option);
+  ~ServerIndex();
+  ServerIndex(const ServerIndex &) = delete;
+  ServerIndex &operator=(const ServerIndex &) = delete;
+
+  // Serve the index over TCP, see serveIndex.
+  int serve(std::string hostName, std::string portName, UsageStats &stats);
+  // Ranges of the genome a DNA query hits, as the server answers a query command.
+  std::vector<std::string> ranges(std::string dna) const;
+  // Align DNA queries without a server: the ranges of both strands are looked
+  // up in the index and the alignments stitched in memory, giving the output
+  // of a client querying a server of this index.
+  std::string align(ClientOption clientOption, std::vector<std::string> const &names,
+                    std::vector<std::string> const &dnas, TargetFileCache *fileCache = nullptr) const;
+
+  std::vector<std::string> seqFiles;
+  ServerOption option;
+
+ private:
+  genoFindIndex *gfIdx_{nullptr};
+  hash *perSeqMaxHash_{nullptr};
+};
+
 }  // namespace cppbinding
 
 #endif  // !#ifndef PYGF_SERVER_HPP
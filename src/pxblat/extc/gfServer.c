@@ -311,7 +311,7 @@ void genoFindDirect(char *probeName, int fileCount, char *seqFiles[])
   if (doTrans) errAbort("Don't support translated direct stuff currently, sorry");
 
   gf = gfIndexNibsAndTwoBits(fileCount, seqFiles, minMatch, maxGap, tileSize, repMatch, FALSE, allowOneMismatch,
-                             stepSize, noSimpRepMask);
+                             stepSize, noSimpRepMask, 1);
 
   while (faSpeedReadNext(lf, &seq.dna, &seq.size, &seq.name)) {
     struct lm *lm = lmInit(0);
@@ -340,7 +340,7 @@ void genoPcrDirect(char *fPrimer, char *rPrimer, int fileCount, char *seqFiles[]
 
   startTime = clock1000();
   gf = gfIndexNibsAndTwoBits(fileCount, seqFiles, minMatch, maxGap, tileSize, repMatch, FALSE, allowOneMismatch,
-                             stepSize, noSimpRepMask);
+                             stepSize, noSimpRepMask, 1);
   endTime = clock1000();
   printf("Index built in %4.3f seconds\n", 0.001 * (endTime - startTime));
 
@@ -712,7 +712,7 @@ void startServer(char *hostName, char *portName, int fileCount, char *seqFiles[]
     print_option();
 
     gfIdx = genoFindIndexBuild(fileCount, seqFiles, minMatch, maxGap, tileSize, repMatch, doTrans, NULL,
-                               allowOneMismatch, doMask, stepSize, noSimpRepMask);
+                               allowOneMismatch, doMask, stepSize, noSimpRepMask, 1);
     logInfo("index building completed in %4.3f seconds", 0.001 * (clock1000() - startIndexTime));
   } else {
     gfIdx = genoFindIndexLoad(indexFile, doTrans);
@@ -1081,7 +1081,7 @@ static void buildIndex(char *gfxFile, int fileCount, char *seqFiles[])
   checkIndexFileName(gfxFile, seqFiles[0]);
 
   struct genoFindIndex *gfIdx = genoFindIndexBuild(fileCount, seqFiles, minMatch, maxGap, tileSize, repMatch, doTrans,
-                                                   NULL, allowOneMismatch, doMask, stepSize, noSimpRepMask);
+                                                   NULL, allowOneMismatch, doMask, stepSize, noSimpRepMask, 1);
   genoFindIndexWrite(gfIdx, gfxFile);
 }
 
@@ -66,7 +66,7 @@ struct ffAli
 
 #define ffIntronMaxDefault 750000	/* Default maximum intron size */
 
-extern int ffIntronMax;
+extern __thread int ffIntronMax;   /* Per thread, set by each query. */
 
 void setFfIntronMax(int value);         /* change max intron size */
 void setFfExtendThroughN(boolean val);	/* Set whether or not can extend through N's. */
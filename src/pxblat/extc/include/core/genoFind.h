@@ -57,6 +57,7 @@ struct gfConnection
   boolean isDynamic;    // is this a dynamic server?
   char *genome;         // genome name for dynamic server
   char *genomeDataDir;  // genome data directory for dynamic server
+  boolean keepAlive;    // server agreed to keep the socket open between requests
 };
 
 enum gfConstants {
@@ -147,8 +148,28 @@ struct genoFind
                                 * would be a struct but that would take
                                 * 8 bytes instead of 6, or nearly an
                                 * extra gigabyte of RAM. */
+  bits32 *listOffsets;         /* Start of list or endList for each N-mer
+                                * in allocated, counted in entries.
+                                * Used in place of lists and endLists
+                                * when mapped from a file that has them. */
 };
 
+INLINE bits32 *gfTileList(struct genoFind *gf, int tile)
+/* Return list of N-mer of unsegmented index. */
+{
+if (gf->listOffsets != NULL)
+    return (bits32 *)gf->allocated + gf->listOffsets[tile];
+return gf->lists[tile];
+}
+
+INLINE bits16 *gfTileEndList(struct genoFind *gf, int tile)
+/* Return endList of N-mer of segmented index. */
+{
+if (gf->listOffsets != NULL)
+    return (bits16 *)gf->allocated + 3 * (size_t)gf->listOffsets[tile];
+return gf->endLists[tile];
+}
+
 void genoFindFree(struct genoFind **pGenoFind);
 /* Free up a genoFind index. */
 
@@ -169,8 +190,8 @@ struct genoFindIndex
 
 struct genoFindIndex *genoFindIndexBuild(int fileCount, char *seqFiles[], int minMatch, int maxGap, int tileSize,
                                          int repMatch, boolean doTrans, char *oocFile, boolean allowOneMismatch,
-                                         boolean doMask, int stepSize, boolean noSimpRepMask);
-/* build a untranslated or translated index */
+                                         boolean doMask, int stepSize, boolean noSimpRepMask, int threads);
+/* build a untranslated or translated index using threads */
 
 void genoFindIndexFree(struct genoFindIndex **pGfIdx);
 /* free a genoFindIndex */
@@ -291,7 +312,7 @@ struct genoFind *gfIndexSeq(bioSeq *seqList, int minMatch, int maxGap, int tileS
 
 struct genoFind *gfIndexNibsAndTwoBits(int fileCount, char *fileNames[], int minMatch, int maxGap, int tileSize,
                                        int maxPat, char *oocFile, boolean allowOneMismatch, int stepSize,
-                                       boolean noSimpRepMask);
+                                       boolean noSimpRepMask, int threads);
 /* Make index for all .nib and .2bits in list.
  *      minMatch - minimum number of matching tiles to trigger alignments
  *      maxGap   - maximum deviation from diagonal of tiles
@@ -300,12 +321,15 @@ struct genoFind *gfIndexNibsAndTwoBits(int fileCount, char *fileNames[], int min
  *      oocFile  - .ooc format file that lists repeat tiles.  May be NULL.
  *      allowOneMismatch - allow one mismatch in a tile.
  *      stepSize - space between tiles.  Zero means default (which is tileSize).
- *      noSimpRepMask - skip simple repeat masking. */
+ *      noSimpRepMask - skip simple repeat masking.
+ *      threads  - number of threads building the index, which is the same
+ *                 for any number. */
 
 void gfIndexTransNibsAndTwoBits(struct genoFind *transGf[2][3], int fileCount, char *fileNames[], int minMatch,
                                 int maxGap, int tileSize, int maxPat, char *oocFile, boolean allowOneMismatch,
-                                boolean mask, int stepSize, boolean noSimpRepMask);
-/* Make translated (6 frame) index for all .nib and .2bit files. */
+                                boolean mask, int stepSize, boolean noSimpRepMask, int threads);
+/* Make translated (6 frame) index for all .nib and .2bit files, each
+ * frame on its own thread if threads is more than one. */
 
 /* -------- Routines to scan index for homolgous areas ------------ */
 
@@ -366,6 +390,21 @@ struct hash *gfFileCacheNew();
 void gfFileCacheFree(struct hash **pCache);
 /* Free up resources in cache. */
 
+void *gfFileCacheFind(struct hash *cache, char *fileName);
+/* Return the open nibInfo or twoBitFile for fileName, or NULL if it is not
+ * in cache.  Marks the file as the most recently used one. */
+
+void gfFileCacheAdd(struct hash *cache, char *fileName, void *file);
+/* Add an open nibInfo or twoBitFile for fileName to cache. */
+
+void gfFileCacheTrim(struct hash *cache, int maxOpen);
+/* Close the least recently used files in cache until at most maxOpen are
+ * left open. */
+
+void gfFileCachesTrim(struct hash **caches, int cacheCount, int maxOpen);
+/* Close the least recently used files of all caches until at most maxOpen
+ * are left open in them together. */
+
 void gfAlignStrand(struct gfConnection *conn, char *nibDir, struct dnaSeq *seq, boolean isRc, int minMatch,
                    struct hash *tFileCache, struct gfOutput *out);
 /* Search genome on server with one strand of other sequence to find homology.
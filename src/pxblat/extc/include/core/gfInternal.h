@@ -25,6 +25,10 @@ struct gfRange
     char tStrand;	/* Just for PCR. */
     };
 
+struct gfRange *gfRangeLoad(char **row);
+/* Load a gfRange from array of strings parsed from
+ * server. Dispose of this with gfRangeFree(). */
+
 void gfRangeFree(struct gfRange **pEl);
 /* Free a single dynamically allocated gfRange such as created
  * with gfRangeLoad(). */
@@ -41,6 +45,11 @@ struct gfRange *gfRangesBundle(struct gfRange *exonList, int maxIntron);
  * group together exons that are close to each other in the
  * same target sequence. */
 
+void gfAlignStrandRanges(struct gfRange *rangeList, char *tSeqDir, struct dnaSeq *seq, boolean isRc, int minMatch,
+			 struct hash *tFileCache, struct gfOutput *out);
+/* Load homologous bits of genome for the ranges a server found for one strand
+ * of seq locally and do detailed alignment.  Frees rangeList. */
+
 struct ssFfItem *gfRangesToFfItem(struct gfRange *rangeList, aaSeq *qSeq);
 /* Convert ranges to ssFfItem's. */
 
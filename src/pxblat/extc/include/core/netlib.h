@@ -25,8 +25,18 @@ int setReadWriteTimeouts(int sd, int seconds);
 
 /* add a failure to connFailures[]
  *  which can save time and avoid more timeouts */
+#define NET_UNIX_PREFIX "unix:"
+
+boolean netIsUnixAddress(char *hostName);
+/* Return TRUE if hostName is a unix:/path.sock address of a Unix domain socket. */
+
+int netConnectUnix(char *path);
+/* Start connection with a server listening on the Unix domain socket at path.
+ * Return < 0 if error. */
+
 int netConnect(char *hostName, int port);
-/* Start connection with a server having resolved port. Return < 0 if error. */
+/* Start connection with a server having resolved port, or with the Unix domain
+ * socket of a unix:/path.sock hostName. Return < 0 if error. */
 
 int netConnectWithTimeout(char *hostName, int port, long msTimeout);
 /* In order to avoid a very long default timeout (several minutes) for hosts that will
@@ -44,6 +54,16 @@ int netAcceptingSocket(int port, int queueSize);
 /* Create an IPV6 socket that can accept connections from
  * both IPV4 and IPV6 clients on the current machine. */
 
+int netAcceptingSharedSocket(int port, int queueSize);
+/* Like netAcceptingSocket, but with SO_REUSEPORT so that the sockets of
+ * several processes listen on the port, the kernel spreads the connections
+ * among them. */
+
+int netAcceptingUnixSocket(char *path, int queueSize);
+/* Create a Unix domain socket at path that can accept connections from
+ * processes on the current machine. A stale socket file left by a server
+ * that is gone is replaced. Return < 0 if error. */
+
 int netAccept(int sd);
 /* Accept incoming connection from socket descriptor. */
 
@@ -9,7 +9,9 @@
 #include <pthread.h>
 #include <signal.h>
 #include <string.h>
+#include <sys/stat.h>
 #include <sys/time.h>
+#include <sys/un.h>
 
 #include "base64.h"
 #include "cheapcgi.h"
@@ -173,6 +175,51 @@ int netConnectWithTimeoutOneAddr(int sd, struct addrinfo *address, long msTimeou
   return 0;  // OK
 }
 
+boolean netIsUnixAddress(char *hostName)
+/* Return TRUE if hostName is a unix:/path.sock address of a Unix domain socket. */
+{
+  return hostName != NULL && startsWith(NET_UNIX_PREFIX, hostName);
+}
+
+static boolean unixSocketAddress(char *path, struct sockaddr_un *address)
+/* Fill in the address of the Unix domain socket at path, return FALSE if the
+ * path is too long for a socket address. */
+{
+  ZeroVar(address);
+  address->sun_family = AF_UNIX;
+  if (strlen(path) >= sizeof(address->sun_path)) {
+    warn("Unix domain socket path too long: %s", path);
+    return FALSE;
+  }
+  safecpy(address->sun_path, sizeof(address->sun_path), path);
+  return TRUE;
+}
+
+int netConnectUnix(char *path)
+/* Start connection with a server listening on the Unix domain socket at path.
+ * Return < 0 if error. */
+{
+  struct sockaddr_un address;
+  if (!unixSocketAddress(path, &address)) return -1;
+
+  int sd = socket(AF_UNIX, SOCK_STREAM, 0);
+  if (sd < 0) {
+    warn("Couldn't make Unix domain socket.");
+    return -1;
+  }
+  // A local connect either succeeds or fails at once, no need for the non-blocking dance.
+  if (connect(sd, (struct sockaddr *)&address, sizeof(address)) < 0) {
+    warn("connect() to %s failed: %s", path, strerror(errno));
+    close(sd);
+    return -1;
+  }
+  if (setReadWriteTimeouts(sd, DEFAULTREADWRITETTIMEOUTSEC) < 0) {
+    close(sd);
+    return -1;
+  }
+  return sd;
+}
+
 int netConnectWithTimeout(char *hostName, int port, long msTimeout)
 /* In order to avoid a very long default timeout (several minutes) for hosts that will
  * not answer the port, we are forced to connect non-blocking.
@@ -188,6 +235,7 @@ int netConnectWithTimeout(char *hostName, int port, long msTimeout)
     warn("NULL hostName in netConnect");
     return -1;
   }
+  if (netIsUnixAddress(hostName)) return netConnectUnix(hostName + strlen(NET_UNIX_PREFIX));
   if (!internetGetAddrInfo6n4(hostName, portStr, &addressList)) return -1;
 
   struct dyString *errMsg = dyStringNew(256);
@@ -242,13 +290,23 @@ int netMustConnect(char *hostName, int port)
 int netMustConnectTo(char *hostName, char *portName)
 /* Start connection with a server and a port that needs to be converted to integer */
 {
-  if (!isdigit(portName[0])) errAbort("netConnectTo: ports must be numerical, not %s", portName);
+  if (!isdigit(portName[0]) && !netIsUnixAddress(hostName))
+    errAbort("netConnectTo: ports must be numerical, not %s", portName);
   return netMustConnect(hostName, atoi(portName));
 }
 
-int netAcceptingSocket4Only(int port, int queueSize)
+static void setReusePort(int sd, boolean reusePort)
+/* Let other sockets listen on the same port if reusePort is set. */
+{
+  int on = 1;
+  if (reusePort && setsockopt(sd, SOL_SOCKET, SO_REUSEPORT, (char *)&on, sizeof(on)) < 0) {
+    errAbort("setsockopt(SO_REUSEPORT) failed");
+  }
+}
+
+static int acceptingSocket4Only(int port, int queueSize, boolean reusePort)
 /* Create an IPV4 socket that can accept connections from
- * only IPV4 clients on the current machine. Useful for systems with ipv6 disabled. */
+ * only IPV4 clients on the current machine, optionally sharing the port. */
 {
   struct sockaddr_in serverAddr;
   int sd;
@@ -265,6 +323,7 @@ int netAcceptingSocket4Only(int port, int queueSize)
   if (setsockopt(sd, SOL_SOCKET, SO_REUSEADDR, (char *)&on, sizeof(on)) < 0) {
     errAbort("setsockopt(SO_REUSEADDR) failed");
   }
+  setReusePort(sd, reusePort);
 
   ZeroVar(&serverAddr);
   serverAddr.sin_family = AF_INET;
@@ -282,9 +341,16 @@ int netAcceptingSocket4Only(int port, int queueSize)
   return sd;
 }
 
-int netAcceptingSocket6n4(int port, int queueSize)
+int netAcceptingSocket4Only(int port, int queueSize)
+/* Create an IPV4 socket that can accept connections from
+ * only IPV4 clients on the current machine. Useful for systems with ipv6 disabled. */
+{
+  return acceptingSocket4Only(port, queueSize, FALSE);
+}
+
+static int acceptingSocket6n4(int port, int queueSize, boolean reusePort)
 /* Create an IPV6 socket that can accept connections from
- * both IPV4 and IPV6 clients on the current machine. */
+ * both IPV4 and IPV6 clients on the current machine, optionally sharing the port. */
 {
   struct sockaddr_in6 serverAddr;
   int sd;
@@ -301,6 +367,7 @@ int netAcceptingSocket6n4(int port, int queueSize)
   if (setsockopt(sd, SOL_SOCKET, SO_REUSEADDR, (char *)&on, sizeof(on)) < 0) {
     errAbort("setsockopt(SO_REUSEADDR) failed");
   }
+  setReusePort(sd, reusePort);
 
   // Explicitly turn off IPV6_V6ONLY which is needed on non-Linux platforms like NetBSD and Darwin.
   // This means we allow ipv4 socket connections that can have ipv4-mapped ipv6 IPs.
@@ -324,8 +391,50 @@ int netAcceptingSocket6n4(int port, int queueSize)
   return sd;
 }
 
-//-1 errAbort("unable to open listening socket");
-int netAcceptingSocket(int port, int queueSize)
+int netAcceptingSocket6n4(int port, int queueSize)
+/* Create an IPV6 socket that can accept connections from
+ * both IPV4 and IPV6 clients on the current machine. */
+{
+  return acceptingSocket6n4(port, queueSize, FALSE);
+}
+
+int netAcceptingUnixSocket(char *path, int queueSize)
+/* Create a Unix domain socket at path that can accept connections from
+ * processes on the current machine. A stale socket file left by a server
+ * that is gone is replaced. Return < 0 if error. */
+{
+  struct sockaddr_un address;
+  if (!unixSocketAddress(path, &address)) return -1;
+
+  struct stat st;
+  if (lstat(path, &st) == 0) {
+    if (!S_ISSOCK(st.st_mode)) {
+      warn("%s exists and is not a socket", path);
+      return -1;
+    }
+    int other = netConnectUnix(path);
+    if (other >= 0) {
+      close(other);
+      warn("A server is already listening on %s", path);
+      return -1;
+    }
+    unlink(path);
+  }
+
+  int sd = socket(AF_UNIX, SOCK_STREAM, 0);
+  if (sd < 0) {
+    warn("Couldn't make Unix domain socket.");
+    return -1;
+  }
+  if (bind(sd, (struct sockaddr *)&address, sizeof(address)) < 0 || listen(sd, queueSize) < 0) {
+    warn("Couldn't listen on %s: %s", path, strerror(errno));
+    close(sd);
+    return -1;
+  }
+  return sd;
+}
+
+static int acceptingSocket(int port, int queueSize, boolean reusePort)
 /* Create an IPV6 socket that can accept connections from
  * both IPV4 and IPV6 clients on the current machine.
  * OR Failover to making IPv4 Only socket if IPv6 is disabled. */
@@ -333,14 +442,14 @@ int netAcceptingSocket(int port, int queueSize)
   int sd = -1;
   struct errCatch *errCatch = errCatchNew();
   if (errCatchStart(errCatch)) {
-    sd = netAcceptingSocket6n4(port, queueSize);
+    sd = acceptingSocket6n4(port, queueSize, reusePort);
   }
   errCatchEnd(errCatch);
   if (errCatch->gotError) {
     // if ipv6 is disabled, fall back to trying ipv4 only listen socket
     warn("%s", errCatch->message->string);
     warn("Retrying listen socket using ipv4 only.");
-    sd = netAcceptingSocket4Only(port, queueSize);
+    sd = acceptingSocket4Only(port, queueSize, reusePort);
   }
   errCatchFree(&errCatch);
   if (sd == -1) return sd;
@@ -348,6 +457,23 @@ int netAcceptingSocket(int port, int queueSize)
   return sd;
 }
 
+//-1 errAbort("unable to open listening socket");
+int netAcceptingSocket(int port, int queueSize)
+/* Create an IPV6 socket that can accept connections from
+ * both IPV4 and IPV6 clients on the current machine.
+ * OR Failover to making IPv4 Only socket if IPv6 is disabled. */
+{
+  return acceptingSocket(port, queueSize, FALSE);
+}
+
+int netAcceptingSharedSocket(int port, int queueSize)
+/* Like netAcceptingSocket, but with SO_REUSEPORT so that the sockets of
+ * several processes listen on the port, the kernel spreads the connections
+ * among them. */
+{
+  return acceptingSocket(port, queueSize, TRUE);
+}
+
 int netAccept(int sd)
 /* Accept incoming connection from socket descriptor. */
 {
@@ -9,7 +9,7 @@
 #include "fuzzyFind.h"
 
 
-int ffIntronMax = ffIntronMaxDefault;
+__thread int ffIntronMax = ffIntronMaxDefault;
 
 void setFfIntronMax(int value)
 {
@@ -71,7 +71,8 @@
 void dumpFf(struct ffAli *left, DNA *needle, DNA *hay);
 
 /* settable parameter, defaults to constant value */
-static jmp_buf ffRecover;
+/* Per thread, so that several threads can align at once. */
+static __thread jmp_buf ffRecover;
 
 static void ffAbort()
 /* Abort fuzzy finding. */
@@ -79,7 +80,7 @@ static void ffAbort()
 longjmp(ffRecover, -1);
 }
 
-static struct lm *ffMemPool = NULL;
+static __thread struct lm *ffMemPool = NULL;
 
 static void ffMemInit()
 /* Initialize fuzzyFinder local memory system. */
@@ -1152,9 +1153,9 @@ return protoList->hits;
 
 /* This set of variables is set before calling the recursive tile finders - the
  * below two routines. */
-static double rwFreq[4];
-static boolean rwIsCdna;
-static boolean rwCheckGoodEnough;
+static __thread double rwFreq[4];
+static __thread boolean rwIsCdna;
+static __thread boolean rwCheckGoodEnough;
 
 static struct ffAli *rwFindTilesBetween(DNA *ns, DNA *ne, DNA *hs, DNA *he,
     enum ffStringency stringency, double probMax)
@@ -2,6 +2,7 @@
 /* Copyright 2001-2005 Jim Kent.  All rights reserved. */
 
 #include "common.h"
+#include <pthread.h>
 #include <signal.h>
 #include <sys/mman.h>
 #include "portable.h"
@@ -13,6 +14,7 @@
 #include "fa.h"
 #include "dystring.h"
 #include "errAbort.h"
+#include "errCatch.h"
 #include "sig.h"
 #include "ooc.h"
 #include "genoFind.h"
@@ -20,7 +22,9 @@
 #include "binRange.h"
 
 static char indexFileMagic[] = "genoFind";
-static char indexFileVerison[] = "1.0";
+static char indexFileVerison[] = "1.1";
+/* Version 1.1 adds list offsets, files of version 1.0 are still loaded. */
+static char indexFileVerisonNoOffsets[] = "1.0";
 
 char *gfSignature()
 /* Return signature that starts each command to gfServer. Helps defend
@@ -76,6 +80,7 @@ struct gfSeqSource *sources;
 if (gf != NULL)
     {
     freeMem(gf->lists);
+    freeMem(gf->endLists);
     if (!gf->isMapped)
         {
         freeMem(gf->listSizes);
@@ -125,10 +130,11 @@ struct genoFindFileHdr
     off_t listSizesOff;   // offset of listSizes
     off_t listsOff;       // offset of lists or endLists
     off_t endListsOff;
+    off_t listOffsetsOff; // offset of listOffsets, zero in version 1.0 files
 
     // Reserved area. These are bytes of zero, so that need fields can be added
     // that default to zero without needed check the version in code.
-    bits64 reserved[32];  // vesion 1.0: 32 words
+    bits64 reserved[31];  // vesion 1.0: 32 words, version 1.1: 31 words
 };
 
 static void genoFindInitHdr(struct genoFind *gf,
@@ -232,6 +238,31 @@ static void genoFindMapListSize(void *memMapped, off_t off, struct genoFind *gf)
 gf->listSizes = memMapped + off;
 }
 
+static off_t genoFindWriteListOffsets(struct genoFind *gf, FILE *f)
+/* write where the list or endList of each tile starts in the lists, counted
+ * in entries, so that loading the index doesn't need to build pointers */
+{
+off_t off = mustSeekAligned(f);
+bits32 *listOffsets = needHugeMem(gf->tileSpaceSize * sizeof(listOffsets[0]));
+bits32 count = 0;
+int i;
+for (i = 0; i < gf->tileSpaceSize; i++)
+    {
+    listOffsets[i] = count;
+    if (gf->segSize != 0 || gf->listSizes[i] < gf->maxPat)
+        count += gf->listSizes[i];
+    }
+mustWrite(f, listOffsets, gf->tileSpaceSize * sizeof(listOffsets[0]));
+freeMem(listOffsets);
+return off;
+}
+
+static void genoFindMapListOffsets(void *memMapped, off_t off, struct genoFind *gf)
+/* map the list offsets into memory */
+{
+gf->listOffsets = memMapped + off;
+}
+
 static off_t genoFindWriteLists(struct genoFind *gf, FILE *f)
 /* write the lists */
 {
@@ -302,12 +333,12 @@ genoFindInitHdr(gf, &hdr);
 mustWrite(f, &hdr, sizeof(hdr));
 
 // now write out the variable-size arrays. The ones we need to keep are
-// sources, listSizes and allocated--endLists/lists are generated at load
-// time, and in fact *must* be as they are pointer-to-pointers which cannot be
-// mmapped properly.
+// sources, listSizes, listOffsets and allocated--endLists/lists are pointer-to-pointers
+// which cannot be mmapped properly, the lists are found with listOffsets instead.
 
 hdr.sourcesOff = genoFindWriteSources(gf, f);
 hdr.listSizesOff = genoFindWriteListSizes(gf, f);
+hdr.listOffsetsOff = genoFindWriteListOffsets(gf, f);
 
 if (gf->segSize == 0)
     hdr.listsOff= genoFindWriteLists(gf, f);
@@ -334,7 +365,13 @@ genoFindReadHdr(hdr, gf);
 genoFindReadSources(f, hdr->sourcesOff, gf);
 genoFindMapListSize(memMapped, hdr->listSizesOff, gf);
 
-if (gf->segSize == 0)
+if (hdr->listOffsetsOff != 0)
+    {
+    /* Lists are found through the offsets on demand. */
+    genoFindMapListOffsets(memMapped, hdr->listOffsetsOff, gf);
+    gf->allocated = memMapped + (gf->segSize == 0 ? hdr->listsOff : hdr->endListsOff);
+    }
+else if (gf->segSize == 0)
     genoFindMapLists(memMapped, hdr->listsOff, gf);
 else
     genoFindMapEndLists(memMapped, hdr->endListsOff, gf);
@@ -354,19 +391,19 @@ struct genoFindIndex* genoFindIndexBuild(int fileCount, char *seqFiles[],
                                          int minMatch, int maxGap, int tileSize,
                                          int repMatch, boolean doTrans, char *oocFile,
                                          boolean allowOneMismatch, boolean doMask,
-                                         int stepSize, boolean noSimpRepMask)
-/* build a untranslated or translated index */
+                                         int stepSize, boolean noSimpRepMask, int threads)
+/* build a untranslated or translated index using threads */
 {
 struct genoFindIndex* gfIdx = genoFindIndexNew(doTrans);
 gfIdx->isTrans = doTrans;
 if (doTrans)
     gfIndexTransNibsAndTwoBits(gfIdx->transGf, fileCount, seqFiles,
                                minMatch, maxGap, tileSize, repMatch, oocFile, allowOneMismatch,
-                               doMask, stepSize, noSimpRepMask);
+                               doMask, stepSize, noSimpRepMask, threads);
 else
     gfIdx->untransGf = gfIndexNibsAndTwoBits(fileCount, seqFiles, minMatch,
                                              maxGap, tileSize, repMatch, oocFile, allowOneMismatch,
-                                             stepSize, noSimpRepMask);
+                                             stepSize, noSimpRepMask, threads);
 return gfIdx;
 }
 
@@ -404,7 +441,7 @@ static void genoFindIndexReadHeader(void* memMapped, struct genoFindIndexFileHdr
 *hdr = *((struct genoFindIndexFileHdr*)memMapped);
 if (!sameString(hdr->magic, indexFileMagic))
     errAbort("wrong magic string for index file");
-if (!sameString(hdr->version, indexFileVerison))
+if (!sameString(hdr->version, indexFileVerison) && !sameString(hdr->version, indexFileVerisonNoOffsets))
     errAbort("unsupported version for index file: %s", hdr->version);
 if (hdr->indexAddressSize != 32)
     errAbort("not a 32-bit index: %d", hdr->indexAddressSize);
@@ -935,9 +972,278 @@ for (i=0; i<tileSpaceSize; ++i)
     }
 }
 
+struct gfIndexPiece
+/* Part of a sequence indexed by one thread. */
+    {
+    char *fileName;	/* .2bit or .nib file. */
+    char *seqName;	/* Sequence in .2bit file, NULL for a .nib file indexed whole. */
+    int seqSize;	/* Size of whole sequence. */
+    int start, end;	/* Tiles starting in this range of the sequence are indexed. */
+    bits32 offset;	/* Offset of sequence start in index. */
+    int thread;		/* Thread indexing the piece. */
+    };
+
+struct gfIndexJob
+/* The pieces one thread of a parallel index build counts or adds. */
+    {
+    char *error;		/* Message if job aborted, NULL otherwise. Must be first. */
+    struct genoFind gf;		/* Copy of index sharing lists, with own listSizes. */
+    struct gfIndexPiece *pieces;	/* Pieces of all threads in index order. */
+    int pieceCount;		/* Number of pieces. */
+    int thread;			/* Index of thread. */
+    boolean adding;		/* Add tiles to lists rather than count them. */
+    };
+
+static struct gfIndexPiece *gfIndexPieceAdd(struct gfIndexPiece **pPieces, int *pCount, int *pAlloc)
+/* Return a new zeroed piece at the end of a dynamic array. */
+{
+if (*pCount == *pAlloc)
+    {
+    int newAlloc = max(2 * *pAlloc, 64);
+    ExpandArray(*pPieces, *pAlloc, newAlloc);
+    *pAlloc = newAlloc;
+    }
+return &(*pPieces)[(*pCount)++];
+}
+
+static void *gfIndexJobRun(void *v)
+/* Count or add the tiles of the pieces of one thread. */
+{
+struct gfIndexJob *job = v;
+struct genoFind *gf = &job->gf;
+struct errCatch *errCatch = errCatchNew();
+if (errCatchStart(errCatch))
+    {
+    struct twoBitFile *tbf = NULL;
+    int i;
+    for (i=0; i<job->pieceCount; ++i)
+        {
+	struct gfIndexPiece *piece = &job->pieces[i];
+	if (piece->thread != job->thread)
+	    continue;
+	if (piece->seqName == NULL)
+	    {
+	    if (job->adding)
+		gfAddTilesInNib(gf, piece->fileName, piece->offset, gf->stepSize);
+	    else
+		gfCountTilesInNib(gf, gf->stepSize, piece->fileName);
+	    continue;
+	    }
+	if (tbf == NULL || !sameString(tbf->fileName, piece->fileName))
+	    {
+	    if (tbf != NULL)
+		twoBitClose(&tbf);
+	    tbf = twoBitOpen(piece->fileName);
+	    }
+	/* The last tiles of the piece reach into the next one. */
+	int fragEnd = min(piece->seqSize, piece->end - 1 + gf->tileSize);
+	struct dnaSeq *seq = twoBitReadSeqFragLower(tbf, piece->seqName, piece->start, fragEnd);
+	if (job->adding)
+	    gfAddSeq(gf, seq, piece->offset + piece->start);
+	else
+	    gfCountSeq(gf, seq);
+	dnaSeqFree(&seq);
+	}
+    if (tbf != NULL)
+	twoBitClose(&tbf);
+    }
+errCatchEnd(errCatch);
+if (errCatch->gotError)
+    job->error = cloneString(errCatch->message->string);
+errCatchFree(&errCatch);
+return NULL;
+}
+
+static void gfIndexRunJobs(void *jobs, size_t jobSize, int threads, void *(*run)(void *job),
+	void (*release)(void *job))
+/* Run each of an array of jobs on its own thread and wait for all of them.
+ * The jobs start with an error message, aborts with the first one set.
+ * If not all threads start, release (if non-NULL) is called on the first
+ * job so that started jobs waiting for the others can finish. */
+{
+pthread_t *tids;
+char *job = jobs;
+int started, i, err = 0;
+AllocArray(tids, threads);
+for (started=0; started<threads; ++started)
+    {
+    if ((err = pthread_create(&tids[started], NULL, run, job + started * jobSize)) != 0)
+	break;
+    }
+if (err != 0 && started > 0 && release != NULL)
+    release(job);
+for (i=0; i<started; ++i)
+    pthread_join(tids[i], NULL);
+freeMem(tids);
+if (err != 0)
+    errAbort("Couldn't start index thread: %s", strerror(err));
+for (i=0; i<threads; ++i)
+    {
+    char *error = *(char **)(job + i * jobSize);
+    if (error != NULL)
+	errAbort("%s", error);
+    }
+}
+
+static void gfIndexParallel(struct genoFind *gf, int fileCount, char *fileNames[],
+	int threads)
+/* Fill in the index and sources of gf for all nibs and .2bits in list
+ * using threads.  Each thread counts the tiles of a contiguous part of the
+ * genome in its own array.  Prefix sums of these counts give each thread
+ * the slice of every list it fills, so the lists come out in genome order
+ * just as when filled by one thread. */
+{
+struct gfIndexPiece *seqs = NULL, *pieces = NULL;
+int seqCount = 0, seqAlloc = 0, pieceCount = 0, pieceAlloc = 0;
+struct gfIndexJob *jobs;
+int tileSpaceSize = gf->tileSpaceSize, tileSize = gf->tileSize, stepSize = gf->stepSize;
+bits32 maxPat = gf->maxPat;
+long long totalBases = 0, warnAt = maxTotalBases();
+bits32 offset = 0;
+int i, k, t;
+
+/* Find sizes of all sequences without reading them. */
+for (i=0; i<fileCount; ++i)
+    {
+    char *fileName = fileNames[i];
+    if (twoBitIsFile(fileName))
+	{
+	struct twoBitFile *tbf = twoBitOpen(fileName);
+	struct twoBitIndex *index;
+	totalBases += twoBitCheckTotalSize(tbf);
+	for (index = tbf->indexList; index != NULL; index = index->next)
+	    {
+	    struct gfIndexPiece *seq = gfIndexPieceAdd(&seqs, &seqCount, &seqAlloc);
+	    seq->fileName = fileName;
+	    seq->seqName = cloneString(index->name);
+	    seq->seqSize = twoBitSeqSize(tbf, index->name);
+	    }
+	twoBitClose(&tbf);
+	}
+    else if (nibIsFile(fileName))
+	{
+	FILE *f;
+	int nibSize;
+	nibOpenVerify(fileName, &f, &nibSize);
+	fclose(f);
+	struct gfIndexPiece *seq = gfIndexPieceAdd(&seqs, &seqCount, &seqAlloc);
+	seq->fileName = fileName;
+	seq->seqSize = nibSize;
+	totalBases += nibSize;
+	}
+    else
+        errAbort("Unrecognized file type %s", fileName);
+    /* Warn if they exceed 4 gig. */
+    if (totalBases >= warnAt)
+	errAbort("Exceeding 4 billion bases, sorry gfServer can't handle that.");
+    }
+
+/* Each thread has a tile count array, don't use more threads than would
+ * spend longer on their arrays than on the genome. */
+threads = max(1, min(threads, totalBases / tileSpaceSize));
+
+/* Set up sources and cut the genome into one part per thread. */
+AllocArray(gf->sources, seqCount);
+gf->sourceCount = seqCount;
+for (i=0; i<seqCount; ++i)
+    {
+    struct gfIndexPiece *seq = &seqs[i];
+    struct gfSeqSource *ss = &gf->sources[i];
+    char nameBuf[PATH_LEN+256];
+    if (seq->seqName == NULL)
+	safef(nameBuf, sizeof(nameBuf), "%s", seq->fileName);
+    else
+	safef(nameBuf, sizeof(nameBuf), "%s:%s", seq->fileName, seq->seqName);
+    ss->fileName = cloneString(findTail(nameBuf, '/'));
+    ss->start = offset;
+    ss->end = offset + seq->seqSize;
+    seq->offset = offset;
+    offset = ss->end;
+    for (k = seq->offset * (long long)threads / max(totalBases, 1); k < threads; ++k)
+	{
+	/* Bases of the genome from boundStart to boundEnd go to thread k. */
+	long long boundStart = totalBases * k / threads;
+	long long boundEnd = totalBases * (k+1) / threads;
+	if (boundStart >= offset)
+	    break;
+	int start = max(0, boundStart - seq->offset);
+	int end = min(seq->seqSize, boundEnd - seq->offset);
+	if (seq->seqName == NULL)
+	    {
+	    /* A nib file is indexed in chunks by the thread its start falls to. */
+	    if (start != 0 || end <= 0)
+	        continue;
+	    end = seq->seqSize;
+	    }
+	else
+	    {
+	    start = (start + stepSize - 1) / stepSize * stepSize;
+	    if (start >= end || start > seq->seqSize - tileSize)
+		continue;
+	    }
+	struct gfIndexPiece *piece = gfIndexPieceAdd(&pieces, &pieceCount, &pieceAlloc);
+	*piece = *seq;
+	piece->start = start;
+	piece->end = end;
+	piece->thread = k;
+	}
+    }
+gf->totalSeqSize = offset;
+
+/* Count the tiles of each part. */
+AllocArray(jobs, threads);
+for (k=0; k<threads; ++k)
+    {
+    jobs[k].gf = *gf;
+    jobs[k].gf.listSizes = needHugeZeroedMem(tileSpaceSize * sizeof(gf->listSizes[0]));
+    jobs[k].pieces = pieces;
+    jobs[k].pieceCount = pieceCount;
+    jobs[k].thread = k;
+    }
+initNtLookup();
+gfIndexRunJobs(jobs, sizeof(jobs[0]), threads, gfIndexJobRun, NULL);
+for (t=0; t<tileSpaceSize; ++t)
+    {
+    long long count = gf->listSizes[t];
+    if (count >= maxPat)
+	continue;
+    for (k=0; k<threads; ++k)
+	count += jobs[k].gf.listSizes[t];
+    gf->listSizes[t] = min(count, maxPat);
+    }
+
+/* Each thread starts its slice of a list after those of the threads before,
+ * overused tiles start at maxPat so that they are skipped. */
+gfAllocLists(gf);
+for (t=0; t<tileSpaceSize; ++t)
+    {
+    bits32 start = 0;
+    for (k=0; k<threads; ++k)
+	{
+	bits32 *listSizes = jobs[k].gf.listSizes;
+	bits32 count = listSizes[t];
+	listSizes[t] = (gf->listSizes[t] < maxPat ? start : maxPat);
+	start += count;
+	}
+    }
+for (k=0; k<threads; ++k)
+    jobs[k].adding = TRUE;
+gfIndexRunJobs(jobs, sizeof(jobs[0]), threads, gfIndexJobRun, NULL);
+for (t=0; t<tileSpaceSize; ++t)
+    gf->listSizes[t] = (gf->listSizes[t] < maxPat ? jobs[threads-1].gf.listSizes[t] : 0);
+
+for (k=0; k<threads; ++k)
+    freeMem(jobs[k].gf.listSizes);
+freeMem(jobs);
+freeMem(pieces);
+for (i=0; i<seqCount; ++i)
+    freeMem(seqs[i].seqName);
+freeMem(seqs);
+}
+
 struct genoFind *gfIndexNibsAndTwoBits(int fileCount, char *fileNames[],
 	int minMatch, int maxGap, int tileSize, int maxPat, char *oocFile,
-	boolean allowOneMismatch, int stepSize, boolean noSimpRepMask)
+	boolean allowOneMismatch, int stepSize, boolean noSimpRepMask, int threads)
 /* Make index for all nibs and .2bits in list.
  *      minMatch - minimum number of matching tiles to trigger alignments
  *      maxGap   - maximum deviation from diagonal of tiles
@@ -946,7 +1252,9 @@ struct genoFind *gfIndexNibsAndTwoBits(int fileCount, char *fileNames[],
  *      oocFile  - .ooc format file that lists repeat tiles.  May be NULL.
  *      allowOneMismatch - allow one mismatch in a tile.
  *      stepSize - space between tiles.  Zero means default (which is tileSize).
- *      noSimpRepMask - skip simple repeat masking. */
+ *      noSimpRepMask - skip simple repeat masking.
+ *      threads  - number of threads building the index, which is the same
+ *                 for any number. */
 {
 struct genoFind *gf = gfNewEmpty(minMatch, maxGap, tileSize, stepSize,
 	maxPat, oocFile, FALSE, allowOneMismatch, noSimpRepMask);
@@ -961,6 +1269,11 @@ if (allowOneMismatch)
     errAbort("Don't currently support allowOneMismatch in gfIndexNibsAndTwoBits");
 if (stepSize == 0)
     stepSize = gf->tileSize;
+if (threads > 1)
+    {
+    gfIndexParallel(gf, fileCount, fileNames, threads);
+    return gf;
+    }
 for (i=0; i<fileCount; ++i)
     {
     fileName = fileNames[i];
@@ -1145,11 +1458,293 @@ for (isRc=0; isRc <= 1; ++isRc)
     }
 }
 
+struct gfTransIndexShared
+/* The sequence all threads of a parallel translated index build work on.
+ * The first thread reads each sequence once per pass, then all threads
+ * translate their reading frames of it between two barriers. */
+    {
+    pthread_mutex_t mutex;	/* Guards the barrier. */
+    pthread_cond_t cond;	/* Signalled when all threads reach the barrier or one aborts. */
+    int threads;		/* Number of threads. */
+    int waiting;		/* Threads waiting at the barrier. */
+    int round;			/* Incremented each time all threads reach the barrier. */
+    boolean aborted;		/* Set by the first thread that fails. */
+    struct dnaSeq *seq[2];	/* Sequence and its reverse complement, NULL at end of pass. */
+    char *name;			/* Source name of sequence. */
+    int sourceIx;		/* Index of sequence in sources. */
+    };
+
+struct gfTransIndexJob
+/* The reading frames one thread of a parallel translated index build indexes. */
+    {
+    char *error;		/* Message if job aborted, NULL otherwise. Must be first. */
+    struct genoFind *(*transGf)[3];	/* Indices of all reading frames. */
+    bits32 offset[2][3];	/* Size of frames indexed so far. */
+    int fileCount;		/* Number of files. */
+    char **fileNames;		/* .nib and .2bit files. */
+    boolean doMask;		/* Turn masked bases to N's. */
+    int sourceCount;		/* Number of sequences in files. */
+    int thread;			/* Index of thread. */
+    int threads;		/* Number of threads. */
+    struct gfTransIndexShared *shared;	/* Sequence shared by all threads. */
+    };
+
+static boolean transJobHasFrame(struct gfTransIndexJob *job, int isRc, int frame)
+/* Return TRUE if reading frame is indexed by thread of job. */
+{
+return (isRc*3 + frame) % job->threads == job->thread;
+}
+
+static void transJobWait(struct gfTransIndexJob *job)
+/* Wait until all threads reach this point.  Aborts if another thread failed. */
+{
+struct gfTransIndexShared *shared = job->shared;
+boolean aborted;
+pthread_mutex_lock(&shared->mutex);
+int round = shared->round;
+if (++shared->waiting == shared->threads)
+    {
+    shared->waiting = 0;
+    ++shared->round;
+    pthread_cond_broadcast(&shared->cond);
+    }
+else
+    {
+    while (round == shared->round && !shared->aborted)
+	pthread_cond_wait(&shared->cond, &shared->mutex);
+    }
+aborted = shared->aborted;
+pthread_mutex_unlock(&shared->mutex);
+if (aborted)
+    errAbort("Index thread aborted by another thread");
+}
+
+static void transJobSeq(struct gfTransIndexJob *job, boolean adding)
+/* Count or add tiles of the shared sequence in the reading frames of job. */
+{
+struct gfTransIndexShared *shared = job->shared;
+int isRc, frame;
+int lastPos = shared->seq[0]->size - 1;
+for (isRc=0; isRc <= 1; ++isRc)
+    {
+    for (frame = 0; frame < 3; ++frame)
+	{
+	struct genoFind *gf = job->transGf[isRc][frame];
+	if (!transJobHasFrame(job, isRc, frame))
+	    continue;
+	/* Translate the same way as trans3New. */
+	aaSeq *pep = translateSeq(shared->seq[isRc], min(frame, lastPos), FALSE);
+	if (adding)
+	    {
+	    struct gfSeqSource *ss = gf->sources + shared->sourceIx;
+	    gfAddSeq(gf, pep, job->offset[isRc][frame]);
+	    ss->fileName = cloneString(shared->name);
+	    ss->start = job->offset[isRc][frame];
+	    job->offset[isRc][frame] += pep->size;
+	    ss->end = job->offset[isRc][frame];
+	    }
+	else
+	    gfCountSeq(gf, pep);
+	freeDnaSeq(&pep);
+	}
+    }
+}
+
+static void transJobShare(struct gfTransIndexJob *job, struct dnaSeq *seq,
+    boolean adding, int sourceIx, char *name)
+/* Hand sequence to all threads and index it in the reading frames of job.
+ * Frees seq. */
+{
+struct gfTransIndexShared *shared = job->shared;
+shared->seq[0] = seq;
+shared->seq[1] = cloneDnaSeq(seq);
+reverseComplement(shared->seq[1]->dna, shared->seq[1]->size);
+shared->sourceIx = sourceIx;
+shared->name = name;
+transJobWait(job);
+transJobSeq(job, adding);
+transJobWait(job);
+freeDnaSeq(&shared->seq[0]);
+freeDnaSeq(&shared->seq[1]);
+}
+
+static void transJobScan(struct gfTransIndexJob *job, boolean adding)
+/* Count or add tiles of all sequences in the reading frames of job.  The
+ * first thread reads the sequences, the others index what it shares. */
+{
+struct gfTransIndexShared *shared = job->shared;
+int i, sourceIx = 0;
+if (job->thread != 0)
+    {
+    for (;;)
+	{
+	transJobWait(job);
+	if (shared->seq[0] == NULL)
+	    break;
+	transJobSeq(job, adding);
+	transJobWait(job);
+	}
+    /* Leave the pass before the first thread shares the next sequence. */
+    transJobWait(job);
+    return;
+    }
+for (i=0; i<job->fileCount; ++i)
+    {
+    char *fileName = job->fileNames[i];
+    if (nibIsFile(fileName))
+	transJobShare(job, readMaskedNib(fileName, job->doMask), adding, sourceIx++, fileName);
+    else
+        {
+	struct twoBitFile *tbf = twoBitOpen(fileName);
+	struct twoBitIndex *index;
+	for (index = tbf->indexList; index != NULL; index = index->next)
+	    {
+	    char nameBuf[PATH_LEN+256];
+	    safef(nameBuf, sizeof(nameBuf), "%s:%s", fileName, index->name);
+	    transJobShare(job, readMaskedTwoBit(tbf, index->name, job->doMask),
+		adding, sourceIx++, nameBuf);
+	    }
+	twoBitClose(&tbf);
+	}
+    }
+/* Release the others from the pass and wait until they left it. */
+transJobWait(job);
+transJobWait(job);
+}
+
+static void transJobAbort(struct gfTransIndexJob *job, char *error)
+/* Mark the build as failed and release threads waiting at the barrier.
+ * Only the first failure is recorded, in job if error is non-NULL. */
+{
+struct gfTransIndexShared *shared = job->shared;
+pthread_mutex_lock(&shared->mutex);
+if (!shared->aborted)
+    {
+    shared->aborted = TRUE;
+    if (error != NULL)
+	job->error = cloneString(error);
+    pthread_cond_broadcast(&shared->cond);
+    }
+pthread_mutex_unlock(&shared->mutex);
+}
+
+static void transJobRelease(void *v)
+/* Release threads waiting for threads that failed to start. */
+{
+transJobAbort(v, NULL);
+}
+
+static void *transJobRun(void *v)
+/* Build the index of the reading frames of one thread. */
+{
+struct gfTransIndexJob *job = v;
+struct errCatch *errCatch = errCatchNew();
+if (errCatchStart(errCatch))
+    {
+    int isRc, frame;
+    transJobScan(job, FALSE);
+    for (isRc=0; isRc <= 1; ++isRc)
+	{
+	for (frame = 0; frame < 3; ++frame)
+	    {
+	    struct genoFind *gf = job->transGf[isRc][frame];
+	    if (!transJobHasFrame(job, isRc, frame))
+		continue;
+	    gfAllocLists(gf);
+	    gfZeroNonOverused(gf);
+	    AllocArray(gf->sources, job->sourceCount);
+	    gf->sourceCount = job->sourceCount;
+	    }
+	}
+    transJobScan(job, TRUE);
+    for (isRc=0; isRc <= 1; ++isRc)
+	{
+	for (frame = 0; frame < 3; ++frame)
+	    {
+	    struct genoFind *gf = job->transGf[isRc][frame];
+	    if (!transJobHasFrame(job, isRc, frame))
+		continue;
+	    gf->totalSeqSize = job->offset[isRc][frame];
+	    gfZeroOverused(gf);
+	    }
+	}
+    }
+errCatchEnd(errCatch);
+if (errCatch->gotError)
+    transJobAbort(job, errCatch->message->string);
+errCatchFree(&errCatch);
+return NULL;
+}
+
+static void gfIndexTransParallel(struct genoFind *transGf[2][3],
+    int fileCount, char *fileNames[], boolean doMask, int threads)
+/* Fill in the indices of all reading frames using up to six threads, each
+ * indexing its reading frames just as they are indexed by one thread. */
+{
+struct gfTransIndexShared shared;
+struct gfTransIndexJob *jobs;
+long long totalBases = 0, warnAt = maxTotalBases();
+int i, k, sourceCount = 0;
+
+/* Check files and count sequences without reading them. */
+for (i=0; i<fileCount; ++i)
+    {
+    char *fileName = fileNames[i];
+    printf("Indexing %s\n", fileName);
+    if (nibIsFile(fileName))
+	{
+	FILE *f;
+	int nibSize;
+	nibOpenVerify(fileName, &f, &nibSize);
+	fclose(f);
+	sourceCount += 1;
+	totalBases += nibSize;
+	}
+    else if (twoBitIsFile(fileName))
+        {
+	struct twoBitFile *tbf = twoBitOpen(fileName);
+	totalBases += twoBitCheckTotalSize(tbf);
+	sourceCount += slCount(tbf->indexList);
+	twoBitClose(&tbf);
+	}
+    else
+	errAbort("Unrecognized file type %s", fileName);
+    if (totalBases >= warnAt)
+	errAbort("Exceeding 4 billion bases, sorry gfServer can't handle that.");
+    }
+
+threads = min(threads, 6);
+AllocArray(jobs, threads);
+ZeroVar(&shared);
+pthread_mutex_init(&shared.mutex, NULL);
+pthread_cond_init(&shared.cond, NULL);
+shared.threads = threads;
+for (k=0; k<threads; ++k)
+    {
+    jobs[k].shared = &shared;
+    jobs[k].transGf = transGf;
+    jobs[k].fileCount = fileCount;
+    jobs[k].fileNames = fileNames;
+    jobs[k].doMask = doMask;
+    jobs[k].sourceCount = sourceCount;
+    jobs[k].thread = k;
+    jobs[k].threads = threads;
+    }
+/* Fill in lookup tables before threads read them. */
+dnaUtilOpen();
+gfIndexRunJobs(jobs, sizeof(jobs[0]), threads, transJobRun, transJobRelease);
+pthread_cond_destroy(&shared.cond);
+pthread_mutex_destroy(&shared.mutex);
+freeMem(jobs);
+}
+
 void gfIndexTransNibsAndTwoBits(struct genoFind *transGf[2][3],
     int fileCount, char *fileNames[],
     int minMatch, int maxGap, int tileSize, int maxPat, char *oocFile,
-    boolean allowOneMismatch, boolean doMask, int stepSize, boolean noSimpRepMask)
-/* Make translated (6 frame) index for all .nib and .2bit files. */
+    boolean allowOneMismatch, boolean doMask, int stepSize, boolean noSimpRepMask,
+    int threads)
+/* Make translated (6 frame) index for all .nib and .2bit files, each
+ * frame on its own thread if threads is more than one. */
 {
 struct genoFind *gf;
 int i,isRc, frame;
@@ -1176,6 +1771,12 @@ for (isRc = 0; isRc <= 1; ++isRc)
     for (frame = 0; frame < 3; ++frame)
 	maskSimplePepRepeat(transGf[isRc][frame]);
 
+if (threads > 1)
+    {
+    gfIndexTransParallel(transGf, fileCount, fileNames, doMask, threads);
+    return;
+    }
+
 /* Scan through .nib and .2bit files once counting tiles. */
 for (i=0; i<fileCount; ++i)
     {
@@ -1441,8 +2042,9 @@ for (hit = clump->hitList; hit != NULL; hit = hit->next)
 static void gfHitSort2(struct gfHit **ptArray, int n);
 
 /* Some variables used by recursive function gfHitSort2
- * across all incarnations. */
-static struct gfHit **nosTemp, *nosSwap;
+ * across all incarnations.  Per thread, server threads
+ * find clumps at once. */
+static __thread struct gfHit **nosTemp, *nosSwap;
 
 static void gfHitSort2(struct gfHit **ptArray, int n)
 /* This is a fast recursive sort that uses a temporary
@@ -1906,7 +2508,7 @@ for (i=tileSizeMinusOne; i<size; ++i)
 	qStart = i-tileSizeMinusOne;
 	if (qMaskBits == NULL || bitCountRange(qMaskBits, qStart+qMaskOffset, gf->tileSize) == 0)
 	    {
-	    tList = gf->lists[bits];
+	    tList = gfTileList(gf, bits);
 	    for (j=0; j<listSize; ++j)
 		{
 		int tStart = tList[j];
@@ -1958,7 +2560,7 @@ for (i=0; i<=lastStart; ++i)
 	qStart = i;
 	if (qMaskBits == NULL || bitCountRange(qMaskBits, qStart+qMaskOffset, tileSize) == 0)
 	    {
-	    tList = gf->lists[tile];
+	    tList = gfTileList(gf, tile);
 	    for (j=0; j<listSize; ++j)
 		{
 		int tStart = tList[j];
@@ -2049,7 +2651,7 @@ for (i=0; i<=lastStart; ++i)
 			qStart = i;
 			if (qMaskBits == NULL || bitCountRange(qMaskBits, qStart+qMaskOffset, tileSize) == 0)
 			    {
-			    tList = gf->lists[tile];
+			    tList = gfTileList(gf, tile);
 			    for (j=0; j<listSize; ++j)
 				{
 				int tStart = tList[j];
@@ -2113,7 +2715,7 @@ for (i=0; i<=lastStart; ++i)
 	    continue;
 	listSize = gf->listSizes[tileHead];
 	qStart = i;
-	endList = gf->endLists[tileHead];
+	endList = gfTileEndList(gf, tileHead);
 	for (j=0; j<listSize; ++j)
 	    {
 	    if (endList[0] == tileTail)
@@ -2212,7 +2814,7 @@ for (i=0; i<=lastStart; ++i)
 			{
 			listSize = gf->listSizes[tileHead];
 			qStart = i;
-			endList = gf->endLists[tileHead];
+			endList = gfTileEndList(gf, tileHead);
 			for (j=0; j<listSize; ++j)
 			    {
 			    if (endList[0] == tileTail)
@@ -2552,7 +3154,7 @@ for (fTileIx=0; fTileIx<fTileCount; ++fTileIx)
     if (fTile >= 0)
         {
 	fPosListSize = gf->listSizes[fTile];
-	fPosList = gf->lists[fTile];
+	fPosList = gfTileList(gf, fTile);
 	for (fPosIx=0; fPosIx < fPosListSize; ++fPosIx)
 	    {
 	    fPos = fPosList[fPosIx];
@@ -2561,7 +3163,7 @@ for (fTileIx=0; fTileIx<fTileCount; ++fTileIx)
 	        {
 		rTile = rTiles[rTileIx];
 		rPosListSize = gf->listSizes[rTile];
-		rPosList = gf->lists[rTile];
+		rPosList = gfTileList(gf, rTile);
 		for (rPosIx=0; rPosIx < rPosListSize; ++rPosIx)
 		    {
 		    rPos = rPosList[rPosIx];
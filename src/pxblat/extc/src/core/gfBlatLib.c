@@ -71,9 +71,9 @@ void gfBeginRequest(struct gfConnection *conn)
 void gfEndRequest(struct gfConnection *conn)
 /* End a request that might be followed by another requests. For
  * a static server, this closed the connection.  A dynamic server
- * it is left open. */
+ * or a keep-alive connection it is left open. */
 {
-  if (!conn->isDynamic) {
+  if (!conn->isDynamic && !conn->keepAlive) {
     close(conn->fd);
     conn->fd = -1;
   }
@@ -134,7 +134,7 @@ void gfRangeFreeList(struct gfRange **pList)
   *pList = NULL;
 }
 
-static struct gfRange *gfRangeLoad(char **row)
+struct gfRange *gfRangeLoad(char **row)
 /* Load a gfRange from array of strings parsed from
  * server. Dispose of this with gfRangeFree(). */
 {
@@ -207,6 +207,17 @@ static void gfServerWarn(bioSeq *seq, char *warning)
   warn("couldn't process %s: %s", seq->name, warning);
 }
 
+static void gfServerError(struct gfConnection *conn, bioSeq *seq, char *buf)
+/* Write out error from server.  The server follows it with "end", read that
+ * from a keep-alive connection so the next request gets its own reply. */
+{
+  gfServerWarn(seq, buf);
+  if (conn->keepAlive) {
+    while (!sameString(netRecieveString(conn->fd, buf), "end"))
+      ;
+  }
+}
+
 static struct gfRange *gfQuerySeq(struct gfConnection *conn, struct dnaSeq *seq)
 /* Ask server for places sequence hits. */
 {
@@ -225,7 +236,7 @@ static struct gfRange *gfQuerySeq(struct gfConnection *conn, struct dnaSeq *seq)
     if (sameString(buf, "end")) {
       break;
     } else if (startsWith("Error:", buf)) {
-      gfServerWarn(seq, buf);
+      gfServerError(conn, seq, buf);
       break;
     } else {
       i++;
@@ -311,7 +322,7 @@ static void gfQuerySeqTrans(struct gfConnection *conn, aaSeq *seq, struct gfClum
       if (sameString(buf, "end")) {
         break;
       } else if (startsWith("Error:", buf)) {
-        gfServerWarn(seq, buf);
+        gfServerError(conn, seq, buf);
         break;
       }
       rowSize = chopLine(buf, row);
@@ -337,7 +348,7 @@ static void gfQuerySeqTrans(struct gfConnection *conn, aaSeq *seq, struct gfClum
     for (isRc = 0; isRc <= 1; ++isRc)
       for (frame = 0; frame < 3; ++frame) slReverse(&clumps[isRc][frame]);
   } else {
-    gfServerWarn(seq, line);
+    gfServerError(conn, seq, buf);
   }
   gfEndRequest(conn);
   *retSsList = ssList;
@@ -374,7 +385,7 @@ static void gfQuerySeqTransTrans(struct gfConnection *conn, struct dnaSeq *seq,
       if (sameString(buf, "end")) {
         break;
       } else if (startsWith("Error:", buf)) {
-        gfServerWarn(seq, buf);
+        gfServerError(conn, seq, buf);
         break;
       }
       rowSize = chopLine(buf, row);
@@ -402,7 +413,7 @@ static void gfQuerySeqTransTrans(struct gfConnection *conn, struct dnaSeq *seq,
       for (qFrame = 0; qFrame < 3; ++qFrame)
         for (tFrame = 0; tFrame < 3; ++tFrame) slReverse(&clumps[isRc][qFrame][tFrame]);
   } else {
-    gfServerWarn(seq, buf);
+    gfServerError(conn, seq, buf);
   }
   gfEndRequest(conn);
   *retSsList = ssList;
@@ -551,23 +562,38 @@ static void saveAlignments(char *chromName, int chromSize, int chromOffset, stru
 
 }
 
+struct gfCachedFile
+/* A .nib or .2bit file kept open in a file cache. */
+{
+  void *file;        /* A struct nibInfo or a struct twoBitFile. */
+  long long lastUse; /* Value of gfFileCacheClock at the last lookup. */
+};
+
+static long long gfFileCacheClock = 0; /* Orders lookups across all caches. */
+
 struct hash *gfFileCacheNew()
 /* Create hash for storing info on .nib and .2bit files. */
 {
   return hashNew(0);
 }
 
-static void gfFileCacheFreeEl(struct hashEl *el)
-/* Free up one file cache info. */
+static void gfCachedFileClose(char *name, struct gfCachedFile *cf)
+/* Close the file kept in cf and free cf. */
 {
-  char *name = el->name;
   if (nibIsFile(name)) {
-    struct nibInfo *nib = el->val;
+    struct nibInfo *nib = cf->file;
     nibInfoFree(&nib);
   } else {
-    struct twoBitFile *tbf = el->val;
+    struct twoBitFile *tbf = cf->file;
     twoBitClose(&tbf);
   }
+  freeMem(cf);
+}
+
+static void gfFileCacheFreeEl(struct hashEl *el)
+/* Free up one file cache info. */
+{
+  gfCachedFileClose(el->name, el->val);
   el->val = NULL;
 }
 
@@ -581,6 +607,78 @@ void gfFileCacheFree(struct hash **pCache)
   }
 }
 
+void *gfFileCacheFind(struct hash *cache, char *fileName)
+/* Return the open nibInfo or twoBitFile for fileName, or NULL if it is not
+ * in cache.  Marks the file as the most recently used one. */
+{
+  struct gfCachedFile *cf = hashFindVal(cache, fileName);
+  if (cf == NULL) return NULL;
+  cf->lastUse = __atomic_add_fetch(&gfFileCacheClock, 1, __ATOMIC_RELAXED);
+  return cf->file;
+}
+
+void gfFileCacheAdd(struct hash *cache, char *fileName, void *file)
+/* Add an open nibInfo or twoBitFile for fileName to cache. */
+{
+  struct gfCachedFile *cf;
+  AllocVar(cf);
+  cf->file = file;
+  cf->lastUse = __atomic_add_fetch(&gfFileCacheClock, 1, __ATOMIC_RELAXED);
+  hashAdd(cache, fileName, cf);
+}
+
+struct gfCachedFileRef
+/* A file kept open in one of several caches trimmed together. */
+{
+  struct hash *cache;
+  struct hashEl *el;
+};
+
+static int gfCachedFileRefCmpLastUse(const void *va, const void *vb)
+/* Compare gfCachedFileRefs, least recently used first. */
+{
+  const struct gfCachedFileRef *a = va;
+  const struct gfCachedFileRef *b = vb;
+  long long diff = ((struct gfCachedFile *)a->el->val)->lastUse - ((struct gfCachedFile *)b->el->val)->lastUse;
+  return (diff > 0) - (diff < 0);
+}
+
+void gfFileCachesTrim(struct hash **caches, int cacheCount, int maxOpen)
+/* Close the least recently used files of all caches until at most maxOpen
+ * are left open in them together. */
+{
+  int i, open = 0;
+  for (i = 0; i < cacheCount; ++i) open += caches[i]->elCount;
+  int extra = open - max(maxOpen, 0);
+  if (extra <= 0) return;
+
+  struct gfCachedFileRef *refs;
+  AllocArray(refs, open);
+  int count = 0;
+  for (i = 0; i < cacheCount; ++i) {
+    struct hashCookie cookie = hashFirst(caches[i]);
+    struct hashEl *el;
+    while ((el = hashNext(&cookie)) != NULL) {
+      refs[count].cache = caches[i];
+      refs[count].el = el;
+      ++count;
+    }
+  }
+  qsort(refs, count, sizeof(refs[0]), gfCachedFileRefCmpLastUse);
+  for (i = 0; i < extra; ++i) {
+    gfCachedFileClose(refs[i].el->name, refs[i].el->val);
+    hashRemove(refs[i].cache, refs[i].el->name);
+  }
+  freeMem(refs);
+}
+
+void gfFileCacheTrim(struct hash *cache, int maxOpen)
+/* Close the least recently used files in cache until at most maxOpen are
+ * left open. */
+{
+  if (cache != NULL) gfFileCachesTrim(&cache, 1, maxOpen);
+}
+
 static void getTargetName(char *tSpec, boolean includeFile, char *targetName)
 /* Put sequence name, optionally prefixed by file: in targetName. */
 {
@@ -619,16 +717,27 @@ void gfAlignStrand(struct gfConnection *conn, char *tSeqDir, struct dnaSeq *seq,
  * Then load homologous bits of genome locally and do detailed alignment.
  * Call 'outFunction' with each alignment that is found. */
 {
-  struct ssBundle *bun;
-  struct gfRange *rangeList = NULL, *range;
-  struct dnaSeq *targetSeq;
-  char targetName[PATH_LEN];
+  struct gfRange *rangeList = NULL;
 
   // printf("DEBUG: ffIntromax %d ssAliCount %d usualExpansion %d\n", ffIntronMax, ssAliCount, usualExpansion);
 
   rangeList = gfQuerySeq(conn, seq);
-  close(conn->fd);
-  conn->fd = -1;
+  if (!conn->keepAlive) {
+    close(conn->fd);
+    conn->fd = -1;
+  }
+  gfAlignStrandRanges(rangeList, tSeqDir, seq, isRc, minMatch, tFileCache, out);
+}
+
+void gfAlignStrandRanges(struct gfRange *rangeList, char *tSeqDir, struct dnaSeq *seq, boolean isRc, int minMatch,
+                         struct hash *tFileCache, struct gfOutput *out)
+/* Load homologous bits of genome for the ranges a server found for one strand
+ * of seq locally and do detailed alignment.  Frees rangeList. */
+{
+  struct ssBundle *bun;
+  struct gfRange *range;
+  struct dnaSeq *targetSeq;
+  char targetName[PATH_LEN];
 
   // printf("DEBUG: rangeList count before sort %d\n", count_range_list(rangeList));
   slSort(&rangeList, gfRangeCmpTarget);
@@ -66,11 +66,11 @@ char fileName[PATH_LEN+256];
 safef(fileName, sizeof(fileName), "%s/%s", tSeqDir, range->tName);
 if (nibIsFile(fileName))
     {
-    struct nibInfo *nib = hashFindVal(tFileCache, fileName);
+    struct nibInfo *nib = gfFileCacheFind(tFileCache, fileName);
     if (nib == NULL)
         {
 	nib = nibInfoNew(fileName);
-	hashAdd(tFileCache, fileName, nib);
+	gfFileCacheAdd(tFileCache, fileName, nib);
 	}
     if (isRc)
 	reverseIntRange(&range->tStart, &range->tEnd, nib->size);
@@ -95,11 +95,11 @@ else
     if (tSeqName == NULL)
         errAbort("No colon in .2bit response from gfServer");
     *tSeqName++ = 0;
-    tbf = hashFindVal(tFileCache, fileName);
+    tbf = gfFileCacheFind(tFileCache, fileName);
     if (tbf == NULL)
         {
 	tbf = twoBitOpen(fileName);
-	hashAdd(tFileCache, fileName, tbf);
+	gfFileCacheAdd(tFileCache, fileName, tbf);
 	}
     tSeqSize = twoBitSeqSize(tbf, tSeqName);
     if (isRc)
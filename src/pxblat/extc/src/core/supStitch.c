@@ -537,8 +537,9 @@ ssGraphFree(&graph);
 
 
 
-static enum ffStringency ssStringency;
-static boolean ssIsProt;
+/* Set per call of ssStitch, per thread so that threads can stitch at once. */
+static __thread enum ffStringency ssStringency;
+static __thread boolean ssIsProt;
 
 static int ssGapCost(int dq, int dt, void *data)
 /* Return gap penalty.  This just need be a lower bound on
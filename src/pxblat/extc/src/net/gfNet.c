@@ -64,9 +64,9 @@ void gfBeginRequest(struct gfConnection *conn)
 void gfEndRequest(struct gfConnection *conn)
 /* End a request that might be followed by another requests. For
  * a static server, this closed the connection.  A dynamic server
- * it is left open. */
+ * or a keep-alive connection it is left open. */
 {
-  if (!conn->isDynamic) {
+  if (!conn->isDynamic && !conn->keepAlive) {
     close(conn->fd);
     conn->fd = -1;
   }
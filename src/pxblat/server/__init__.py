@@ -1,11 +1,16 @@
 """Server module."""
 
+from .async_client import AsyncClient
 from .basic import (
     build_index,
     check_port_in_use,
     check_port_open,
+    check_server_ready,
     files,
     find_free_port,
+    health_server,
+    is_unix_address,
+    package_genome,
     server_query,
     start_server,
     start_server_mt,
@@ -21,17 +26,22 @@ from .client import (
     create_client_option,
     query_server,
 )
+from .index import Index
 from .server import Server, create_server_option
 from .status import Status
 
 __all__ = [
     "Server",
+    "Index",
     "ClientThread",
     "files",
     "server_query",
     "start_server_mt",
     "start_server",
     "status_server",
+    "health_server",
+    "is_unix_address",
+    "check_server_ready",
     "stop_server",
     "create_client_option",
     "query_server",
@@ -44,5 +54,7 @@ __all__ = [
     "copy_client_option",
     "Status",
     "Client",
+    "AsyncClient",
     "build_index",
+    "package_genome",
 ]
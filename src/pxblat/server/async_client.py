@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from Bio import SeqIO
+
+from pxblat.extc import ClientOption, TargetFileCache, pygfAlignRanges
+
+from .basic import UNIX_PREFIX, _gfSignature, is_unix_address
+from .client import INSEQ, INSEQS, Client, _parse_result, copy_client_option, query_server
+from .status import Status
+
+_NT_CHARS = {c: c.lower() for c in "acgtnuACGTNU"}
+_COMPLEMENT = str.maketrans("acgtun", "tgcaan")
+_NUCLEOTIDE = ("dna", "rna")
+
+
+def _to_dna(seq: str) -> str:
+    """Filters a query the same way the native client does before sending it to the server."""
+    return "".join(_NT_CHARS.get(c, "n") for c in seq if c.isalpha())
+
+
+def _reverse_complement(dna: str) -> str:
+    return dna.translate(_COMPLEMENT)[::-1]
+
+
+class AsyncClient:
+    """An asyncio client for a gfServer.
+
+    The client speaks the gfServer wire protocol with asyncio streams, so waiting for the server never blocks the
+    event loop. Only the CPU-bound local alignment of the ranges the server found runs in a thread pool.
+
+    Attributes:
+        host (str): The hostname or IP address of the server.
+        port (int): The port number of the server.
+        max_in_flight (int): The maximum number of connections open to the server at the same time.
+
+    Order:
+        -10
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        seq_dir: str | Path,
+        *,
+        ttype: str = "dna",
+        qtype: str = "dna",
+        nohead: bool = False,
+        min_score: int = 30,
+        min_identity: float = 90.0,
+        output_format: str = "psl",
+        max_intron: int = 750000,
+        genome: str | None = None,
+        genome_data_dir: str | None = None,
+        parse: bool = True,
+        workers: int | None = None,
+        max_in_flight: int = 256,
+        max_open_files: int = 16,
+    ) -> None:
+        """An asyncio client for querying a gfServer.
+
+        Args:
+            host (str): The hostname or IP address of the server, or `unix:/path.sock` for a server on a Unix domain socket.
+            port (int): The port number of the server.
+            seq_dir (Union[str, Path]): The directory where sequence data is stored.
+            ttype (str, optional): Database type. One of 'dna', 'prot', 'dnax'. Default is 'dna'.
+            qtype (str, optional): Query type. One of 'dna', 'rna', 'prot', 'dnax', 'rnax'. Default is 'dna'.
+            nohead (bool, optional): If True, suppresses 5-line psl header. Default is False.
+            min_score (int, optional): Sets minimum score. Default is 30.
+            min_identity (float, optional): Sets minimum sequence identity (in percent). Default is 90.
+            output_format (str, optional): Controls output file format. Default is 'psl'.
+            max_intron (int, optional): Sets maximum intron size. Default is 750000.
+            genome (Optional[str], optional): The genome name when using a dynamic gfServer. Defaults to None.
+            genome_data_dir (Optional[str], optional): The root directory containing the genome data files for a dynamic gfServer. Defaults to None.
+            parse (bool, optional): If True, parse the result of the query. Default is True.
+            workers (Optional[int], optional): The number of threads aligning the ranges found by the server.
+                Defaults to the `ThreadPoolExecutor` default.
+            max_in_flight (int, optional): The maximum number of connections open to the server at the same time. Each
+                query opens one connection per strand of each of its sequences. Default is 256.
+            max_open_files (int, optional): The number of target sequence files kept open between queries, shared by
+                the alignment threads. Default is 16.
+
+        Examples:
+            >>> import asyncio
+            >>> from pxblat import AsyncClient
+            >>> async def main():
+            ...     async with AsyncClient("localhost", 65000, seq_dir=".") as client:
+            ...         return await client.query(["ATCG", "test_case1.fa"])
+            >>> results = asyncio.run(main())
+        """
+        self._option = (
+            ClientOption()
+            .withHost(host)
+            .withPort(str(port))
+            .withMinScore(min_score)
+            .withMinIdentity(min_identity)
+            .withTType(ttype)
+            .withQType(qtype)
+            .withNohead(nohead)
+            .withMaxIntron(max_intron)
+            .withOutputFormat(output_format)
+            .withSeqDir(str(seq_dir))
+        )
+
+        if genome is not None:
+            self._option.withGenome(genome)
+        if genome_data_dir is not None:
+            self._option.withGenomeDataDir(genome_data_dir)
+
+        self._option.build()
+
+        self.host = host
+        self.port = port
+        self.max_in_flight = max_in_flight
+        self._parse = parse
+        self._workers = workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._file_cache = TargetFileCache(max_open_files) if max_open_files > 0 else None
+
+    async def __aenter__(self):
+        """Returns the client when used as an async context manager."""
+        return self
+
+    async def __aexit__(self, *exc):
+        """Shuts down the alignment threads and closes the cached target files."""
+        await self.aclose()
+
+    async def aclose(self):
+        """Shuts down the alignment threads and closes the cached target files without blocking the event loop.
+
+        Alignments in flight finish on a thread of the default executor while the loop keeps running.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def close(self):
+        """Shuts down the alignment threads and closes the cached target files."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._file_cache is not None:
+            self._file_cache.close()
+
+    @property
+    def option(self) -> ClientOption:
+        """The options used for the queries."""
+        return self._option
+
+    def _command(self, command: str) -> str:
+        if self._option.genomeDataDir:
+            return f"{_gfSignature()}{command} {self._option.genome} {self._option.genomeDataDir}"
+        return f"{_gfSignature()}{command}"
+
+    def _connection_slot(self) -> asyncio.Semaphore:
+        """The semaphore held while a connection to the server is open, bounding them to `max_in_flight`."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+
+    async def _run_in_executor(self, func, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    @staticmethod
+    async def _read_string(reader: asyncio.StreamReader) -> str:
+        size = await reader.readexactly(1)
+        return (await reader.readexactly(size[0])).decode("latin-1")
+
+    async def _request(self, message: str, payload: bytes | None = None):
+        """Sends one command to the server and returns the stream to read the answer from."""
+        if is_unix_address(self.host):
+            reader, writer = await asyncio.open_unix_connection(self.host[len(UNIX_PREFIX) :])
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        writer.write(message.encode())
+        if payload is not None:
+            await writer.drain()
+            answer = await reader.readexactly(1)
+            if answer != b"Y":
+                writer.close()
+                msg = f"Expecting 'Y' from server, got {answer + await reader.read(255)!r}"
+                raise RuntimeError(msg)
+            writer.write(payload)
+        await writer.drain()
+        return reader, writer
+
+    async def _strings_until_end(self, message: str, payload: bytes | None = None) -> list[str]:
+        async with self._connection_slot():
+            reader, writer = await self._request(message, payload)
+            try:
+                lines = []
+                while (line := await self._read_string(reader)) != "end":
+                    lines.append(line)
+                return lines
+            finally:
+                writer.close()
+
+    async def _ranges(self, dna: str) -> list[str]:
+        """Asks the server where one strand of a query hits the genome."""
+        lines = await self._strings_until_end(f"{self._command('query')} {len(dna)}", dna.encode())
+        return [line for line in lines if not line.startswith("Error:")]
+
+    async def _align(self, records: list[tuple[str, str]], seqid: str | None):
+        dnas = [_to_dna(seq) for _, seq in records]
+        ranges = await asyncio.gather(
+            *(self._ranges(dna) for dna in dnas),
+            *(self._ranges(_reverse_complement(dna)) for dna in dnas),
+        )
+        forward, reverse = ranges[: len(dnas)], ranges[len(dnas) :]
+        names = [name for name, _ in records]
+        ret = await self._run_in_executor(
+            pygfAlignRanges, self._option, names, dnas, forward, reverse, self._file_cache
+        )
+        return _parse_result(ret, seqid, parse=self._parse)
+
+    async def _query(self, in_seq: INSEQ):
+        if self._option.qType not in _NUCLEOTIDE or self._option.tType not in _NUCLEOTIDE:
+            # Translated queries exchange clumps rather than ranges, let the native client handle them over one
+            # connection at a time.
+            option = copy_client_option(self._option)
+            if isinstance(in_seq, Path):
+                option.withInName(str(in_seq)).withInSeq("").build()
+            else:
+                option.withInSeq(str(in_seq)).withInName("").build()
+            async with self._connection_slot():
+                return await self._run_in_executor(lambda: query_server(option, parse=self._parse))
+
+        if isinstance(in_seq, Path):
+            records = [(record.id, str(record.seq)) for record in SeqIO.parse(in_seq, "fasta")]
+            return await self._align(records, None)
+
+        seqid = f"{in_seq[:5]}_{len(in_seq)}"
+        return await self._align([(seqid, in_seq)], seqid)
+
+    async def query(self, in_seqs: INSEQS | list[str] | list[Path] | INSEQ):
+        """Query the server with the specified sequences.
+
+        All sequences are queried concurrently, with at most `max_in_flight` connections open to the server at a time.
+
+        Args:
+            in_seqs: The sequences to query.
+
+        Returns:
+            The query results in the order of `in_seqs`: `Bio.SearchIO.QueryResult`
+        """
+        if isinstance(in_seqs, (str, Path)):
+            in_seqs = [in_seqs]
+
+        in_seqs = list(Client._verify_input(in_seqs))
+        return await asyncio.gather(*(self._query(in_seq) for in_seq in in_seqs))
+
+    async def status(self, *, instance: bool = False) -> Status | dict[str, str]:
+        """Get the status of the server.
+
+        Args:
+            instance (bool, optional): If True, return a Status object instead of a dictionary. Defaults to False.
+
+        Returns:
+            Union[Status, Dict[str, str]]: The status information of the server.
+        """
+        if not self._option.genome:
+            message = f"{_gfSignature()}status"
+        else:
+            message = self._command("transInfo" if self._option.tType not in _NUCLEOTIDE else "untransInfo")
+
+        lines = await self._strings_until_end(message)
+        data_dict = {" ".join(line.split()[:-1]): line.split()[-1] for line in lines}
+
+        if instance:
+            return Status.from_dict(data_dict)
+
+        return data_dict
+
+    async def files(self) -> list[str]:
+        """Get a list of files available on the server.
+
+        Returns:
+            List[str]: A list of file names available on the server.
+        """
+        async with self._connection_slot():
+            reader, writer = await self._request(f"{_gfSignature()}files")
+            try:
+                count = int(await self._read_string(reader))
+                return [await self._read_string(reader) for _ in range(count)]
+            finally:
+                writer.close()
+
+    async def pcr(self, forward: str, reverse: str, max_distance: int = 4000) -> list[tuple[str, int, int, str]]:
+        """Find in-silico PCR products of a primer pair.
+
+        Args:
+            forward (str): The forward primer.
+            reverse (str): The reverse primer.
+            max_distance (int, optional): The maximum distance between the primers. Default is 4000.
+
+        Returns:
+            List[Tuple[str, int, int, str]]: The target name, start, end and strand of each product.
+        """
+        lines = await self._strings_until_end(f"{_gfSignature()}pcr {forward} {reverse} {max_distance}")
+        products = []
+        for line in lines:
+            if line.startswith("Error:"):
+                raise RuntimeError(line)
+            name, start, end, strand = line.split("\t")
+            products.append((name, int(start), int(end), strand))
+        return products
@@ -1,19 +1,94 @@
 from __future__ import annotations
 
+import copy
 import errno
+import hashlib
+import json
+import shutil
 import socket
+import tempfile
 import time
 import warnings
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from multiprocessing import Process
+from pathlib import Path
 
 from deprecated import deprecated  # type: ignore
 
 from pxblat.extc import ServerOption, UsageStats, buildIndex, pygetFileList, pyqueryServer, pystartServer, startServer
+from pxblat.toolkit import fa_to_two_bit
 
 from .status import Status
 
 MAX_PORT = 65535
+# The last string of a server answer, sent with its length byte.
+_END = b"\x03end"
+# A host of the form unix:/path.sock is a server listening on a Unix domain socket, its port is ignored.
+UNIX_PREFIX = "unix:"
+# The repMatch of a translated index, gfPepMaxTileUse in genoFind.h.
+PEP_MAX_TILE_USE = 30000
+# Suffixes of the FASTA files package_genome takes, stripped to name the genome.
+_FASTA_SUFFIXES = (".fa", ".fasta", ".fna", ".fa.gz", ".fasta.gz", ".fna.gz")
+# The options an index file depends on, recorded in the manifest of `package_genome`.
+_INDEX_OPTIONS = (
+    "trans",
+    "tileSize",
+    "stepSize",
+    "minMatch",
+    "maxGap",
+    "repMatch",
+    "mask",
+    "noSimpRepMask",
+    "allowOneMismatch",
+)
+
+
+def is_unix_address(host: str) -> bool:
+    """Check if a host is the `unix:/path.sock` address of a Unix domain socket.
+
+    Args:
+        host (str): The hostname, IP address or Unix domain socket address.
+
+    Returns:
+        bool: True if the host is a Unix domain socket address.
+
+    Example:
+        >>> is_unix_address('unix:/tmp/gfserver.sock')
+        True
+    """
+    return host.startswith(UNIX_PREFIX)
+
+
+def _threads_option(threads: int | str) -> int:
+    """Converts the `threads` argument of a server or index build to `ServerOption.threads`, where 0 means one thread per CPU."""
+    if threads == "auto":
+        return 0
+
+    if isinstance(threads, str) or threads < 1:
+        msg = f"threads must be a positive number or 'auto', got {threads!r}"
+        raise ValueError(msg)
+
+    return threads
+
+
+def _connect(host: str, port: int, timeout: float | None = None) -> socket.socket:
+    """Connects to a server over TCP, or over its Unix domain socket for a `unix:/path.sock` host."""
+    if not is_unix_address(host):
+        return socket.create_connection((host, port), timeout=timeout)
+
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.settimeout(timeout)
+    try:
+        s.connect(host[len(UNIX_PREFIX) :])
+    except FileNotFoundError as e:
+        # Nobody listens on a socket that does not exist, report it like a closed port.
+        s.close()
+        raise ConnectionRefusedError(errno.ECONNREFUSED, f"No server listening on {host}") from e
+    except OSError:
+        s.close()
+        raise
+    return s
 
 
 def check_port_in_use(host: str, port: int, tries: int = 3) -> bool:
@@ -124,6 +199,7 @@ def wait_server_ready(
     port: int,
     timeout: int = 60,
     server_option=None,
+    interval: float = 0.1,
 ) -> None:
     """Wait for a server to become ready by checking if a given port is open or if a specific server status is reached.
 
@@ -132,6 +208,7 @@ def wait_server_ready(
         port (int): The port number to check for open status.
         timeout (int, optional): The maximum number of seconds to wait for the server to become ready. Defaults to 60.
         server_option (str, optional): The specific server status to check for. If None, the function will check for an open port. Defaults to None.
+        interval (float, optional): The number of seconds between two checks. Defaults to 0.1.
 
     Raises:
         RuntimeError: If the server does not become ready within the specified timeout.
@@ -147,13 +224,13 @@ def wait_server_ready(
             stacklevel=1,
         )
         while not check_port_open(host, port):
-            time.sleep(1)
+            time.sleep(interval)
             if time.perf_counter() - start > timeout:
                 msg = "wait for server ready timeout"
                 raise RuntimeError(msg)
     else:
-        while not check_server_status(host, port, server_option):
-            time.sleep(1)
+        while not check_server_ready(host, port, server_option):
+            time.sleep(interval)
             if time.perf_counter() - start > timeout:
                 msg = "wait for server ready timeout"
                 raise RuntimeError(msg)
@@ -189,6 +266,40 @@ def check_server_status(
         return True
 
 
+def check_server_ready(
+    host: str,
+    port: int,
+    server_option: ServerOption | None = None,
+) -> bool:
+    """Check whether a server has loaded its index and answers queries.
+
+    The check uses the `health` command, which the server answers at once. Servers that do not know the command,
+    such as the gfServer of UCSC, are checked with `check_server_status` instead when `server_option` is given.
+
+    Args:
+        host (str): The hostname or IP address of the server to check.
+        port (int): The port number of the server.
+        server_option (ServerOption, optional): The option used for the status check of servers without the
+            `health` command. Defaults to None.
+
+    Returns:
+        bool: True if the server has loaded its index, False otherwise.
+
+    Example:
+        >>> check_server_ready('localhost', 8080)
+        True
+    """
+    try:
+        health = health_server(host, port)
+    except OSError:
+        return False
+
+    if not health:
+        return server_option is not None and check_server_status(host, port, server_option)
+
+    return health.get("index") == "loaded"
+
+
 def check_port_open(host: str, port: int) -> bool:
     """Check the port is open and can accept message or not.
 
@@ -199,8 +310,11 @@ def check_port_open(host: str, port: int) -> bool:
     Returns:
         True if the port is open and can accept message, otherwise False.
     """
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        return s.connect_ex((host, port)) == 0
+    try:
+        with _connect(host, port):
+            return True
+    except OSError:
+        return False
 
 
 def _gfSignature() -> str:
@@ -218,7 +332,7 @@ def status_server(
     """Get the status of a running server.
 
     Args:
-        host (str): The hostname or IP address of the server to check.
+        host (str): The hostname or IP address of the server to check, or `unix:/path.sock` for a server on a Unix domain socket.
         port (int): The port number to use when attempting to connect to the server.
         server_option (ServerOption): The gfserver option to use when attempting to connect to the server.
         instance (bool, optional): If True, return a Status object instead of a dictionary. Defaults to False.
@@ -237,34 +351,15 @@ def status_server(
         message = f"{_gfSignature()}{temp} {server_option.genome} {server_option.genomeDataDir}".encode()
 
     data = b""
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.connect((host, port))
+    with _connect(host, port) as s:
         s.sendall(message)
-        while True:
-            data += s.recv(1024)
-            if b"end" in data:
+        while not data.endswith(_END):
+            chunk = s.recv(1024)
+            if not chunk:
                 break
+            data += chunk
 
-        mapping = {
-            b"\x00": b"\n",
-            b"\x03": b"\n",
-            b"\x04": b"\n",
-            b"\x07": b"\n",
-            b"\x08": b"\n",
-            b"\x11": b"\n",
-            b"\x10": b"\n",
-            b"\x0b": b"\n",
-            b"\x0c": b"\n",
-            b"\x0e": b"\n",
-            b"\x0f": b"\n",
-            b"\t": b"\n",
-            b"end": b"",
-        }
-
-    for k, v in mapping.items():
-        data = data.replace(k, v)
-
-    data_dict = {" ".join(line.split()[:-1]): line.split()[-1] for line in data.decode("utf-8").strip().split("\n")}
+    data_dict = _parse_reply(data)
 
     if instance:
         return Status.from_dict(data_dict)
@@ -272,26 +367,93 @@ def status_server(
     return data_dict
 
 
-def stop_server(host: str, port: int):
+def health_server(host: str, port: int, timeout: float = 1.0) -> dict[str, str]:
+    """Get the health of a running server.
+
+    Unlike `status_server`, the server answers at once, which makes the command suitable for readiness probes.
+
+    Args:
+        host (str): The hostname or IP address of the server to check, or `unix:/path.sock` for a server on a Unix domain socket.
+        port (int): The port number to use when attempting to connect to the server.
+        timeout (float, optional): The number of seconds to wait for the answer. Defaults to 1.0.
+
+    Returns:
+        Dict[str, str]: The version of the server and whether its index is `loaded`, or an empty dictionary if the
+        server closed the connection without answering, for example because it does not know the command.
+
+    Raises:
+        OSError: If the server cannot be reached or does not answer in time.
+
+    Example:
+        >>> health_server('localhost', 8080)
+        {'version': '37x1', 'index': 'loaded'}
+    """
+    data = b""
+    with _connect(host, port, timeout=timeout) as s:
+        s.sendall(f"{_gfSignature()}health".encode())
+        while not data.endswith(_END):
+            chunk = s.recv(1024)
+            if not chunk:
+                return {}
+            data += chunk
+
+    return _parse_reply(data)
+
+
+def _parse_reply(data: bytes) -> dict[str, str]:
+    """Parse the length-prefixed `key value` strings a server sends before `end` into a dictionary."""
+    data_dict = {}
+    pos = 0
+    while pos < len(data):
+        size = data[pos]
+        line = data[pos + 1 : pos + 1 + size].decode("utf-8")
+        pos += 1 + size
+        if line == "end":
+            break
+        *key, value = line.split()
+        data_dict[" ".join(key)] = value
+    return data_dict
+
+
+def stop_server(host: str, port: int, *, wait: bool = False, timeout: float | None = None) -> int | None:
     """Stop a running server.
 
     Args:
-        host (str): The hostname or IP address of the server to stop.
+        host (str): The hostname or IP address of the server to stop, or `unix:/path.sock` for a server on a Unix domain socket.
         port (int): The port number to use when attempting to connect to the server.
+        wait (bool, optional): If True, wait until the server has drained, which means it finished the requests in
+            flight or abandoned them after its drain timeout. Defaults to False.
+        timeout (float, optional): The maximum number of seconds to wait for the server to drain. Defaults to None,
+            which waits without limit.
 
     Returns:
-        None
+        Optional[int]: The number of requests the server abandoned when `wait` is True, otherwise None. None is also
+        returned if the server closed the connection without reporting, for example because it was not started
+        with `can_stop` or is the gfServer of UCSC.
 
-    This function stops a running server by sending a "quit" message to the server. The function takes the hostname and port number
-    of the server as arguments. The function returns None.
+    This function stops a running server by sending a "quit" message to the server. The server stops accepting
+    connections and exits once the requests in flight are answered.
 
     Example:
-        >>> stop_server('localhost', 8080)
+        >>> stop_server('localhost', 8080, wait=True)
+        0
     """
     message = f"{_gfSignature()}quit".encode()
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.connect((host, port))
+    with _connect(host, port) as s:
         s.sendall(message)
+        if not wait:
+            return None
+
+        s.settimeout(timeout)
+        data = b""
+        while not data.endswith(_END):
+            chunk = s.recv(1024)
+            if not chunk:
+                break
+            data += chunk
+
+    abandoned = _parse_reply(data).get("abandoned")
+    return None if abandoned is None else int(abandoned)
 
 
 def files(host: str, port: int) -> list[str]:
@@ -480,6 +642,10 @@ def find_free_port(host: str, start: int, end: int = MAX_PORT) -> int:
     if start > end:
         raise ValueError
 
+    if is_unix_address(host):
+        msg = f"{host} is in use, a Unix domain socket has no other port to try"
+        raise RuntimeError(msg)
+
     for port in range(start, end):
         try:
             if not check_port_in_use(host, port):
@@ -494,6 +660,7 @@ def build_index(
     gfx_file: str,
     seq_files: list[str],
     options: ServerOption,
+    threads: int | str | None = None,
 ):
     """To generate a precomputed index.
 
@@ -503,6 +670,191 @@ def build_index(
     be created for untranslated and translated queries.  These can be used
     with a persistent server as with 'start -indexFile or a dynamic server.
     They must follow the naming convention for for dynamic servers.
+
+    `threads` is the number of threads building the index, or 'auto' for one per CPU, in place of
+    `options.threads`. A translated index uses at most six, one per reading frame. The index is the same for
+    any number of threads.
     """
+    if threads is not None:
+        options = copy.copy(options).withThreads(_threads_option(threads))
     file_count = len(seq_files)
     buildIndex(gfx_file, file_count, seq_files, options)
+
+
+def _sha256(path: Path) -> str:
+    """Computes the hex SHA-256 digest of a file, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_manifest(path: Path) -> dict[str, dict]:
+    """Reads the manifest of `package_genome`, empty if it does not exist or cannot be parsed."""
+    try:
+        manifest = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _index_settings(options: ServerOption) -> dict:
+    """The options of `options` an index file depends on."""
+    return {name: getattr(options, name) for name in _INDEX_OPTIONS}
+
+
+def _write_checksums(path: Path, manifest: dict[str, dict]) -> None:
+    """Writes the checksums of a manifest in the format of `sha256sum`, unless the file already holds them."""
+    checksums = "".join(f"{entry['sha256']}  {name}\n" for name, entry in manifest.items())
+    if not path.exists() or path.read_text() != checksums:
+        path.write_text(checksums)
+
+
+def _manifest_entry(output: Path, options: dict) -> dict:
+    """Records the size, modification time, build options and checksum of an output of `package_genome`."""
+    stat = output.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "options": options, "sha256": _sha256(output)}
+
+
+def _up_to_date(output: Path, source: Path, entry: dict | None, options: dict) -> bool:
+    """Check if an output of `package_genome` is newer than its source and unchanged since its manifest entry."""
+    if entry is None or not output.exists():
+        return False
+    stat = output.stat()
+    return (
+        stat.st_mtime >= source.stat().st_mtime
+        and entry.get("size") == stat.st_size
+        and entry.get("mtime_ns") == stat.st_mtime_ns
+        and entry.get("options") == options
+    )
+
+
+def _genome_name(sequence: Path) -> str:
+    """The genome name of a FASTA or 2bit file, `hg38` for `hg38.fa.gz` or `hg38.2bit`."""
+    name = sequence.name
+    for suffix in (".2bit", *_FASTA_SUFFIXES):
+        if name.endswith(suffix) and len(name) > len(suffix):
+            return name[: -len(suffix)]
+    return sequence.stem
+
+
+def _build_index_into(gfx_file: Path, two_bit: Path, options: ServerOption, threads: int | str | None) -> None:
+    """Builds an index in a temporary directory beside `gfx_file` and moves it in place once complete."""
+    with tempfile.TemporaryDirectory(dir=gfx_file.parent, prefix=".pxblat-") as tmp:
+        partial = Path(tmp) / gfx_file.name
+        build_index(partial.as_posix(), [two_bit.as_posix()], options, threads)
+        partial.replace(gfx_file)
+
+
+def package_genome(
+    sequence: str | Path,
+    out_dir: str | Path,
+    genome: str | None = None,
+    options: ServerOption | None = None,
+    threads: int | str | None = None,
+    *,
+    force: bool = False,
+) -> dict[str, Path]:
+    """Prepare a genome for a dynamic server in one call.
+
+    Writes the files a dynamic server looks up for a genome into `out_dir`:
+
+        $genome.2bit
+        $genome.untrans.gfidx
+        $genome.trans.gfidx
+        $genome.sha256
+        $genome.manifest.json
+
+    The two indexes are built at once in separate processes, and `$genome.sha256` holds the checksums of the
+    other three files in the format of `sha256sum`, so `sha256sum -c $genome.sha256` checks a copied genome.
+    `$genome.manifest.json` records the size, modification time and index options of each file. A file newer
+    than its source that still matches its entry is up to date and kept, so packaging the same genome again
+    only rebuilds what is missing, stale, modified or built with other options, and only hashes what it rebuilds.
+
+    Args:
+        sequence (str | Path): The FASTA (possibly gzipped) or 2bit file of the genome.
+        out_dir (str | Path): The directory to write the files to, created if missing.
+        genome (str, optional): The genome name. Defaults to the name of `sequence` without its extension.
+        options (ServerOption, optional): The built options of the untranslated index. The translated index
+            uses the same mask and simple repeat settings with the tile size of proteins. Defaults to
+            `create_server_option().build()`.
+        threads (int | str, optional): The number of threads building each index, or 'auto' for one per CPU,
+            in place of `options.threads`.
+        force (bool, optional): Rebuild every file even if it is up to date. Defaults to False.
+
+    Returns:
+        dict[str, Path]: The paths of the files, keyed by `2bit`, `untrans`, `trans`, `sha256` and `manifest`.
+
+    Example:
+        >>> package_genome("hg38.fa.gz", "genomes/hg38")  # doctest: +SKIP
+    """
+    sequence = Path(sequence)
+    out_dir = Path(out_dir)
+    if not sequence.is_file():
+        msg = f"{sequence} does not exist or is not a file"
+        raise FileNotFoundError(msg)
+
+    genome = _genome_name(sequence) if genome is None else genome
+    if options is None:
+        options = ServerOption().build()
+
+    untrans_options = copy.copy(options)
+    untrans_options.trans = False
+    trans_options = copy.copy(options)
+    trans_options.trans = True
+    # build() leaves repMatch at 0 for a translated index, which would drop every tile as overused.
+    trans_options.build().withRepMatch(PEP_MAX_TILE_USE)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    two_bit = out_dir / f"{genome}.2bit"
+    checksum_file = out_dir / f"{genome}.sha256"
+    manifest_file = out_dir / f"{genome}.manifest.json"
+    manifest = {} if force else _read_manifest(manifest_file)
+
+    indexes = {
+        out_dir / f"{genome}.untrans.gfidx": untrans_options,
+        out_dir / f"{genome}.trans.gfidx": trans_options,
+    }
+    # The options each file is built with, an index is rebuilt when they change.
+    settings = {two_bit: {}, **{gfx_file: _index_settings(opt) for gfx_file, opt in indexes.items()}}
+
+    rebuilt = []
+    if two_bit.resolve() == sequence.resolve():
+        # A genome packaged in place keeps its 2bit file, only its entry is recorded again if it changed.
+        if not _up_to_date(two_bit, sequence, manifest.get(two_bit.name), settings[two_bit]):
+            rebuilt.append(two_bit)
+    elif not _up_to_date(two_bit, sequence, manifest.get(two_bit.name), settings[two_bit]):
+        with tempfile.TemporaryDirectory(dir=out_dir, prefix=".pxblat-") as tmp:
+            partial = Path(tmp) / two_bit.name
+            if sequence.suffix == ".2bit":
+                shutil.copyfile(sequence, partial)
+            else:
+                fa_to_two_bit([sequence.as_posix()], partial.as_posix())
+            partial.replace(two_bit)
+        rebuilt.append(two_bit)
+
+    stale = [
+        gfx_file
+        for gfx_file in indexes
+        if not _up_to_date(gfx_file, two_bit, manifest.get(gfx_file.name), settings[gfx_file])
+    ]
+    if stale:
+        with ProcessPoolExecutor(max_workers=len(stale)) as executor:
+            builds = [
+                executor.submit(_build_index_into, gfx_file, two_bit, indexes[gfx_file], threads) for gfx_file in stale
+            ]
+            for build in builds:
+                build.result()
+        rebuilt.extend(stale)
+
+    untrans, trans = indexes
+    recorded = {
+        output.name: _manifest_entry(output, settings[output]) if output in rebuilt else manifest[output.name]
+        for output in settings
+    }
+    if recorded != manifest:
+        manifest_file.write_text(json.dumps(recorded, indent=2) + "\n")
+    _write_checksums(checksum_file, recorded)
+
+    return {"2bit": two_bit, "untrans": untrans, "trans": trans, "sha256": checksum_file, "manifest": manifest_file}
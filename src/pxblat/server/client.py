@@ -1,16 +1,31 @@
 from __future__ import annotations
 
-import tempfile
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from copy import deepcopy
 from pathlib import Path
-from threading import Thread
-from typing import TYPE_CHECKING, Union
-
-from pxblat.extc import ClientOption, pygfClient
-from pxblat.parser import read
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, NamedTuple, Union
+
+from Bio import SeqIO
+
+from pxblat.extc import (
+    ClientOption,
+    ConnectionPool,
+    TargetFileCache,
+    pygfClient,
+    pygfClientBatch,
+    pygfClientBuffer,
+    pygfClientSeqs,
+)
+from pxblat.parser import _assign_info_to_query_result, read
+from pxblat.parser import parse as _parse_psl
 
 from .basic import wait_server_ready
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
     from .server import ServerOption
 
 from typing import List
@@ -18,6 +33,21 @@ from typing import List
 INSEQ = Union[str, Path]
 INSEQS = Union[List[INSEQ], List[str], List[Path]]
 
+PSL_QNAME_COLUMN = 9
+# Output formats whose rows carry the query name in PSL_QNAME_COLUMN, so batch results can be split by query.
+_SPLIT_FORMATS = ("psl", "pslx")
+
+
+def _is_buffer(obj) -> bool:
+    """Returns True for bytes-like objects such as bytes, bytearray, memoryview and NumPy arrays."""
+    if isinstance(obj, (str, Path)):
+        return False
+    try:
+        memoryview(obj)
+    except TypeError:
+        return False
+    return True
+
 
 def copy_client_option(option: ClientOption) -> ClientOption:
     """Copies the ClientOption object."""
@@ -137,6 +167,8 @@ def query_server(
     seqname: str | None = None,
     *,
     parse: bool = True,
+    pool: ConnectionPool | None = None,
+    file_cache: TargetFileCache | None = None,
 ):
     """Sends a query to the server and returns the result.
 
@@ -144,8 +176,10 @@ def query_server(
         option: ClientOption
         host: Optional[str]
         port: Optional[int]
-        seqname: Optional[str]
+        seqname: Optional[str] name of the in-memory sequence `option.inSeq`
         parse: bool
+        pool: Optional[ConnectionPool] to reuse kept-alive connections to the server
+        file_cache: Optional[TargetFileCache] to reuse the target files opened by earlier queries
 
     Returns:
         str or bytes: The result of the query.
@@ -153,7 +187,6 @@ def query_server(
     """
     _resolve_host_port(option, host, port)
 
-    fafile = None
     if not option.inName and not option.inSeq:
         msg = "inName and inSeq are both empty"
         raise ValueError(msg)
@@ -161,22 +194,58 @@ def query_server(
     seqid = None
 
     if option.inSeq:
-        with tempfile.NamedTemporaryFile(mode="w", delete=False) as fafile:
-            seqname = fafile.name if seqname is None else seqname
-            seqid = f"{option.inSeq[:5]}_{len(option.inSeq)}"
-            fafile.write(f">{seqid}\n")
-            fafile.write(option.inSeq)
-        option.inName = fafile.name
+        seqid = seqname if seqname is not None else f"{option.inSeq[:5]}_{len(option.inSeq)}"
+        ret = pygfClientSeqs(option, [(seqid, option.inSeq)], pool, file_cache)
+    else:
+        ret = pygfClient(option, pool, file_cache)
+
+    return _parse_result(ret, seqid, parse=parse)
 
-    ret = pygfClient(option)
 
+def _decode_result(ret: bytes) -> str:
+    """Decodes the raw output of a query."""
     try:
-        ret_decode = ret.decode().rsplit(",\n", 1)[0]  # type: ignore
+        return ret.decode().rsplit(",\n", 1)[0]
     except UnicodeDecodeError:
-        ret_decode = ret.decode("latin-1").rsplit(",\n", 1)[0]  # type: ignore
+        return ret.decode("latin-1").rsplit(",\n", 1)[0]
+
+
+def _check_split_format(output_format: str) -> None:
+    """Raises ValueError if the results of a batch of queries in `output_format` cannot be split by query name."""
+    if output_format not in _SPLIT_FORMATS:
+        msg = f"results of several queries can only be split in psl or pslx format, not {output_format}"
+        raise ValueError(msg)
+
+
+def _split_result(ret: bytes, names: list[str], *, parse: bool) -> dict:
+    """Decodes the raw output of a batch of queries and splits it by query name."""
+    ret_decode = _decode_result(ret)
+
+    if parse:
+        results = dict.fromkeys(names)
+        for query_result in _parse_psl(ret_decode):
+            # Ignore results of unknown queries, see issue #244.
+            if query_result.id in results:
+                results[query_result.id] = _assign_info_to_query_result(query_result)
+        return results
+
+    # PSL rows have the query name in their 10th column, everything else is header.
+    header: list[str] = []
+    rows: dict[str, list[str]] = {name: [] for name in names}
+    in_header = True
+    for line in ret_decode.splitlines(keepends=True):
+        fields = line.split("\t", PSL_QNAME_COLUMN + 1)
+        if line[:1].isdigit() and len(fields) > PSL_QNAME_COLUMN and fields[PSL_QNAME_COLUMN] in rows:
+            rows[fields[PSL_QNAME_COLUMN]].append(line)
+            in_header = False
+        elif in_header:
+            header.append(line)
+    return {name: "".join(header + lines).rsplit(",\n", 1)[0] for name, lines in rows.items()}
 
-    if fafile is not None:
-        Path(fafile.name).unlink()
+
+def _parse_result(ret: bytes, seqid: str | None, *, parse: bool):
+    """Decodes the raw output of a query and parses it if requested."""
+    ret_decode = _decode_result(ret)
 
     if not parse:
         return ret_decode
@@ -317,6 +386,82 @@ class ClientThread(Thread):
         _resolve_host_port(self.option, self._host, self._port)
 
 
+class CacheInfo(NamedTuple):
+    """Statistics of the result cache of a `Client`."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+_MISSING = object()
+
+
+class _ResultCache:
+    """A thread-safe LRU cache of query results."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return _MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+
+def _rename_result(result, old: str, new: str):
+    """Returns a copy of the result of query `old` as the result of query `new`.
+
+    A parsed result is always copied, so that a caller changing it does not change the cached one.
+    """
+    if result is None:
+        return result
+
+    if isinstance(result, str):
+        if old == new:
+            return result
+        lines = result.splitlines(keepends=True)
+        for i, line in enumerate(lines):
+            fields = line.split("\t")
+            if line[:1].isdigit() and len(fields) > PSL_QNAME_COLUMN and fields[PSL_QNAME_COLUMN] == old:
+                fields[PSL_QNAME_COLUMN] = new
+                lines[i] = "\t".join(fields)
+        return "".join(lines)
+
+    result = deepcopy(result)
+    if old != new:
+        result.id = new
+    return result
+
+
 class Client:
     """A class for managing client connections to a server in a separate thread.
 
@@ -360,11 +505,14 @@ class Client:
         wait_ready: bool = False,
         wait_timeout: int = 60,
         parse: bool = True,
+        pool_size: int = 0,
+        max_open_files: int = 16,
+        result_cache_size: int = 0,
     ) -> None:
         """A class for querying a gfServer using a separate thread.
 
         Args:
-            host (str): The hostname or IP address of the server.
+            host (str): The hostname or IP address of the server, or `unix:/path.sock` for a server on a Unix domain socket.
             port (int): The port number of the server.
             seq_dir (Union[str, Path]): The directory where sequence data is stored.
             ttype (str, optional): Database type. One of 'dna', 'prot', 'dnax'. Default is 'dna'.
@@ -382,6 +530,14 @@ class Client:
             wait_ready (bool, optional): If True, wait until the server is ready before sending a query. Default is False.
             wait_timeout (int, optional): The number of seconds to wait for the server to be ready. Default is 60.
             parse (bool, optional): If True, parse the result of the query. Default is True.
+            pool_size (int, optional): The number of idle connections kept open to the server between queries.
+                0 opens a new connection for every query. Default is 0.
+            max_open_files (int, optional): The number of target sequence files kept open between queries, shared by
+                the threads of `query_many` and `iter_query`. The least recently used files are closed first.
+                0 reopens the target files for every query. Default is 16.
+            result_cache_size (int, optional): The number of results of in-memory sequences kept to answer repeated
+                queries without asking the server again. The least recently used results are dropped first.
+                0 disables the cache. Default is 0.
 
         Raises:
             ValueError: If any of the input values are invalid.
@@ -426,6 +582,31 @@ class Client:
         self._wait_timeout = wait_timeout
         self._server_option = server_option
         self._parse = parse
+        self._pool = ConnectionPool(host, str(port), pool_size) if pool_size > 0 else None
+        self._file_cache = TargetFileCache(max_open_files) if max_open_files > 0 else None
+        self._result_cache = _ResultCache(result_cache_size) if result_cache_size > 0 else None
+
+    def __enter__(self):
+        """Returns the client when used as a context manager."""
+        return self
+
+    def __exit__(self, *exc):
+        """Closes the pooled connections and the cached target files."""
+        self.close()
+
+    def close(self):
+        """Close the pooled connections to the server and the cached target files."""
+        if self._pool is not None:
+            self._pool.close()
+        if self._file_cache is not None:
+            self._file_cache.close()
+
+    def _reconnect_pool(self):
+        """Replaces the connection pool by one to the current host and port, closing the connections to the old server."""
+        if self._pool is None:
+            return
+        old, self._pool = self._pool, ConnectionPool(self.host, str(self.port), self._pool.maxIdle)
+        old.close()
 
     # fmt: off
     @property
@@ -468,14 +649,18 @@ class Client:
         """The hostname or IP address of the server."""
         return self._basic_option.hostName
     @host.setter
-    def host(self, value: str): self._basic_option.withHost(value)
+    def host(self, value: str):
+        self._basic_option.withHost(value)
+        self._reconnect_pool()
 
     @property
     def port(self):
         """The port number of the server."""
         return int(self._basic_option.portName)
     @port.setter
-    def port(self, value: int): self._basic_option.withPort(str(value))
+    def port(self, value: int):
+        self._basic_option.withPort(str(value))
+        self._reconnect_pool()
 
     @property
     def output_format(self):
@@ -530,19 +715,91 @@ class Client:
 
             yield item
 
+    def cache_info(self) -> CacheInfo:
+        """Report the hits, misses and size of the result cache.
+
+        Returns:
+            CacheInfo: The statistics of the result cache, all zero if the cache is disabled.
+        """
+        if self._result_cache is None:
+            return CacheInfo(0, 0, 0, 0)
+        return self._result_cache.info()
+
+    def cache_clear(self):
+        """Drop all cached results and reset the statistics of the result cache."""
+        if self._result_cache is not None:
+            self._result_cache.clear()
+
+    def _result_cache_key(self, seq: bytes):
+        option = self._basic_option
+        return (
+            option.hostName,
+            option.portName,
+            option.SeqDir,
+            option.genome,
+            option.genomeDataDir,
+            option.tType,
+            option.qType,
+            option.minScore,
+            option.minIdentity,
+            option.maxIntron,
+            option.outputFormat,
+            option.nohead,
+            self._parse,
+            seq,
+        )
+
+    def _cached_result(self, key, name: str):
+        if self._result_cache is None:
+            return _MISSING
+        cached = self._result_cache.get(key)
+        if cached is _MISSING:
+            return _MISSING
+        cached_name, result = cached
+        return _rename_result(result, cached_name, name)
+
+    def _cache_result(self, key, name: str, result):
+        if self._result_cache is not None:
+            # The caller gets `result` itself, keep a copy of a parsed result it may change.
+            self._result_cache.put(key, (name, result if isinstance(result, str) else deepcopy(result)))
+
     def _query(self, in_seq: str | Path):
-        basic_option = copy_client_option(self._basic_option)
         if isinstance(in_seq, Path):
+            basic_option = copy_client_option(self._basic_option)
             basic_option.withInName(str(in_seq)).withInSeq("").build()
+            return query_server(basic_option, parse=self._parse, pool=self._pool, file_cache=self._file_cache)
+
+        if _is_buffer(in_seq):
+            view = memoryview(in_seq)
+            seqid = f"{bytes(view[:5]).decode('latin-1')}_{view.nbytes}"
+            key = self._result_cache_key(bytes(view)) if self._result_cache is not None else None
+        else:
+            in_seq = str(in_seq)
+            seqid = f"{in_seq[:5]}_{len(in_seq)}"
+            key = self._result_cache_key(in_seq.encode()) if self._result_cache is not None else None
+
+        result = self._cached_result(key, seqid)
+        if result is not _MISSING:
+            return result
+
+        if _is_buffer(in_seq):
+            result = self.query_buffer(in_seq, names=[seqid])[0]
         else:
-            basic_option.withInSeq(str(in_seq)).withInName("").build()
-        return query_server(basic_option, parse=self._parse)
+            basic_option = copy_client_option(self._basic_option)
+            basic_option.withInSeq(in_seq).withInName("").build()
+            result = query_server(
+                basic_option, seqname=seqid, parse=self._parse, pool=self._pool, file_cache=self._file_cache
+            )
+
+        self._cache_result(key, seqid, result)
+        return result
 
     def query(self, in_seqs: INSEQS | list[str] | list[Path] | INSEQ):
         """Query the server with the specified sequences.
 
         Args:
-            in_seqs: The sequences to query.
+            in_seqs: The sequences to query. Sequences may also be bytes-like objects, such as `bytes` or NumPy
+                `uint8` arrays, which are read by the native client without converting them to `str`.
 
         Returns:
             The query results: `Bio.SearchIO.QueryResult`
@@ -571,7 +828,7 @@ class Client:
             ...     result6 = client.query(["cgTA", "test_case1.fa"])
             ...     print(result3[0]) # print result
         """
-        if isinstance(in_seqs, (str, Path)):
+        if isinstance(in_seqs, (str, Path)) or _is_buffer(in_seqs):
             in_seqs = [in_seqs]
 
         in_seqs = list(self._verify_input(in_seqs))
@@ -589,3 +846,273 @@ class Client:
             results.append(self._query(in_seq))
 
         return results
+
+    def query_many(self, in_seqs: INSEQS | list[str] | list[Path], workers: int = 4):
+        """Query the server with the specified sequences from a pool of worker threads.
+
+        The native client releases the GIL while it talks to the server, so up to `workers`
+        queries are in flight at the same time. Use it with a multi-threaded server.
+
+        Args:
+            in_seqs: The sequences to query. Sequences may also be bytes-like objects, such as `bytes` or NumPy
+                `uint8` arrays, which are read by the native client without converting them to `str`.
+            workers: The maximum number of queries sent to the server at the same time. Default is 4.
+
+        Returns:
+            The query results in the order of `in_seqs`: `Bio.SearchIO.QueryResult`
+
+        Examples:
+            >>> from pxblat import Client
+            >>> client = Client(host="localhost", port=65000, seq_dir=".", pool_size=4)
+            >>> results = client.query_many(["ATCG", "test_case1.fa"], workers=4)
+        """
+        if workers < 1:
+            msg = f"workers must be positive, got {workers}"
+            raise ValueError(msg)
+
+        if isinstance(in_seqs, (str, Path)) or _is_buffer(in_seqs):
+            in_seqs = [in_seqs]
+
+        in_seqs = list(self._verify_input(in_seqs))
+
+        if self._wait_ready:
+            wait_server_ready(
+                self.host,
+                self.port,
+                timeout=self._wait_timeout,
+                server_option=self._server_option,
+            )
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self._query, in_seqs))
+
+    def _query_record(self, name: str, seq: str):
+        key = self._result_cache_key(seq.encode()) if self._result_cache is not None else None
+        result = self._cached_result(key, name)
+        if result is not _MISSING:
+            return result
+
+        basic_option = copy_client_option(self._basic_option)
+        basic_option.withInSeq(seq).withInName("").build()
+        result = query_server(
+            basic_option, seqname=name, parse=self._parse, pool=self._pool, file_cache=self._file_cache
+        )
+        self._cache_result(key, name, result)
+        return result
+
+    @staticmethod
+    def _iter_records(in_seqs: INSEQ | Iterable[str | tuple[str, str]]) -> Iterator[tuple[str, str]]:
+        if isinstance(in_seqs, (str, Path)):
+            for record in SeqIO.parse(in_seqs, "fasta"):
+                yield record.id, str(record.seq)
+            return
+
+        for item in in_seqs:
+            if isinstance(item, str):
+                yield f"{item[:5]}_{len(item)}", item
+            else:
+                name, seq = item
+                yield name, str(seq)
+
+    def iter_query(
+        self,
+        in_seqs: INSEQ | Iterable[str | tuple[str, str]],
+        workers: int = 1,
+        look_ahead: int | None = None,
+    ) -> Iterator[tuple[str, object]]:
+        """Query the server one sequence at a time and yield each result as soon as it is ready.
+
+        The queries are read lazily and at most `look_ahead` of them are in flight, so memory use does not
+        grow with the size of the input. With more than one worker the results are yielded in the order
+        they finish, not in the order of `in_seqs`.
+
+        Args:
+            in_seqs: A FASTA file, or an iterable of sequences or `(query_id, sequence)` pairs.
+            workers: The maximum number of queries sent to the server at the same time. Default is 1.
+            look_ahead: The maximum number of queries read ahead of the results. Defaults to twice `workers`.
+
+        Returns:
+            An iterator of `(query_id, result)` pairs, where result is a `Bio.SearchIO.QueryResult` or None if
+            nothing was found.
+
+        Raises:
+            ValueError: If `workers` or `look_ahead` is invalid.
+            FileNotFoundError: If the FASTA file does not exist.
+            TypeError: If `in_seqs` is neither a FASTA file nor an iterable.
+
+        Examples:
+            >>> from pxblat import Client
+            >>> client = Client(host="localhost", port=65000, seq_dir=".")
+            >>> for query_id, result in client.iter_query("reads.fa", workers=4):
+            ...     print(query_id, result)
+        """
+        if workers < 1:
+            msg = f"workers must be positive, got {workers}"
+            raise ValueError(msg)
+
+        if look_ahead is None:
+            look_ahead = 2 * workers
+
+        if look_ahead < workers:
+            msg = f"look_ahead must be at least workers ({workers}), got {look_ahead}"
+            raise ValueError(msg)
+
+        if isinstance(in_seqs, (str, Path)):
+            if not Path(in_seqs).exists():
+                msg = f"File {in_seqs} does not exist"
+                raise FileNotFoundError(msg)
+        else:
+            try:
+                in_seqs = iter(in_seqs)
+            except TypeError:
+                msg = f"in_seqs must be a FASTA file or an iterable of sequences, got {type(in_seqs).__name__}"
+                raise TypeError(msg) from None
+
+        if self._wait_ready:
+            wait_server_ready(
+                self.host,
+                self.port,
+                timeout=self._wait_timeout,
+                server_option=self._server_option,
+            )
+
+        # Everything above runs at the call, only the queries themselves wait for the iteration.
+        records = self._iter_records(in_seqs)
+
+        if workers == 1:
+            return ((name, self._query_record(name, seq)) for name, seq in records)
+        return self._iter_query_threads(records, workers, look_ahead)
+
+    def _iter_query_threads(self, records: Iterator[tuple[str, str]], workers: int, look_ahead: int):
+        pending = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for name, seq in records:
+                    while len(pending) >= look_ahead:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield pending.pop(future), future.result()
+                    pending[executor.submit(self._query_record, name, seq)] = name
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), future.result()
+            finally:
+                # Stopped early, drop the queries that have not started yet.
+                for future in pending:
+                    future.cancel()
+
+    def query_batch(self, in_seqs: INSEQ | Iterable[str | tuple[str, str]]) -> dict:
+        """Query the server with a batch of in-memory sequences in one native call.
+
+        All sequences share one `ClientOption` and one connection to the server, which avoids the per-sequence
+        option copies of `query`. Identical queries are sent only once. The sequences go to the server in `batch`
+        commands that carry up to 10000 strands each, so short reads do not pay one request per strand. Servers
+        that do not know the command are queried one sequence at a time.
+
+        Args:
+            in_seqs: A FASTA file, or an iterable of sequences or `(query_id, sequence)` pairs.
+
+        Returns:
+            A dictionary mapping each query id to its result in the order of `in_seqs`. Results are
+            `Bio.SearchIO.QueryResult` or None if nothing was found, or the psl header and rows of the query if
+            the client does not parse results.
+
+        Raises:
+            ValueError: If two different sequences have the same query id, or the output format is not psl or pslx.
+
+        Examples:
+            >>> from pxblat import Client
+            >>> client = Client(host="localhost", port=65000, seq_dir=".")
+            >>> results = client.query_batch([("read1", "ATCG"), ("read2", "GGCTA")])
+            >>> results["read1"]
+        """
+        _check_split_format(self.output_format)
+        seqs: dict[str, str] = {}
+        for name, seq in self._iter_records(in_seqs):
+            if seqs.setdefault(name, seq) != seq:
+                msg = f"Query id {name} is used for different sequences"
+                raise ValueError(msg)
+
+        if self._wait_ready:
+            wait_server_ready(
+                self.host,
+                self.port,
+                timeout=self._wait_timeout,
+                server_option=self._server_option,
+            )
+
+        results = dict.fromkeys(seqs)
+        keys = {}
+        misses = []
+        for name, seq in seqs.items():
+            if self._result_cache is not None:
+                keys[name] = self._result_cache_key(seq.encode())
+            result = self._cached_result(keys.get(name), name)
+            if result is _MISSING:
+                misses.append((name, seq))
+            else:
+                results[name] = result
+
+        if misses:
+            basic_option = copy_client_option(self._basic_option)
+            basic_option.withInSeq("").withInName("").build()
+            ret = pygfClientBatch(basic_option, misses, self._pool, self._file_cache)
+            for name, result in _split_result(ret, [name for name, _ in misses], parse=self._parse).items():
+                self._cache_result(keys.get(name), name, result)
+                results[name] = result
+
+        return results
+
+    def query_buffer(self, seqs, offsets=None, names: list[str] | None = None) -> list:
+        """Query the server with reads packed in one bytes-like object.
+
+        The buffer of `seqs`, for example `bytes`, `bytearray`, `memoryview` or a NumPy `uint8` array, is read
+        by the native client directly, so the reads never go through Python `str`. All reads are sent in one
+        native call.
+
+        Args:
+            seqs: A contiguous bytes-like object holding the reads.
+            offsets: The boundaries of the reads, read `i` is `seqs[offsets[i]:offsets[i + 1]]`.
+                Defaults to the whole buffer being one read.
+            names: The query ids of the reads. Defaults to the index of each read.
+
+        Returns:
+            The query results in the order of the reads: `Bio.SearchIO.QueryResult`
+
+        Raises:
+            ValueError: If `offsets` and `names` do not describe the same reads, the names are not unique, or the
+                output format is not psl or pslx.
+
+        Examples:
+            >>> import numpy as np
+            >>> from pxblat import Client
+            >>> client = Client(host="localhost", port=65000, seq_dir=".")
+            >>> reads = np.frombuffer(b"ATCGGGCTAT", dtype=np.uint8)
+            >>> results = client.query_buffer(reads, offsets=[0, 4, 10])
+        """
+        _check_split_format(self.output_format)
+        if offsets is None:
+            offsets = [0, memoryview(seqs).nbytes]
+
+        if names is None:
+            names = [str(i) for i in range(len(offsets) - 1)]
+
+        if len(set(names)) != len(names):
+            msg = "names of the reads must be unique"
+            raise ValueError(msg)
+
+        if self._wait_ready:
+            wait_server_ready(
+                self.host,
+                self.port,
+                timeout=self._wait_timeout,
+                server_option=self._server_option,
+            )
+
+        basic_option = copy_client_option(self._basic_option)
+        basic_option.withInSeq("").withInName("").build()
+        ret = pygfClientBuffer(basic_option, seqs, offsets, names, self._pool, self._file_cache)
+        results = _split_result(ret, names, parse=self._parse)
+        return [results[name] for name in names]
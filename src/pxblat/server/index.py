@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import typing as t
+from pathlib import Path
+
+from pxblat.extc import ClientOption, ServerIndex, ServerOption, TargetFileCache, UsageStats
+
+from .client import Client, _check_split_format, _split_result
+
+if t.TYPE_CHECKING:
+    from collections.abc import Iterable
+
+PathLike = t.Union[str, Path]
+
+
+class Index:
+    """A gfServer index loaded in the current process.
+
+    The index can be served over TCP from native threads and queried directly from Python at the same time, so the
+    genome is held in memory only once. Direct queries skip the socket round trip and the text exchange of ranges.
+
+    Attributes:
+        two_bit (list[str]): The sequence files the index is built from.
+        option (ServerOption): The options the index is built with.
+
+    Order:
+        -10
+    """
+
+    def __init__(
+        self,
+        two_bit: PathLike | list[PathLike],
+        *,
+        tile_size: int = 11,
+        step_size: int = 11,
+        min_match: int = 2,
+        max_gap: int = 2,
+        rep_match: int = 0,
+        mask: bool = False,
+        trans: bool = False,
+        no_simp_rep_mask: bool = False,
+        max_dna_hits: int = 100,
+        max_nt_size: int = 40000,
+        per_seq_max: PathLike | None = None,
+        index_file: PathLike | None = None,
+    ) -> None:
+        """Builds the index of the given sequence files, or loads it from `index_file`.
+
+        The GIL is released while the index is built.
+
+        Args:
+            two_bit (Path | str | list[Path | str]): The 2bit or nib files to index.
+            tile_size (int, optional): The size of n-mers to index. Defaults to 11.
+            step_size (int, optional): The spacing between tiles. Defaults to 11.
+            min_match (int, optional): The number of n-mer matches that trigger detailed alignment. Defaults to 2.
+            max_gap (int, optional): The number of insertions or deletions allowed between n-mers. Defaults to 2.
+            rep_match (int, optional): The number of occurrences of a tile that triggers repeat masking the tile. Defaults to 0.
+            mask (bool, optional): Whether to use masking from the 2bit file. Defaults to False.
+            trans (bool, optional): Whether to translate the database to protein in 6 frames. Defaults to False.
+            no_simp_rep_mask (bool, optional): Whether to suppress simple repeat masking. Defaults to False.
+            max_dna_hits (int, optional): The maximum number of hits for a DNA query. Defaults to 100.
+            max_nt_size (int, optional): The maximum size of untranslated DNA query sequence. Defaults to 40000.
+            per_seq_max (Path | str | None, optional): The path to a file that contains one seq filename (possibly
+                with ':seq' suffix) per line. Defaults to None.
+            index_file (Path | str | None, optional): The path to an index file created by `gfServer index` to load
+                instead of building the index. Defaults to None.
+
+        Raises:
+            RuntimeError: If a sequence file cannot be read.
+
+        Examples:
+            >>> from pxblat import Index
+            >>> index = Index("tests/data/test_ref.2bit", step_size=5)
+            >>> index.find_ranges("TGAGAGGCATCTGGCCCTCCCTGCGCTGTGCCAGCAGCTTGGAGAACCCACACTC")
+            [(1, 52, 'test_ref.2bit:chr1', 12700, 12751, 9)]
+        """
+        option = (
+            ServerOption()
+            .withTileSize(tile_size)
+            .withStepSize(step_size)
+            .withMinMatch(min_match)
+            .withMaxGap(max_gap)
+            .withRepMatch(rep_match)
+            .withMask(mask)
+            .withTrans(trans)
+            .withNoSimpRepMask(no_simp_rep_mask)
+            .withMaxDnaHits(max_dna_hits)
+            .withMaxNtSize(max_nt_size)
+            .withPerSeqMax("" if per_seq_max is None else str(per_seq_max))
+            .withIndexFile("" if index_file is None else str(index_file))
+            .build()
+        )
+        self._load(two_bit, option)
+
+    @classmethod
+    def from_option(cls, two_bit: PathLike | list[PathLike], option: ServerOption) -> Index:
+        """Builds the index of the given sequence files with the options of a server.
+
+        Args:
+            two_bit (Path | str | list[Path | str]): The 2bit or nib files to index.
+            option (ServerOption): The options of the server, on which `build` has already been called.
+
+        Returns:
+            Index: The loaded index.
+        """
+        index = cls.__new__(cls)
+        index._load(two_bit, option)
+        return index
+
+    def _load(self, two_bit: PathLike | list[PathLike], option: ServerOption):
+        files = [two_bit] if isinstance(two_bit, (str, Path)) else two_bit
+        self._index = ServerIndex([Path(file).as_posix() for file in files], option)
+        self._file_cache = TargetFileCache()
+
+    @property
+    def two_bit(self) -> list[str]:
+        """The sequence files the index is built from."""
+        return self._index.seqFiles
+
+    @property
+    def option(self) -> ServerOption:
+        """The options the index is built with."""
+        return self._index.option
+
+    def find_ranges(self, seq: str) -> list[tuple[int, int, str, int, int, int]]:
+        """Find where a DNA sequence hits the genome, without going through a server.
+
+        The ranges are those a server sends for a `query` command, one strand only.
+
+        Args:
+            seq (str): The DNA sequence.
+
+        Returns:
+            list[tuple[int, int, str, int, int, int]]: The query start, query end, target name, target start, target
+            end and number of tile hits of each range.
+        """
+        ranges = []
+        for line in self._index.ranges(seq):
+            q_start, q_end, t_name, t_start, t_end, hits = line.split("\t")
+            ranges.append((int(q_start), int(q_end), t_name, int(t_start), int(t_end), int(hits)))
+        return ranges
+
+    def align(
+        self,
+        seqs: str | Path | Iterable[str | tuple[str, str]],
+        *,
+        seq_dir: PathLike | None = None,
+        min_score: int = 30,
+        min_identity: float = 90.0,
+        max_intron: int = 750000,
+        output_format: str = "psl",
+        nohead: bool = False,
+        parse: bool = True,
+    ) -> list:
+        """Align DNA sequences against the index without going through a server.
+
+        The ranges of both strands of each query are looked up in the index and aligned in one native call that
+        releases the GIL, so several threads may align batches at the same time. The results are those `Client.query`
+        gets from a server of this index.
+
+        Args:
+            seqs: A sequence, a FASTA file, or an iterable of sequences or `(query_id, sequence)` pairs.
+            seq_dir (Path | str | None, optional): The directory of the indexed files, where the target sequences are
+                read. Defaults to the directory of the first indexed file.
+            min_score (int, optional): Sets minimum score. Default is 30.
+            min_identity (float, optional): Sets minimum sequence identity (in percent). Default is 90.
+            max_intron (int, optional): Sets maximum intron size. Default is 750000.
+            output_format (str, optional): Controls output file format. Default is 'psl'.
+            nohead (bool, optional): If True, suppresses 5-line psl header. Default is False.
+            parse (bool, optional): If True, parse the results. Default is True.
+
+        Returns:
+            The results in the order of the queries: `Bio.SearchIO.QueryResult`, or None if nothing was found.
+
+        Raises:
+            ValueError: If two different sequences have the same query id, the output format is not psl or pslx, or the
+                index is translated.
+
+        Examples:
+            >>> from pxblat import Index
+            >>> index = Index("tests/data/test_ref.2bit", step_size=5)
+            >>> results = index.align(["TGAGAGGCATCTGGCCCTCCCTGCGCTGTGCCAGCAGCTTGGAGAACCCACACTC", ("read1", "ATCG")])
+            >>> results = index.align(Path("tests/data/test_case1.fa"))
+        """
+        _check_split_format(output_format)
+        if isinstance(seqs, str):
+            seqs = [seqs]
+
+        records = list(Client._iter_records(seqs))
+        queries = dict(records)
+        if len(queries) != len(set(records)):
+            msg = "different sequences must have different query ids"
+            raise ValueError(msg)
+
+        if seq_dir is None:
+            seq_dir = Path(self.two_bit[0]).parent
+
+        option = (
+            ClientOption()
+            .withMinScore(min_score)
+            .withMinIdentity(min_identity)
+            .withMaxIntron(max_intron)
+            .withOutputFormat(output_format)
+            .withNohead(nohead)
+            .withSeqDir(str(seq_dir))
+            .build()
+        )
+        names = list(queries)
+        ret = self._index.align(option, names, list(queries.values()), self._file_cache)
+        results = _split_result(ret, names, parse=parse)
+        return [results[name] for name, _ in records]
+
+    def serve(self, host: str, port: int, stats: UsageStats | None = None) -> int:
+        """Serve the index over TCP from native threads until a quit message drains the server.
+
+        The call blocks without holding the GIL, run it in a thread to keep using the index from Python.
+
+        Args:
+            host (str): The hostname or IP address to bind the server to.
+            port (int): The port number to bind the server to.
+            stats (UsageStats | None, optional): The usage statistics the server updates. Defaults to None.
+
+        Returns:
+            int: The number of requests abandoned when the server was stopped.
+        """
+        return self._index.serve(host, str(port), UsageStats() if stats is None else stats)
+
+    def __repr__(self) -> str:
+        """Return the indexed files."""
+        return f"Index({self.two_bit})"
@@ -1,21 +1,25 @@
 from __future__ import annotations
 
+import threading
 import typing as t
 from contextlib import ContextDecorator
 from multiprocessing import Process
 from pathlib import Path
 
-from pxblat.extc import ServerOption, UsageStats, pystartServer
+from pxblat.extc import ServerOption, UsageStats, pystartServer, serverThreadCount
 
 from .basic import (
+    _threads_option,
     check_port_in_use,
     files,
     find_free_port,
+    health_server,
     server_query,
     status_server,
     stop_server,
     wait_server_ready,
 )
+from .index import Index
 
 if t.TYPE_CHECKING:
     from .status import Status
@@ -31,6 +35,10 @@ def _pystartServer(
     pystartServer(hostName, portName, len(seqFiles), seqFiles, options, stats)
 
 
+# Seconds a stopping server may take on top of its drain timeout before its process is terminated.
+_STOP_GRACE = 5
+
+
 def create_server_option() -> ServerOption:
     """Creates a new ServerOption object with default values.
 
@@ -94,6 +102,13 @@ class Server(ContextDecorator):
         log_facility: str | None = None,
         per_seq_max: str | Path | None = None,
         index_file: str | Path | None = None,
+        keep_alive_timeout: int = 5,
+        threads: int | str = 1,
+        max_pending: int = 128,
+        drain_timeout: int = 30,
+        event_loop: bool = False,
+        workers: int = 0,
+        in_process: bool = False,
         daemon=True,
         use_others: bool = False,
         timeout: int = 60,
@@ -102,8 +117,9 @@ class Server(ContextDecorator):
         """Initializes a gfServer object with the given parameters.
 
         Args:
-            host (str): The hostname or IP address to bind the server to.
-            port (int): The port number to bind the server to.
+            host (str): The hostname or IP address to bind the server to, or `unix:/path.sock` to listen on a Unix
+                domain socket, which is faster for clients on the same machine.
+            port (int): The port number to bind the server to, ignored for a Unix domain socket.
             two_bit (Path | str): The path to the 2bit file or the URL of the 2bit file.
             can_stop (bool, optional): Whether to allow the server to be stopped. Defaults to True.
             mask (bool, optional): Whether to use masking from the 2bit file. Defaults to False.
@@ -127,7 +143,28 @@ class Server(ContextDecorator):
             per_seq_max (str | Path | None, optional): The path to a file that contains one seq filename (possibly with ':seq' suffix) per line. Defaults to None.
             index_file (str | Path | None, optional): The path to the index file created by `gfServer index`.
                 Saving index can speed up `gfServer` startup by two orders of magnitude. Defaults to None.
-            daemon (bool, optional): Whether to run the server as a daemon process. Defaults to True.
+            keep_alive_timeout (int, optional): The number of seconds an idle client connection is kept open for
+                further queries. 0 closes every connection after one request. Defaults to 5.
+            threads (int | str, optional): The number of threads building the index and answering clients, or
+                'auto' for one thread per CPU in the CPU affinity mask of the server process. A translated index
+                is built on at most six threads, one per reading frame.
+                Defaults to 1.
+            max_pending (int, optional): The number of accepted connections waiting for a free thread. Once reached,
+                the server stops accepting until a thread is free, and further clients wait in the listen backlog.
+                0 means no limit. Defaults to 128.
+            drain_timeout (int, optional): The number of seconds a stopping server waits for the requests in flight
+                before abandoning them. Defaults to 30.
+            event_loop (bool, optional): Whether one thread reads the requests of every client with epoll and hands
+                the threads only requests received in full, so that idle or slow clients do not hold a thread.
+                Defaults to False.
+            workers (int, optional): The number of processes forked once the index is loaded, which share its
+                memory and listen on the port together with SO_REUSEPORT, each with `threads` threads. Stopping
+                the server stops all of them. Not for a Unix domain socket or `in_process`. 0 serves from a single
+                process. Defaults to 0.
+            in_process (bool, optional): Whether to load the index in the current process and serve it from a
+                thread instead of a child process. The index is then available as `index` for direct queries and
+                `stat` is updated live. Defaults to False.
+            daemon (bool, optional): Whether to run the server as a daemon process, or thread when `in_process`. Defaults to True.
             use_others (bool, optional): Whether to allow other users to access the server. Defaults to False.
             timeout (int, optional): The number of seconds to wait for the server to start. Defaults to 60.
             block (bool, optional): Whether to block until the server is ready. Defaults to False.
@@ -186,6 +223,12 @@ class Server(ContextDecorator):
             .withPerSeqMax(per_seq_max)
             .withNoSimpRepMask(no_simp_rep_mask)
             .withIndexFile(index_file)
+            .withKeepAliveTimeout(keep_alive_timeout)
+            .withThreads(_threads_option(threads))
+            .withMaxPending(max_pending)
+            .withDrainTimeout(drain_timeout)
+            .withEventLoop(event_loop)
+            .withWorkers(workers)
         )
 
         self.stat = UsageStats()
@@ -193,11 +236,14 @@ class Server(ContextDecorator):
         self.use_others = use_others
         self.timeout = timeout
         self.daemon = daemon
+        self.in_process = in_process
 
         self._block = block
         self._is_ready = False
         self._is_open = True
         self._process = None
+        self._thread = None
+        self._index: Index | None = None
 
     @property
     def host(self):
@@ -298,6 +344,26 @@ class Server(ContextDecorator):
             if self._process is not None:
                 self._process.start()
 
+    def _start_in_process(self):
+        """Load the index in the current process and serve it from a thread, or from the caller in blocking mode."""
+        if check_port_in_use(self.host, self.port):
+            if self.use_others:
+                self._is_open = False
+                return
+            self.port = find_free_port(self.host, start=self.port + 1)
+
+        self._is_open = True
+        self._index = Index.from_option(self.two_bit, self.option)
+        if self._block:
+            self._index.serve(self.host, self.port, self.stat)
+        else:
+            self._thread = threading.Thread(
+                target=self._index.serve,
+                args=(self.host, self.port, self.stat),
+                daemon=self.daemon,
+            )
+            self._thread.start()
+
     def _check(self):
         if not Path(self.two_bit).exists():
             msg = f"Invalid two_bit file: {self.two_bit}"
@@ -308,32 +374,59 @@ class Server(ContextDecorator):
 
         If the server is set to non-blocking mode, it will start the server in a separate process.
         If the server is set to blocking mode, it will start the server in the current process.
+        If the server is set to run in process, the index is loaded before this method returns.
 
         Raises:
-            ValueError: If the given two_bit file or URL is invalid.
+            ValueError: If the given two_bit file or URL is invalid, or the server runs in process with workers.
+            RuntimeError: If the server runs in process and its index cannot be loaded.
         """
+        if self.in_process and self.workers > 0:
+            msg = "workers are forked by a server process, they can't serve an index in process"
+            raise ValueError(msg)
         self.option.build()
-        if not self._block:
+        if self.in_process:
+            self._start_in_process()
+        elif not self._block:
             self._start_nb()
         else:
             self._start_b()
 
-    def stop(self):
+    def stop(self) -> int | None:
         """Stops the gfServer instance if it is running.
 
-        This method sends a stop signal to the server process, causing it to terminate gracefully.
+        This method sends a stop signal to the server, which stops accepting connections, finishes the requests in
+        flight and abandons those still running after `drain_timeout` seconds. The server process is terminated
+        only if it does not exit by itself.
+
+        Returns:
+            Optional[int]: The number of requests the server abandoned, or None if it did not report it.
 
         See Also:
             :func:`stop_server` is a free function to stop a server.
         """
+        abandoned = None
         if self._is_open:
-            stop_server(self.host, self.port)
+            try:
+                abandoned = stop_server(self.host, self.port, wait=True, timeout=self.drain_timeout + _STOP_GRACE)
+            except OSError:
+                abandoned = None
 
         if self._process is not None:
-            self._process.terminate()
+            self._process.join(_STOP_GRACE if abandoned is not None else 0)
+            if self._process.is_alive():
+                self._process.terminate()
+
+        if self._thread is not None:
+            self._thread.join(_STOP_GRACE if abandoned is not None else 0)
 
         self._is_open = False
         self._is_ready = False
+        return abandoned
+
+    @property
+    def index(self) -> Index | None:
+        """The index of a server running in process, or None."""
+        return self._index
 
     def status(self, *, instance=False) -> dict[str, str] | Status:
         """Retrieves the status of the gfServer instance.
@@ -349,6 +442,17 @@ class Server(ContextDecorator):
         """
         return status_server(self.host, self.port, self.option, instance=instance)
 
+    def health(self) -> dict[str, str]:
+        """Retrieves the health of the gfServer instance without waiting for the usage statistics.
+
+        Returns:
+            dict[str, str]: The version of the server and whether its index is `loaded`.
+
+        See Also:
+            :func:`health_server` is a free function to query server health.
+        """
+        return health_server(self.host, self.port)
+
     def files(self) -> list[str]:
         """Retrieves the list of files served by the gfServer instance.
 
@@ -400,6 +504,8 @@ class Server(ContextDecorator):
     def wait_ready(self, *, restart: bool = False):
         """Wait server ready in block mode.
 
+        The server is polled with the `health` command every 0.1 seconds until it reports its index as loaded.
+
         Args:
             timeout: Timeout for wait server ready.
             restart: If timeout, restart server and wait again.
@@ -516,4 +622,28 @@ class Server(ContextDecorator):
     def index_file(self) -> str: return self.option.indexFile
     @index_file.setter
     def index_file(self, value: str): self.option.indexFile= value
+    @property
+    def keep_alive_timeout(self) -> int: return self.option.keepAliveTimeout
+    @keep_alive_timeout.setter
+    def keep_alive_timeout(self, value: int): self.option.keepAliveTimeout = value
+    @property
+    def threads(self) -> int: return serverThreadCount(self.option.threads)
+    @threads.setter
+    def threads(self, value: int | str): self.option.threads = _threads_option(value)
+    @property
+    def max_pending(self) -> int: return self.option.maxPending
+    @max_pending.setter
+    def max_pending(self, value: int): self.option.maxPending = value
+    @property
+    def drain_timeout(self) -> int: return self.option.drainTimeout
+    @drain_timeout.setter
+    def drain_timeout(self, value: int): self.option.drainTimeout = value
+    @property
+    def event_loop(self) -> bool: return self.option.eventLoop
+    @event_loop.setter
+    def event_loop(self, value: bool): self.option.eventLoop = value
+    @property
+    def workers(self) -> int: return self.option.workers
+    @workers.setter
+    def workers(self, value: int): self.option.workers = value
     # fmt: on
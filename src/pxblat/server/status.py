@@ -27,6 +27,17 @@ class Status(DataClassJSONMixin, DataClassDictMixin):
         noSig (int): The number of 'noSig' (no signature) events by the server.
         trimmed (int): The number of trimmed events by the server.
         warnings (int): The number of warnings issued by the server.
+        uptime (float): The number of seconds since the server loaded its index.
+        qps (float): The number of BLAT and PCR requests answered per second since the server loaded its index.
+        latency_mean (float): The mean time in milliseconds to answer a request, an alias for 'latency mean'.
+        latency_max (float): The longest time in milliseconds to answer a request, an alias for 'latency max'.
+        workers (int): The number of worker processes sharing the index, 0 for a server of one process.
+        rss_shared (int): The resident memory in kB of the process that answered that is shared with other
+            processes, such as the index workers inherit, an alias for 'rss shared'.
+        rss_private (int): The resident memory in kB of the process that answered that is its own, an alias
+            for 'rss private'.
+
+    The last seven attributes are 0 for servers that do not report them, such as the gfServer of UCSC.
     """
 
     version: str
@@ -44,3 +55,10 @@ class Status(DataClassJSONMixin, DataClassDictMixin):
     noSig: int
     trimmed: int
     warnings: int
+    uptime: float = 0.0
+    qps: float = 0.0
+    latency_mean: float = field(default=0.0, metadata=field_options(alias="latency mean"))
+    latency_max: float = field(default=0.0, metadata=field_options(alias="latency max"))
+    workers: int = 0
+    rss_shared: int = field(default=0, metadata=field_options(alias="rss shared"))
+    rss_private: int = field(default=0, metadata=field_options(alias="rss private"))
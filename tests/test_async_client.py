@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+from pxblat import AsyncClient
+from pxblat import Client
+from pxblat.server.async_client import _reverse_complement
+
+
+def test_async_client_query(start_server, fa_seq1, fa_seq2, fa_file1):
+    seqs = [fa_seq1, fa_seq2, fa_file1]
+    expected = Client(
+        host="localhost",
+        port=start_server.port,
+        seq_dir="tests/data/",
+        min_score=20,
+        min_identity=90,
+        parse=False,
+    ).query(seqs)
+
+    async def main():
+        async with AsyncClient(
+            "localhost",
+            start_server.port,
+            "tests/data/",
+            min_score=20,
+            min_identity=90,
+            parse=False,
+        ) as client:
+            return await client.query(seqs)
+
+    assert asyncio.run(main()) == expected
+
+
+def test_async_client_max_in_flight(start_server, fa_seq1, tmp_path, monkeypatch):
+    reads = tmp_path / "reads.fa"
+    reads.write_text("".join(f">read{i}\n{fa_seq1[i:]}\n" for i in range(20)))
+    expected = Client(
+        host="localhost",
+        port=start_server.port,
+        seq_dir="tests/data/",
+        min_score=20,
+        min_identity=90,
+        parse=False,
+    ).query(reads)
+
+    open_connections = peak = 0
+    open_connection = asyncio.open_connection
+
+    async def counting_open_connection(*args, **kwargs):
+        nonlocal open_connections, peak
+        reader, writer = await open_connection(*args, **kwargs)
+        open_connections += 1
+        peak = max(peak, open_connections)
+        close = writer.close
+
+        def counting_close():
+            nonlocal open_connections
+            open_connections -= 1
+            close()
+
+        writer.close = counting_close
+        return reader, writer
+
+    monkeypatch.setattr(asyncio, "open_connection", counting_open_connection)
+
+    async def main():
+        async with AsyncClient(
+            "localhost",
+            start_server.port,
+            "tests/data/",
+            min_score=20,
+            min_identity=90,
+            parse=False,
+            max_in_flight=2,
+        ) as client:
+            return await client.query(reads)
+
+    # The 40 strands of one FASTA file share the connection limit.
+    assert asyncio.run(main()) == expected
+    assert peak == 2
+    assert open_connections == 0
+
+
+def test_async_client_files_pcr(start_server, fa_seq1):
+    async def main():
+        client = AsyncClient("localhost", start_server.port, "tests/data/")
+        files = await client.files()
+        products = await client.pcr(fa_seq1[:20], _reverse_complement(fa_seq1[-20:].lower()), 1000)
+        return files, products
+
+    files, products = asyncio.run(main())
+    assert files == ["tests/data/test_ref.2bit"]
+    assert products == [("test_ref.2bit:chr1", 12700, 12835, "+")]
+
+
+def test_async_client_aclose_keeps_loop_running():
+    async def main():
+        client = AsyncClient("localhost", 65000, "tests/data/")
+        in_flight = asyncio.ensure_future(client._run_in_executor(time.sleep, 0.3))
+        await asyncio.sleep(0)
+
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.ensure_future(tick())
+        await client.aclose()
+        ticker.cancel()
+        await in_flight
+        return ticks, client._executor
+
+    ticks, executor = asyncio.run(main())
+    assert ticks > 5
+    assert executor is None
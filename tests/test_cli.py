@@ -50,6 +50,16 @@ def test_fa2twobit_cli(tmp_path, two_bit):
     assert filecmp.cmp(out.as_posix(), two_bit)
 
 
+def test_package_cli(tmp_path, two_bit):
+    result = runner.invoke(app, ["server", "package", two_bit.as_posix(), tmp_path.as_posix(), "--genome", "ref"])
+
+    assert result.exit_code == 0
+    assert filecmp.cmp((tmp_path / "ref.2bit").as_posix(), two_bit)
+    assert (tmp_path / "ref.untrans.gfidx").exists()
+    assert (tmp_path / "ref.trans.gfidx").exists()
+    assert (tmp_path / "ref.sha256").exists()
+
+
 @pytest.fixture()
 def start_server2(port, two_bit):
     server = Server("localhost", port + 1, two_bit, can_stop=True, step_size=5, use_others=True)
@@ -1,6 +1,11 @@
 # -*- coding: utf-8 -*-
+import socket
+from threading import Thread
+
 import pytest
 from pxblat import Client
+from pxblat import Index
+from pxblat.server import status_server
 from rich import print
 
 
@@ -47,3 +52,357 @@ def test_gclient_parse(start_server, fa_seq1, fa_file1, parse):
 
     for r in ret1:
         print(r)
+
+
+def test_gclient_pool(start_server, fa_seq1, fa_file1):
+    with Client(
+        host="localhost",
+        port=start_server.port,
+        seq_dir="tests/data/",
+        min_score=20,
+        min_identity=90,
+        parse=False,
+        pool_size=2,
+    ) as client:
+        ret = client.query([fa_seq1, fa_seq1, fa_file1])
+        assert client._pool.keepAliveSupported()
+        assert client._pool.idleCount() == 1
+
+    expected = Client(
+        host="localhost",
+        port=start_server.port,
+        seq_dir="tests/data/",
+        min_score=20,
+        min_identity=90,
+        parse=False,
+    ).query([fa_seq1, fa_seq1, fa_file1])
+
+    assert ret == expected
+    assert client._pool.idleCount() == 0
+
+
+def test_gclient_pool_follows_port(start_server, fa_seq1):
+    with Client(host="localhost", port=1, seq_dir="tests/data/", min_score=20, min_identity=90, pool_size=2) as client:
+        client.port = start_server.port
+        assert client._pool.portName == str(start_server.port)
+        [result] = client.query(fa_seq1)
+        assert result is not None
+        assert client._pool.idleCount() == 1
+
+
+@pytest.mark.parametrize("max_open_files", [0, 1])
+def test_gclient_file_cache(start_server, fa_seq1, fa_file1, max_open_files):
+    with Client(
+        host="localhost",
+        port=start_server.port,
+        seq_dir="tests/data/",
+        min_score=20,
+        min_identity=90,
+        parse=False,
+        max_open_files=max_open_files,
+    ) as client:
+        ret = client.query([fa_seq1, fa_seq1, fa_file1])
+        if max_open_files:
+            assert client._file_cache.openFiles() == 1
+
+    expected = Client(
+        host="localhost",
+        port=start_server.port,
+        seq_dir="tests/data/",
+        min_score=20,
+        min_identity=90,
+        parse=False,
+        max_open_files=0,
+    ).query([fa_seq1, fa_seq1, fa_file1])
+
+    assert ret == expected
+    if max_open_files:
+        assert client._file_cache.openFiles() == 0
+
+
+def test_gclient_file_cache_shared_limit(start_server, fa_seq1):
+    with Client(
+        host="localhost",
+        port=start_server.port,
+        seq_dir="tests/data/",
+        min_score=20,
+        min_identity=90,
+        max_open_files=1,
+    ) as client:
+        assert all(client.query_many([fa_seq1] * 16, workers=8))
+        # Each worker returns its own file cache, the limit holds for all of them together.
+        assert client._file_cache.openFiles() == 1
+
+
+@pytest.mark.parametrize("pool_size", [0, 2])
+def test_gclient_query_many(start_server, fa_seq1, fa_seq2, pool_size):
+    with Client(
+        host="localhost",
+        port=start_server.port,
+        seq_dir="tests/data/",
+        min_score=20,
+        min_identity=90,
+        parse=False,
+        pool_size=pool_size,
+    ) as client:
+        seqs = [fa_seq1, fa_seq2] * 4
+        expected = client.query(seqs)
+        ret = client.query_many(seqs, workers=3)
+
+    assert ret == expected
+
+
+def test_gclient_in_memory_seqs(start_server, client_option, fa_seq1, tmp_path):
+    from pxblat.extc import pygfClient, pygfClientSeqs
+
+    fa_file = tmp_path / "seqs.fa"
+    fa_file.write_text(f">seq1\n{fa_seq1}\n>seq2\n{fa_seq1.lower()}\n")
+
+    client_option.withPort(str(start_server.port)).withInName(str(fa_file))
+    expected = pygfClient(client_option)
+    ret = pygfClientSeqs(client_option, [("seq1", fa_seq1), ("seq2", fa_seq1.lower())])
+
+    assert ret == expected
+    assert b"seq2" in ret
+
+
+def test_gclient_large_output(start_server, client_option, fa_seq1):
+    from pxblat.extc import pygfClientSeqs
+
+    client_option.withPort(str(start_server.port)).withOutputFormat("pslx")
+    seqs = [(f"seq{i}", fa_seq1) for i in range(300)]
+    ret = pygfClientSeqs(client_option, seqs)
+
+    assert len(ret) > 65536
+    assert ret.count(b"\tseq") == 300
+    assert b"\tseq299\t" in ret
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_gclient_iter_query(start_server, fa_seq1, fa_seq2, fa_file1, workers):
+    with Client(
+        host="localhost",
+        port=start_server.port,
+        seq_dir="tests/data/",
+        min_score=20,
+        min_identity=90,
+        parse=False,
+    ) as client:
+        seqs = [fa_seq1, fa_seq2] * 4
+        expected = [(f"{seq[:5]}_{len(seq)}", ret) for seq, ret in zip(seqs, client.query(seqs))]
+        ret = list(client.iter_query(iter(seqs), workers=workers, look_ahead=workers + 1))
+
+        assert sorted(ret) == sorted(expected)
+        assert list(client.iter_query(fa_file1, workers=workers)) == [("case1", client.query(fa_file1)[0])]
+
+        # Bad arguments raise at the call, not at the first result.
+        with pytest.raises(ValueError, match="look_ahead"):
+            client.iter_query(seqs, workers=workers, look_ahead=workers - 1)
+        with pytest.raises(FileNotFoundError):
+            client.iter_query("tests/data/missing.fa", workers=workers)
+        with pytest.raises(TypeError, match="int"):
+            client.iter_query(1, workers=workers)
+
+
+@pytest.mark.parametrize("parse", [True, False])
+def test_gclient_query_batch(start_server, fa_seq1, fa_seq2, parse):
+    client = Client(
+        host="localhost",
+        port=start_server.port,
+        seq_dir="tests/data/",
+        min_score=20,
+        min_identity=90,
+        parse=parse,
+    )
+    ret = client.query_batch([("read1", fa_seq1), ("read2", fa_seq2), ("read3", fa_seq1), ("read1", fa_seq1)])
+
+    assert list(ret) == ["read1", "read2", "read3"]
+    if parse:
+        assert ret["read2"] is None
+        assert ret["read1"].id == "read1"
+        assert len(ret["read1"]) == len(ret["read3"]) == len(client.query(fa_seq1)[0])
+    else:
+        assert ret["read2"].startswith("psLayout")
+        assert ret["read1"] == ret["read3"].replace("read3", "read1")
+        assert ret["read1"] == client.query(fa_seq1)[0].replace(f"{fa_seq1[:5]}_{len(fa_seq1)}", "read1")
+
+    with pytest.raises(ValueError, match="read1"):
+        client.query_batch([("read1", fa_seq1), ("read1", fa_seq2)])
+
+
+def test_gclient_query_batch_output_format(start_server, fa_seq1, fa_seq2):
+    client = Client(
+        host="localhost",
+        port=start_server.port,
+        seq_dir="tests/data/",
+        min_score=20,
+        min_identity=90,
+        parse=False,
+        output_format="pslx",
+    )
+    ret = client.query_batch([("read1", fa_seq1), ("read2", fa_seq2)])
+    assert ret["read1"] == client.query(fa_seq1)[0].replace(f"{fa_seq1[:5]}_{len(fa_seq1)}", "read1")
+    assert "\tread1\t" not in ret["read2"]
+
+    # Other formats have no query name column to split the rows of a batch by.
+    client.output_format = "blast8"
+    with pytest.raises(ValueError, match="blast8"):
+        client.query_batch([("read1", fa_seq1), ("read2", fa_seq2)])
+    with pytest.raises(ValueError, match="blast8"):
+        client.query_buffer(fa_seq1.encode())
+
+
+def test_gclient_query_batch_command(start_server, fa_seq1, fa_seq2):
+    reads = [(f"read{i}", fa_seq1[i:] if i % 2 else fa_seq2) for i in range(40)]
+    client = Client(
+        host="localhost",
+        port=start_server.port,
+        seq_dir="tests/data/",
+        min_score=20,
+        min_identity=90,
+        parse=False,
+        pool_size=1,
+    )
+    with client:
+        blat_count = int(status_server("localhost", start_server.port, start_server.option)["blat requests"])
+        ret = client.query_batch(reads)
+        assert client._pool.batchSupported()
+        # One query per strand, all of them in a single batch command.
+        status = status_server("localhost", start_server.port, start_server.option)
+        assert int(status["blat requests"]) - blat_count == 2 * len(reads)
+
+    for name, seq in reads:
+        expected = client.query(seq)[0].replace(f"{seq[:5]}_{len(seq)}", name)
+        assert ret[name] == expected
+
+
+def test_gclient_buffer(start_server, fa_seq1, fa_seq2):
+    np = pytest.importorskip("numpy")
+    client = Client(
+        host="localhost",
+        port=start_server.port,
+        seq_dir="tests/data/",
+        min_score=20,
+        min_identity=90,
+        parse=False,
+    )
+    expected = client.query([fa_seq1, fa_seq2])
+
+    assert client.query([fa_seq1.encode(), bytearray(fa_seq2.encode())]) == expected
+    assert client.query(memoryview(fa_seq1.encode())) == expected[:1]
+
+    reads = np.frombuffer((fa_seq1 + fa_seq2).encode(), dtype=np.uint8)
+    offsets = np.array([0, len(fa_seq1), reads.size])
+    ret = client.query_buffer(reads, offsets=offsets, names=["read1", "read2"])
+    assert ret == [
+        expected[0].replace(f"{fa_seq1[:5]}_{len(fa_seq1)}", "read1"),
+        expected[1].replace(f"{fa_seq2[:5]}_{len(fa_seq2)}", "read2"),
+    ]
+
+    with pytest.raises(ValueError, match="offsets"):
+        client.query_buffer(reads, offsets=[0, reads.size + 1])
+
+
+@pytest.mark.parametrize("parse", [True, False])
+def test_gclient_result_cache(start_server, fa_seq1, fa_seq2, parse):
+    client = Client(
+        host="localhost",
+        port=start_server.port,
+        seq_dir="tests/data/",
+        min_score=20,
+        min_identity=90,
+        parse=parse,
+        result_cache_size=1,
+    )
+    first = client.query(fa_seq1)[0]
+    # Hits are copies of the cached result, equal to the first one.
+    assert [str(r) for r in client.query([fa_seq1, fa_seq1.encode()])] == [str(first), str(first)]
+    assert client.cache_info() == (2, 1, 1, 1)
+
+    ret = client.query_batch([("read1", fa_seq1), ("read2", fa_seq2)])
+    assert client.cache_info() == (3, 2, 1, 1)
+    if parse:
+        assert ret["read1"].id == "read1"
+        assert len(ret["read1"]) == len(first)
+        assert ret["read2"] is None
+    else:
+        assert ret["read1"] == first.replace(f"{fa_seq1[:5]}_{len(fa_seq1)}", "read1")
+
+    client.min_score = 30
+    client.query(fa_seq2)
+    assert client.cache_info() == (3, 3, 1, 1)
+
+    client.cache_clear()
+    assert client.cache_info() == (0, 0, 1, 0)
+
+
+def test_gclient_result_cache_copies(start_server, fa_seq1):
+    client = Client(
+        host="localhost",
+        port=start_server.port,
+        seq_dir="tests/data/",
+        min_score=20,
+        min_identity=90,
+        result_cache_size=1,
+    )
+    first = client.query(fa_seq1)[0]
+    expected = str(first)
+    first.id = "changed"
+    first.pop(first.hit_keys[0])
+
+    [hit] = client.query(fa_seq1)
+    assert client.cache_info().hits == 1
+    assert str(hit) == expected
+    hit.id = "changed again"
+    assert str(client.query(fa_seq1)[0]) == expected
+
+
+def _serve_rejecting(listener, index, rejected, accepted):
+    """Answer keep-alive gfServer queries from `index`, and both strands of `rejected` with an error."""
+    signature = "0ddf270562684f29"
+    rejected = {rejected.lower(), rejected.lower()[::-1].translate(str.maketrans("acgt", "tgca"))}
+    while True:
+        try:
+            conn, _ = listener.accept()
+        except OSError:
+            return
+        accepted.append(conn)
+        with conn:
+            while command := conn.recv(4096).decode():
+                command = command.removeprefix(signature).split()
+                if command[0] == "keepAlive":
+                    replies = ["ok"]
+                else:
+                    conn.sendall(b"Y")
+                    size, dna = int(command[1]), b""
+                    while len(dna) < size:
+                        dna += conn.recv(size - len(dna))
+                    dna = dna.decode().lower()
+                    replies = ["Error: query rejected"] if dna in rejected else index._index.ranges(dna)
+                    replies.append("end")
+                conn.sendall(b"".join(bytes([len(reply)]) + reply.encode() for reply in replies))
+
+
+def test_gclient_pool_after_server_error(tmp_path, two_bit, fa_seq1, fa_seq2):
+    index = Index(two_bit, step_size=5)
+    listener = socket.create_server(("localhost", 0))
+    accepted = []
+    Thread(target=_serve_rejecting, args=(listener, index, fa_seq2, accepted), daemon=True).start()
+
+    reads = tmp_path / "reads.fa"
+    reads.write_text(f">rejected\n{fa_seq2}\n>read1\n{fa_seq1}\n")
+    expected = index.align([("read1", fa_seq1)], min_score=20, parse=False)
+    with Client(
+        host="localhost",
+        port=listener.getsockname()[1],
+        seq_dir="tests/data/",
+        min_score=20,
+        min_identity=90,
+        parse=False,
+        pool_size=1,
+    ) as client:
+        # The strands after an error read their own replies, also on the pooled connection of the next query.
+        assert client.query(reads) == expected
+        assert client.query(reads) == expected
+        assert len(accepted) == 1
+    listener.close()
@@ -0,0 +1,124 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from pxblat import Client
+from pxblat import Index
+from pxblat.server import build_index
+from pxblat.server import create_server_option
+from pxblat.server import package_genome
+from pxblat.server import Server
+
+
+def test_index_find_ranges(two_bit, fa_seq1):
+    index = Index(two_bit, step_size=5)
+    assert index.two_bit == [two_bit.as_posix()]
+    assert index.option.stepSize == 5
+
+    ranges = index.find_ranges(fa_seq1)
+    assert ranges
+    assert all(t_name.endswith(":chr1") for _, _, t_name, _, _, _ in ranges)
+
+
+def test_index_align(two_bit, fa_seq1, fa_seq2, fa_file1):
+    index = Index(two_bit, step_size=5)
+
+    [result, missing] = index.align([fa_seq1, fa_seq2], min_score=20)
+    assert result.id == f"{fa_seq1[:5]}_{len(fa_seq1)}"
+    assert result.hit_keys == ["chr1"]
+    assert missing is None
+
+    [renamed] = index.align([("read1", fa_seq1)], min_score=20, parse=False)
+    assert "\tread1\t" in renamed
+    assert index.align(fa_file1, min_score=20)
+
+    with ThreadPoolExecutor(4) as executor:
+        assert (
+            list(executor.map(lambda _: index.align(fa_seq1, min_score=20, parse=False), range(8)))
+            == [index.align(fa_seq1, min_score=20, parse=False)] * 8
+        )
+
+    with pytest.raises(ValueError, match="query ids"):
+        index.align([("read1", fa_seq1), ("read1", fa_seq2)])
+    with pytest.raises(ValueError, match="maf"):
+        index.align([fa_seq1, fa_seq2], parse=False, output_format="maf")
+
+
+def test_index_load_file(tmp_path, two_bit, fa_seq1, fa_seq2):
+    index = Index(two_bit, step_size=5)
+    index_file = tmp_path / "test_ref.untrans.gfidx"
+    build_index(index_file.as_posix(), [two_bit.as_posix()], index.option)
+    # Revision 1.1 stores where each list starts, so loading maps the lists in place.
+    assert index_file.read_bytes()[32:36] == b"1.1\0"
+
+    loaded = Index(two_bit, step_size=5, index_file=index_file)
+    assert loaded.find_ranges(fa_seq1) == index.find_ranges(fa_seq1)
+    assert loaded.align([fa_seq1, fa_seq2], min_score=20, parse=False) == index.align(
+        [fa_seq1, fa_seq2], min_score=20, parse=False
+    )
+
+
+def test_package_genome(tmp_path, reference, two_bit, fa_seq1):
+    out_dir = tmp_path / "test_ref"
+    files = package_genome(reference, out_dir)
+    assert files["2bit"].read_bytes() == two_bit.read_bytes()
+    assert files["untrans"].name == "test_ref.untrans.gfidx"
+    assert files["trans"].name == "test_ref.trans.gfidx"
+    checksums = files["sha256"].read_text().splitlines()
+    assert [line.split("  ")[1] for line in checksums] == [
+        "test_ref.2bit",
+        "test_ref.untrans.gfidx",
+        "test_ref.trans.gfidx",
+    ]
+
+    loaded = Index(files["2bit"], index_file=files["untrans"])
+    assert loaded.find_ranges(fa_seq1)
+
+    manifest = json.loads(files["manifest"].read_text())
+    assert manifest["test_ref.trans.gfidx"]["options"]["trans"]
+    assert manifest["test_ref.untrans.gfidx"]["size"] == files["untrans"].stat().st_size
+
+    # Up to date files are kept without hashing them, a modified one is rebuilt.
+    mtimes = {name: path.stat().st_mtime_ns for name, path in files.items()}
+    with patch("pxblat.server.basic._sha256", side_effect=AssertionError):
+        assert package_genome(reference, out_dir) == files
+    assert {name: path.stat().st_mtime_ns for name, path in files.items()} == mtimes
+
+    trans = files["trans"].read_bytes()
+    files["trans"].write_bytes(b"corrupt")
+    assert package_genome(reference, out_dir) == files
+    assert files["trans"].read_bytes() == trans
+    for name in ("2bit", "untrans", "sha256"):
+        assert files[name].stat().st_mtime_ns == mtimes[name]
+
+    # Changing the index options rebuilds the indexes but keeps the 2bit file.
+    untrans = files["untrans"].read_bytes()
+    package_genome(reference, out_dir, options=create_server_option().withStepSize(5).build())
+    assert files["untrans"].read_bytes() != untrans
+    assert files["2bit"].stat().st_mtime_ns == mtimes["2bit"]
+    assert json.loads(files["manifest"].read_text())["test_ref.untrans.gfidx"]["options"]["stepSize"] == 5
+
+
+def test_index_invalid_file(tmp_path):
+    with pytest.raises(RuntimeError, match="index"):
+        Index(tmp_path / "missing.2bit")
+
+
+def test_server_in_process(port, two_bit, fa_seq1):
+    port += 17
+    server = Server("localhost", port, two_bit, can_stop=True, step_size=5, threads=2, in_process=True)
+    server.start()
+    server.wait_ready()
+    assert server.index is not None
+
+    client = Client("localhost", port, seq_dir="tests/data/", min_score=20, min_identity=90)
+    [result] = client.query(fa_seq1)
+    assert result is not None
+
+    # The index answers directly what a client gets from the server.
+    client = Client("localhost", port, seq_dir="tests/data/", min_score=20, min_identity=90, parse=False)
+    assert server.index.align([fa_seq1], min_score=20, parse=False) == client.query(fa_seq1)
+    assert server.index.find_ranges(fa_seq1)
+    assert server.stat.blatCount > 0
+    assert server.stop() == 0
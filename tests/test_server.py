@@ -1,18 +1,25 @@
+import socket
 import time
+from dataclasses import replace
 
 import pytest
 from pxblat import Client
 from pxblat import ClientOption
 from pxblat import UsageStats
+from pxblat.server import build_index
 from pxblat.server import check_port_open
+from pxblat.server import check_server_ready
 from pxblat.server import ClientThread
+from pxblat.server import create_server_option
 from pxblat.server import find_free_port
+from pxblat.server import health_server
 from pxblat.server import query_server
 from pxblat.server import Server
 from pxblat.server import start_server_mt_nb
 from pxblat.server import status_server
 from pxblat.server import stop_server
 from pxblat.server import wait_server_ready
+from pxblat.server.basic import _gfSignature
 from rich import print
 
 
@@ -49,6 +56,158 @@ def test_server_start_class(port, two_bit):
     server.stop()
 
 
+def test_server_health(port, two_bit):
+    port += 13
+    assert not check_server_ready("localhost", port)
+
+    server = Server("localhost", port, two_bit, can_stop=True, step_size=5)
+    server.start()
+    server.wait_ready()
+
+    start = time.perf_counter()
+    assert health_server("localhost", port)["index"] == "loaded"
+    assert server.health()["index"] == "loaded"
+    assert check_server_ready("localhost", port)
+    assert server.status()
+    assert time.perf_counter() - start < 5
+    server.stop()
+
+
+def test_server_threads(port, two_bit, fa_seq1):
+    port += 12
+    server = Server("localhost", port, two_bit, can_stop=True, step_size=5, threads="auto", max_pending=1)
+    assert server.option.threads == 0
+    assert server.threads >= 1
+    assert server.max_pending == 1
+
+    with pytest.raises(ValueError, match="threads"):
+        server.threads = -1
+
+    server.start()
+    server.wait_ready()
+
+    client = Client("localhost", port, seq_dir="tests/data/", min_score=20, min_identity=90)
+    results = client.query_many([fa_seq1] * 8, workers=8)
+    assert all(result is not None for result in results)
+    assert server.stop() == 0
+
+
+def test_server_drain(port, two_bit):
+    port += 16
+    server = Server("localhost", port, two_bit, can_stop=True, step_size=5, threads=2, drain_timeout=1)
+    server.start()
+    server.wait_ready()
+
+    # A client that never sends its request keeps a worker busy until the drain timeout.
+    with socket.create_connection(("localhost", port)):
+        time.sleep(0.2)
+        start = time.perf_counter()
+        assert server.stop() == 1
+        assert time.perf_counter() - start < 5
+
+    assert not check_port_open("localhost", port)
+
+
+def test_server_event_loop(port, two_bit, fa_seq1):
+    port += 18
+    server = Server("localhost", port, two_bit, can_stop=True, step_size=5, threads=1, event_loop=True)
+    assert server.event_loop
+    server.start()
+    server.wait_ready()
+
+    client = Client("localhost", port, seq_dir="tests/data/", min_score=20, min_identity=90, parse=False, pool_size=1)
+    with socket.create_connection(("localhost", port)), socket.create_connection(("localhost", port)) as slow:
+        # Neither an idle client nor one stuck in the middle of its upload holds the only worker.
+        slow.sendall(f"{_gfSignature()}query 100".encode())
+        assert slow.recv(1) == b"Y"
+        slow.sendall(b"ACGT")
+        time.sleep(0.2)
+
+        start = time.perf_counter()
+        with client:
+            results = client.query([fa_seq1] * 3)
+            batch = client.query_batch([("read1", fa_seq1)])
+            assert client._pool.keepAliveSupported()
+        assert time.perf_counter() - start < 5
+        assert results[0] is not None
+        assert results[1:] == results[:2]
+        assert batch["read1"] == results[0].replace(f"{fa_seq1[:5]}_{len(fa_seq1)}", "read1")
+
+        assert server.stop() == 1
+
+
+def test_server_workers(port, two_bit, fa_seq1):
+    port += 19
+    server = Server("localhost", port, two_bit, can_stop=True, step_size=5, workers=2)
+    server.start()
+    server.wait_ready()
+
+    client = Client("localhost", port, seq_dir="tests/data/", min_score=20, min_identity=90, parse=False)
+    expected = client.query(fa_seq1)
+    for _ in range(4):
+        assert client.query(fa_seq1) == expected
+
+    # Workers count into shared statistics and report their memory.
+    status = server.status(instance=True)
+    assert status.workers == 2
+    assert status.blat_requests == 10
+    assert status.rss_shared > status.rss_private > 0
+
+    assert server.stop() == 0
+    assert server._process.exitcode == 0
+    assert not check_port_open("localhost", port)
+
+    with pytest.raises(ValueError, match="workers"):
+        Server("localhost", port, two_bit, workers=2, in_process=True).start()
+
+
+def test_build_index_threads(tmp_path, two_bit):
+    option = create_server_option().withTileSize(6).withStepSize(3).build()
+    indexes = []
+    for threads in [1, 3]:
+        index_file = tmp_path / str(threads) / "test_ref.untrans.gfidx"
+        index_file.parent.mkdir()
+        build_index(index_file.as_posix(), [two_bit.as_posix()], option, threads=threads)
+        indexes.append(index_file.read_bytes())
+
+    assert option.threads == 1
+    assert indexes[0] == indexes[1]
+
+    with pytest.raises(ValueError, match="threads"):
+        build_index((tmp_path / "test_ref.untrans.gfidx").as_posix(), [two_bit.as_posix()], option, threads=0)
+
+
+def test_build_trans_index_threads(tmp_path, two_bit):
+    option = create_server_option().withTrans(True).build().withRepMatch(30000)
+    indexes = []
+    for threads in [1, 4, 6]:
+        index_file = tmp_path / str(threads) / "test_ref.trans.gfidx"
+        index_file.parent.mkdir()
+        build_index(index_file.as_posix(), [two_bit.as_posix()], option, threads=threads)
+        indexes.append(index_file.read_bytes())
+
+    assert indexes[0] == indexes[1] == indexes[2]
+
+
+def test_server_unix_socket(tmp_path, two_bit, fa_seq1):
+    sock = tmp_path / "gfserver.sock"
+    host = f"unix:{sock}"
+    server = Server(host, 0, two_bit, can_stop=True, step_size=5, threads=2)
+    server.start()
+    server.wait_ready()
+    assert sock.is_socket()
+
+    client = Client(host, 0, seq_dir="tests/data/", min_score=20, min_identity=90)
+    [result] = client.query(fa_seq1)
+    assert result is not None
+    assert status_server(host, 0, server.option)["blat requests"] == "2"
+
+    assert stop_server(host, 0, wait=True) == 0
+    server.stop()
+    assert not sock.exists()
+    assert not check_port_open(host, 0)
+
+
 @pytest.mark.parametrize(
     "seqname",
     ["seqname1", None],
@@ -168,6 +327,24 @@ def test_server_stop(server_option, port):
     assert not check_port_open("localhost", port)
 
 
+def test_server_per_seq_max(tmp_path, port, two_bit, fa_seq1):
+    port += 15
+    per_seq_max = tmp_path / "per_seq_max.txt"
+    per_seq_max.write_text(f"{two_bit.name}:chr1\n")
+
+    server = Server(
+        "localhost", port, two_bit, can_stop=True, step_size=5, per_seq_max=per_seq_max, max_dna_hits=4, threads=4
+    )
+    server.start()
+    server.wait_ready()
+
+    client = Client("localhost", port, seq_dir="tests/data/", min_score=20, min_identity=90, parse=False)
+    [expected] = client.query(fa_seq1)
+    assert "chr1" in expected
+    assert client.query_many([fa_seq1] * 16, workers=8) == [expected] * 16
+    server.stop()
+
+
 @pytest.mark.smoke()
 def test_sever_with_context(
     server_option, port, two_bit, expected_status_instance, fa_seq1
@@ -186,7 +363,7 @@ def test_sever_with_context(
         server.wait_ready()
         assert server.is_ready()
         status = server.status(instance=True)
-        assert status == expected_status_instance
+        assert replace(status, uptime=0.0, rss_shared=0, rss_private=0) == expected_status_instance
         ret = list(client.query(fa_seq1))
         for r in ret:
             print("\n")
@@ -1,5 +1,24 @@
+from dataclasses import replace
+
+from pxblat import Client, Server
 from pxblat.server import Status
 
+COUNTERS = (
+    "pcr_requests",
+    "blat_requests",
+    "bases",
+    "misses",
+    "noSig",
+    "trimmed",
+    "warnings",
+    "uptime",
+    "qps",
+    "latency_mean",
+    "latency_max",
+    "rss_shared",
+    "rss_private",
+)
+
 
 def test_construct_status_from_dict(expected_status, expected_status_instance):
     instance = Status.from_dict(expected_status)
@@ -8,4 +27,20 @@ def test_construct_status_from_dict(expected_status, expected_status_instance):
 
 def test_construct_status(start_server, expected_status_instance):
     status = start_server.status(instance=True)
-    assert status == expected_status_instance
+    expected_counters = {name: getattr(expected_status_instance, name) for name in COUNTERS}
+    assert replace(status, **expected_counters) == expected_status_instance
+
+
+def test_status_counts_queries(port, two_bit, fa_seq1):
+    port += 14
+    with Server("localhost", port, two_bit, can_stop=True, step_size=5, threads=2) as server:
+        server.wait_ready()
+        client = Client("localhost", port, seq_dir="tests/data/", min_score=20, min_identity=90)
+        client.query_many([fa_seq1] * 4, workers=4)
+
+        status = server.status(instance=True)
+
+    assert status.blat_requests >= 4
+    assert status.bases >= 4 * len(fa_seq1)
+    assert status.qps > 0
+    assert status.latency_max >= status.latency_mean > 0